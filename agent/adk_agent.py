@@ -2,98 +2,85 @@
 
 import logging
 import os
+from typing import AsyncGenerator, Optional
 
 from google.adk.agents import Agent
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+
+from agent.retry import RetryPolicy
+from agent.tracing import inject_context
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_MODEL = "gemini-2.0-flash"
 AGENT_NAME = "master_agent"
+# ADK app name for the Runner and every session / memory lookup
+APP_NAME = "master_agent"
 
 DEFAULT_INSTRUCTION = """You are a helpful AI assistant.
 You engage in natural conversations and help users with their questions.
 Be concise, friendly, and helpful in your responses."""
 
 
-def load_prompt_from_vertex_ai(project_id: str, location: str, prompt_id: str) -> str | None:
-    """Load system prompt from Vertex AI Prompt Management.
+def _propagate_trace(llm_request: LlmRequest) -> None:
+    """Add the current trace context to the request's HTTP headers."""
+    headers = inject_context({})
+    if not headers:
+        return
+    if llm_request.config.http_options is None:
+        llm_request.config.http_options = types.HttpOptions()
+    llm_request.config.http_options.headers = {**(llm_request.config.http_options.headers or {}), **headers}
 
-    Uses REST API directly to bypass SDK thinkingConfig parsing bug.
-    See: https://github.com/googleapis/google-cloud-python/issues/14941
 
-    Args:
-        project_id: GCP project ID.
-        location: GCP location (e.g., europe-west4).
-        prompt_id: Vertex AI Prompt resource ID.
+class RetryingGemini(Gemini):
+    """Gemini model whose calls go through a shared ``RetryPolicy``.
 
-    Returns:
-        System instruction text or None if loading fails.
+    A call is retried only while it has not yielded a response yet, so a
+    streamed turn never repeats text the client already received. Each
+    attempt sends the current trace context (ADK's LLM span) to Vertex AI.
     """
-    try:
-        import google.auth
-        import google.auth.transport.requests
-        import httpx
-
-        # Get credentials
-        credentials, _ = google.auth.default()
-        auth_req = google.auth.transport.requests.Request()
-        credentials.refresh(auth_req)
-
-        # Prompts are stored as datasets in Vertex AI
-        url = (
-            f"https://{location}-aiplatform.googleapis.com/v1beta1/"
-            f"projects/{project_id}/locations/{location}/datasets/{prompt_id}"
-        )
-
-        headers = {
-            "Authorization": f"Bearer {credentials.token}",
-            "Content-Type": "application/json",
-        }
-
-        response = httpx.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-
-        # Extract system instruction from:
-        # metadata.promptApiSchema.multimodalPrompt.promptMessage.systemInstruction.parts[0].text
-        try:
-            system_instruction = (
-                data.get("metadata", {})
-                .get("promptApiSchema", {})
-                .get("multimodalPrompt", {})
-                .get("promptMessage", {})
-                .get("systemInstruction", {})
-                .get("parts", [{}])[0]
-                .get("text")
-            )
-
-            if system_instruction:
-                logger.info(
-                    "Loaded prompt from Vertex AI: prompt_id=%s, length=%d",
-                    prompt_id,
-                    len(system_instruction),
-                )
-                return system_instruction
-
-        except (IndexError, KeyError, TypeError):
-            pass
-
-        logger.warning("Prompt %s has no system instruction", prompt_id)
-        return None
-
-    except Exception as e:
-        logger.warning(
-            "Failed to load prompt from Vertex AI: prompt_id=%s, error=%s",
-            prompt_id,
-            str(e),
-        )
-        return None
+
+    _retry_policy: Optional[RetryPolicy] = PrivateAttr(default=None)
+
+    def __init__(self, retry_policy: Optional[RetryPolicy] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._retry_policy = retry_policy
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        policy = self._retry_policy
+        if policy is None:
+            _propagate_trace(llm_request)
+            async for response in super().generate_content_async(llm_request, stream):
+                yield response
+            return
+
+        policy.record_request()
+        attempt = 0
+        while True:
+            yielded = False
+            _propagate_trace(llm_request)
+            try:
+                async for response in super().generate_content_async(llm_request, stream):
+                    yielded = True
+                    yield response
+                return
+            except Exception as e:
+                delay = None if yielded else policy.retry_delay("agent_turn", e, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            await policy.wait(delay)
 
 
 def create_agent(
     model_name: str | None = None,
     instruction: str | None = None,
     tools: list | None = None,
+    retry_policy: RetryPolicy | None = None,
 ) -> Agent:
     """Create and configure an ADK Agent.
 
@@ -101,6 +88,7 @@ def create_agent(
         model_name: The model to use. Defaults to MODEL_NAME env var or gemini-2.0-flash.
         instruction: Custom instruction for the agent. Defaults to built-in instruction.
         tools: Optional list of tools for the agent (e.g., PreloadMemoryTool).
+        retry_policy: Optional retry policy for transient model errors (429/5xx).
 
     Returns:
         Configured ADK Agent instance.
@@ -111,9 +99,14 @@ def create_agent(
     if instruction is None:
         instruction = os.environ.get("AGENT_INSTRUCTION", DEFAULT_INSTRUCTION)
 
+    model = (
+        RetryingGemini(model=model_name, retry_policy=retry_policy)
+        if retry_policy is not None
+        else model_name
+    )
     kwargs = dict(
         name=AGENT_NAME,
-        model=model_name,
+        model=model,
         instruction=instruction,
         description="Master agent for handling user conversations",
     )
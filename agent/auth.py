@@ -0,0 +1,192 @@
+"""Shared cache for Google Cloud access tokens and Cloud Run ID tokens.
+
+``google.auth`` token fetches are blocking HTTP calls. ``TokenManager`` runs
+them in a worker thread, caches each token until shortly before it expires
+and refreshes it ahead of expiry in the background, so request handlers
+almost never wait for (or block the event loop on) a token round-trip.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timezone
+from typing import Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CLOUD_PLATFORM_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+_DEFAULT_TTL = 3000.0  # used when a token carries no expiry
+
+
+def is_localhost(url: str) -> bool:
+    """Return True for local services, which are called without credentials."""
+    return "localhost" in url or "127.0.0.1" in url
+
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    """Read the ``exp`` claim of a JWT without verifying it."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _fetch_id_token(audience: str) -> tuple[str, Optional[float]]:
+    """Fetch a Cloud Run ID token for ``audience`` (blocking)."""
+    import google.auth.transport.requests
+    import google.oauth2.id_token
+
+    request = google.auth.transport.requests.Request()
+    token = google.oauth2.id_token.fetch_id_token(request, audience)
+    return token, _jwt_expiry(token)
+
+
+@dataclass
+class _Token:
+    value: str
+    expires_at: float
+
+
+class TokenManager:
+    """Caches access tokens per scope set and ID tokens per audience.
+
+    A cached token is returned while it is valid for at least
+    ``min_validity`` seconds; once it is within ``refresh_margin`` seconds
+    of expiry a background refresh is started and callers keep using the
+    current token. Concurrent misses for the same token share one fetch.
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = 300.0,
+        min_validity: float = 30.0,
+        fetch_access_token: Optional[Callable[[tuple[str, ...]], tuple[str, Optional[float]]]] = None,
+        fetch_id_token: Optional[Callable[[str], tuple[str, Optional[float]]]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize the manager.
+
+        Args:
+            refresh_margin: Seconds before expiry at which a background refresh starts.
+            min_validity: Tokens expiring sooner than this are refreshed inline.
+            fetch_access_token: Blocking ``scopes -> (token, expires_at)`` fetcher
+                (defaults to Application Default Credentials).
+            fetch_id_token: Blocking ``audience -> (token, expires_at)`` fetcher.
+            clock: Wall-clock time source (token expiries are Unix timestamps).
+        """
+        self._refresh_margin = refresh_margin
+        self._min_validity = min_validity
+        self._fetch_access_token = fetch_access_token or self._fetch_adc_access_token
+        self._fetch_id_token = fetch_id_token or _fetch_id_token
+        self._clock = clock
+        self._credentials: dict[tuple[str, ...], object] = {}
+        self._tokens: dict[tuple[str, str], _Token] = {}
+        self._refreshing: dict[tuple[str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.fetches = 0
+        self.background_refreshes = 0
+        self.failures = 0
+
+    def _fetch_adc_access_token(self, scopes: tuple[str, ...]) -> tuple[str, Optional[float]]:
+        """Refresh Application Default Credentials for ``scopes`` (blocking)."""
+        import google.auth
+        import google.auth.transport.requests
+
+        credentials = self._credentials.get(scopes)
+        if credentials is None:
+            credentials, _ = google.auth.default(scopes=list(scopes))
+            self._credentials[scopes] = credentials
+        credentials.refresh(google.auth.transport.requests.Request())
+        expiry = credentials.expiry  # naive UTC datetime
+        return credentials.token, expiry.replace(tzinfo=timezone.utc).timestamp() if expiry else None
+
+    async def access_token(self, scopes: Sequence[str] = (CLOUD_PLATFORM_SCOPE,)) -> str:
+        """Return an OAuth2 access token for ``scopes``.
+
+        Raises:
+            Exception: Whatever the credential fetch raised if no valid token is cached.
+        """
+        scopes = tuple(scopes)
+        return await self._get(("access", " ".join(scopes)), lambda: self._fetch_access_token(scopes))
+
+    async def id_token(self, audience: str) -> str:
+        """Return an ID token for calling the service at ``audience``.
+
+        Raises:
+            Exception: Whatever the ID token fetch raised if no valid token is cached.
+        """
+        return await self._get(("id", audience), lambda: self._fetch_id_token(audience))
+
+    async def id_token_header(self, audience: str) -> dict:
+        """Return an Authorization header for a Cloud Run service.
+
+        Empty for localhost, and on failure (logged), so callers can still
+        reach services that allow unauthenticated access.
+        """
+        if is_localhost(audience):
+            return {}
+        try:
+            return {"Authorization": f"Bearer {await self.id_token(audience)}"}
+        except Exception as e:
+            logger.warning("Failed to fetch ID token: audience=%s, error=%s", audience, e)
+            return {}
+
+    async def _get(self, key: tuple[str, str], fetch: Callable) -> str:
+        token = self._tokens.get(key)
+        now = self._clock()
+        if token is not None and now < token.expires_at - self._min_validity:
+            self.hits += 1
+            if now >= token.expires_at - self._refresh_margin and key not in self._refreshing:
+                self.background_refreshes += 1
+                self._refresh(key, fetch)
+            return token.value
+        # Shield the shared fetch so one cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def _refresh(self, key: tuple[str, str], fetch: Callable) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, fetch), name=f"token-refresh:{key[0]}")
+            self._refreshing[key] = task
+            task.add_done_callback(lambda t: self._on_refreshed(key, t))
+        return task
+
+    async def _fetch(self, key: tuple[str, str], fetch: Callable) -> str:
+        self.fetches += 1
+        value, expires_at = await asyncio.to_thread(fetch)
+        if expires_at is None:
+            expires_at = self._clock() + _DEFAULT_TTL
+        self._tokens[key] = _Token(value, expires_at)
+        return value
+
+    def _on_refreshed(self, key: tuple[str, str], task: asyncio.Task) -> None:
+        self._refreshing.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.failures += 1
+            logger.warning("Token refresh failed: kind=%s, error=%s", key[0], error)
+
+    async def close(self) -> None:
+        """Cancel outstanding refreshes."""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Return cache and refresh counters."""
+        return {
+            "cached": len(self._tokens),
+            "refreshing": len(self._refreshing),
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "background_refreshes": self.background_refreshes,
+            "failures": self.failures,
+        }
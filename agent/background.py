@@ -0,0 +1,57 @@
+"""Tracking for fire-and-forget background tasks."""
+
+import asyncio
+import logging
+from typing import Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTaskSet:
+    """Runs coroutines off the request path while keeping a reference to each task.
+
+    Holding the references prevents tasks from being garbage-collected
+    mid-flight, failures are logged instead of lost, and ``drain()`` lets
+    shutdown wait for outstanding work.
+    """
+
+    def __init__(self):
+        self._tasks: set[asyncio.Task] = set()
+        self.started = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def spawn(self, coro: Coroutine, name: str) -> asyncio.Task:
+        """Schedule ``coro`` as a tracked task."""
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        self.started += 1
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.failed += 1
+            logger.warning("Background task failed: task=%s, error=%s", task.get_name(), error)
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait for all tracked tasks; cancel whatever is left after ``timeout`` seconds."""
+        if not self._tasks:
+            return
+        pending = set(self._tasks)
+        _, still_running = await asyncio.wait(pending, timeout=timeout)
+        if still_running:
+            logger.warning("Background tasks still running at shutdown: count=%d", len(still_running))
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*still_running, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Return in-flight and lifetime counters."""
+        return {"in_flight": len(self._tasks), "started": self.started, "failed": self.failed}
@@ -0,0 +1,110 @@
+"""Bulkheads: per-upstream concurrency limits with a bounded wait queue.
+
+Each dependency (text model, image model, Docling, GCS, Vertex sessions) gets
+its own ``Bulkhead``, so a backed-up upstream (e.g. the global image model
+endpoint) can only hold its own slots and never the capacity other endpoints
+need. Calls beyond the limit wait in a bounded queue for at most
+``queue_timeout`` seconds; anything else is rejected at once with
+``BulkheadFull``, which the API turns into 503 + Retry-After.
+"""
+
+import asyncio
+import math
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncContextManager, AsyncIterator, Optional
+
+
+class BulkheadFull(Exception):
+    """Raised when a bulkhead cannot admit a call (queue full or wait timed out)."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is overloaded, retry after {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """Concurrency limit + bounded FIFO wait queue for one upstream."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: int = 0,
+        queue_timeout: float = 5.0,
+    ):
+        """Initialize the bulkhead.
+
+        Args:
+            name: Upstream name, used in errors and stats.
+            max_concurrent: Calls allowed in flight at once.
+            max_queue: Calls allowed to wait for a slot; more are rejected at once.
+            queue_timeout: Seconds a call may wait for a slot before it is rejected.
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, math.ceil(queue_timeout))
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._active = 0
+        self._waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.peak_active = 0
+        self.peak_waiting = 0
+
+    async def _acquire(self) -> None:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise BulkheadFull(self.name, self.retry_after)
+        self._waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self._waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise BulkheadFull(self.name, self.retry_after) from None
+        finally:
+            self._waiting -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the upstream's slots for the duration of the block.
+
+        Raises:
+            BulkheadFull: If the wait queue is full or no slot frees up in time.
+        """
+        await self._acquire()
+        self._active += 1
+        self.admitted += 1
+        self.peak_active = max(self.peak_active, self._active)
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Return limits, current utilization and admission counters."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "waiting": self._waiting,
+            "utilization": round(self._active / self.max_concurrent, 4),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "peak_active": self.peak_active,
+            "peak_waiting": self.peak_waiting,
+        }
+
+
+def admit(bulkhead: Optional[Bulkhead]) -> AsyncContextManager:
+    """``bulkhead.slot()``, or a no-op context when no bulkhead is configured."""
+    return bulkhead.slot() if bulkhead is not None else nullcontext()
@@ -0,0 +1,94 @@
+"""Bounded in-memory caches."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded LRU cache with an idle TTL and hit/miss/eviction counters.
+
+    Entries are dropped when the cache exceeds ``max_size`` (least recently
+    used first) or when they have not been read or written for
+    ``ttl_seconds``. Not thread-safe; intended for use from the event loop.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries (must be positive).
+            ttl_seconds: Idle time after which an entry expires; None disables expiry.
+            clock: Monotonic time source (injectable for tests).
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # key -> (value, last_access)
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - last_access > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (refreshing its idle timer) or ``default``."""
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, last_access = entry
+        now = self._clock()
+        if self._expired(last_access, now):
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries[key] = (value, now)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or replace an entry, evicting the least recently used on overflow."""
+        self._entries[key] = (value, self._clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove an entry. Returns True if it was present."""
+        return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return size and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,68 @@
+"""Splitting of Docling markdown into model-sized chunks."""
+
+import re
+
+# Docling marks page boundaries with a comment or a form feed
+_PAGE_BREAK = re.compile(r"^(?:<!--\s*page[ _-]?break\s*-->|\f)\s*$", re.IGNORECASE)
+_HEADING = re.compile(r"^#{1,6}\s")
+
+
+def _sections(content: str) -> list[str]:
+    """Split at headings (kept with their section) and page breaks (dropped)."""
+    sections: list[str] = []
+    current: list[str] = []
+    for line in content.splitlines(keepends=True):
+        if _PAGE_BREAK.match(line):
+            if current:
+                sections.append("".join(current))
+            current = []
+            continue
+        if _HEADING.match(line) and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return [section for section in sections if section.strip()]
+
+
+def _hard_split(text: str, max_chars: int) -> list[str]:
+    """Split an oversized section at paragraph breaks, then at ``max_chars``."""
+    pieces: list[str] = []
+    current = ""
+    for paragraph in re.split(r"(?<=\n\n)", text):
+        while len(paragraph) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if len(current) + len(paragraph) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += paragraph
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_markdown(content: str, max_chars: int) -> list[str]:
+    """Split markdown into chunks of at most ``max_chars`` characters.
+
+    Chunks follow heading and page boundaries where possible: consecutive
+    sections are packed together until the limit, and only sections larger
+    than the limit are split mid-section. No text is dropped.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    chunks: list[str] = []
+    current = ""
+    for section in _sections(content):
+        for piece in _hard_split(section, max_chars) if len(section) > max_chars else [section]:
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
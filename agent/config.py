@@ -92,6 +92,50 @@ def get_log_level() -> str:
     return os.getenv("LOG_LEVEL", "INFO").upper()
 
 
+def _get_int(name: str, default: int) -> int:
+    """Return an integer env var, falling back to default if unset or invalid."""
+    try:
+        return int(os.getenv(name, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+def _get_float(name: str, default: float) -> float:
+    """Return a float env var, falling back to default if unset or invalid."""
+    try:
+        return float(os.getenv(name, str(default)))
+    except (ValueError, TypeError):
+        return default
+
+
+def _get_float_map(name: str) -> dict[str, float]:
+    """Parse ``key=value,key=value`` (e.g. logger names to numbers); invalid entries are skipped."""
+    result = {}
+    for item in os.getenv(name, "").split(","):
+        key, _, value = item.partition("=")
+        try:
+            result[key.strip()] = float(value)
+        except ValueError:
+            continue
+    result.pop("", None)
+    return result
+
+
+def get_log_sample_rates() -> dict[str, float]:
+    """Return logger name -> fraction of INFO/DEBUG records kept (LOG_SAMPLE_RATES)."""
+    return _get_float_map("LOG_SAMPLE_RATES")
+
+
+def get_log_rate_limits() -> dict[str, float]:
+    """Return logger name -> max INFO/DEBUG records per second (LOG_RATE_LIMITS)."""
+    return _get_float_map("LOG_RATE_LIMITS")
+
+
+def get_log_queue_max_size() -> int:
+    """Return max log records waiting for the writer thread (excess are dropped)."""
+    return _get_int("LOG_QUEUE_MAX_SIZE", 10000)
+
+
 def get_region() -> str:
     """Return deployment region."""
     return os.getenv("REGION") or "europe-west4"
@@ -112,6 +156,11 @@ def get_prompt_id() -> Optional[str]:
     return os.getenv("AGENT_PROMPT_ID") or None
 
 
+def get_prompt_poll_interval() -> float:
+    """Return seconds between prompt version checks (0 disables polling)."""
+    return _get_float("PROMPT_POLL_INTERVAL_SECONDS", 60.0)
+
+
 def get_image_model_name() -> str:
     """Return image processing model name or default."""
     return os.getenv("IMAGE_MODEL_NAME") or "gemini-3-pro-image-preview"
@@ -127,11 +176,41 @@ def get_gcs_bucket_name() -> str:
     return os.getenv("GCS_BUCKET_NAME") or "master-agent-images"
 
 
+def get_storage_emulator_host() -> Optional[str]:
+    """Return GCS emulator base URL (e.g. fake-gcs-server) if configured."""
+    return os.getenv("STORAGE_EMULATOR_HOST") or None
+
+
+def get_gcs_max_connections() -> int:
+    """Return connection pool size for each GCS upload client."""
+    return _get_int("GCS_MAX_CONNECTIONS", 20)
+
+
 def get_docling_agent_url() -> Optional[str]:
     """Return Docling agent Cloud Run URL if configured."""
     return os.getenv("DOCLING_AGENT_URL") or None
 
 
+def get_docling_max_connections() -> int:
+    """Return connection pool size for the Docling agent client."""
+    return _get_int("DOCLING_MAX_CONNECTIONS", 10)
+
+
+def get_docling_http2() -> bool:
+    """Return whether the Docling agent client should negotiate HTTP/2."""
+    return os.getenv("DOCLING_HTTP2", "true").lower() not in ("0", "false", "no")
+
+
+def get_document_index_path() -> str:
+    """Return SQLite path of the processed-document index (":memory:" keeps it in memory)."""
+    return os.getenv("DOCUMENT_INDEX_PATH") or "/tmp/master-agent/document_index.sqlite3"
+
+
+def get_document_index_ttl() -> float:
+    """Return seconds a processed document is reused before it is extracted again."""
+    return _get_float("DOCUMENT_INDEX_TTL_SECONDS", 7 * 86400.0)
+
+
 def get_docling_gcs_bucket() -> str:
     """Return GCS bucket name for docling documents."""
     return os.getenv("GCS_DOCLING_BUCKET") or "docling-documents"
@@ -140,3 +219,177 @@ def get_docling_gcs_bucket() -> str:
 def get_telegram_bot_url() -> Optional[str]:
     """Return Telegram bot Cloud Run URL if configured."""
     return os.getenv("TELEGRAM_BOT_URL") or None
+
+
+def get_session_cache_max_size() -> int:
+    """Return max number of cached conversation -> session ID mappings."""
+    return _get_int("SESSION_CACHE_MAX_SIZE", 10_000)
+
+
+def get_session_cache_ttl() -> float:
+    """Return idle TTL in seconds for cached session IDs."""
+    return _get_float("SESSION_CACHE_TTL_SECONDS", 3600.0)
+
+
+def get_memory_queue_max_size() -> int:
+    """Return max number of sessions pending Memory Bank ingestion."""
+    return _get_int("MEMORY_QUEUE_MAX_SIZE", 1000)
+
+
+def get_memory_worker_concurrency() -> int:
+    """Return number of concurrent Memory Bank ingestion tasks."""
+    return _get_int("MEMORY_WORKER_CONCURRENCY", 2)
+
+
+def get_memory_flush_timeout() -> float:
+    """Return seconds to wait for pending memory ingestion on shutdown."""
+    return _get_float("MEMORY_FLUSH_TIMEOUT_SECONDS", 5.0)
+
+
+def get_background_drain_timeout() -> float:
+    """Return seconds to wait for background tasks (e.g. GCS uploads) on shutdown."""
+    return _get_float("BACKGROUND_DRAIN_TIMEOUT_SECONDS", 3.0)
+
+
+def get_job_store_path() -> str:
+    """Return SQLite path of the background job store (":memory:" keeps it in memory)."""
+    return os.getenv("JOB_STORE_PATH") or "/tmp/master-agent/jobs.sqlite3"
+
+
+def get_job_workers() -> int:
+    """Return number of background jobs run concurrently."""
+    return _get_int("JOB_WORKERS", 4)
+
+
+def get_job_queue_max_size() -> int:
+    """Return max number of queued background jobs."""
+    return _get_int("JOB_QUEUE_MAX_SIZE", 100)
+
+
+def get_job_retention() -> float:
+    """Return seconds finished jobs are kept in the job store."""
+    return _get_float("JOB_RETENTION_SECONDS", 86400.0)
+
+
+def get_job_callback_allowed_hosts() -> frozenset[str]:
+    """Return hosts an X-Callback-Url may point to (https only); empty rejects all callbacks."""
+    hosts = os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",")
+    return frozenset(host.strip().lower() for host in hosts if host.strip())
+
+
+def get_image_cache_max_size() -> int:
+    """Return max number of cached image descriptions in memory (0 disables the cache)."""
+    return _get_int("IMAGE_CACHE_MAX_SIZE", 1000)
+
+
+def get_image_cache_ttl() -> float:
+    """Return idle TTL in seconds for cached image descriptions."""
+    return _get_float("IMAGE_CACHE_TTL_SECONDS", 86400.0)
+
+
+def get_transcription_cache_max_size() -> int:
+    """Return max number of cached voice transcriptions in memory (0 disables the cache)."""
+    return _get_int("TRANSCRIPTION_CACHE_MAX_SIZE", 1000)
+
+
+def get_transcription_cache_ttl() -> float:
+    """Return idle TTL in seconds for cached voice transcriptions."""
+    return _get_float("TRANSCRIPTION_CACHE_TTL_SECONDS", 86400.0)
+
+
+def get_summary_chunk_chars() -> int:
+    """Return chunk size (characters) for map-reduce document summarization."""
+    return _get_int("SUMMARY_CHUNK_CHARS", 30_000)
+
+
+def get_summary_concurrency() -> int:
+    """Return max concurrent model calls for document chunk summaries."""
+    return _get_int("SUMMARY_CONCURRENCY", 4)
+
+
+def get_summary_chunk_cache_max_size() -> int:
+    """Return max number of cached chunk summaries in memory (0 disables the cache)."""
+    return _get_int("SUMMARY_CHUNK_CACHE_MAX_SIZE", 2000)
+
+
+def get_summary_chunk_cache_ttl() -> float:
+    """Return idle TTL in seconds for cached chunk summaries."""
+    return _get_float("SUMMARY_CHUNK_CACHE_TTL_SECONDS", 86400.0)
+
+
+def get_media_cache_dir() -> Optional[str]:
+    """Return directory for the persistent media result cache tier, if configured."""
+    return os.getenv("MEDIA_CACHE_DIR") or None
+
+
+def get_media_cache_disk_ttl() -> float:
+    """Return max age in seconds of entries in the persistent media result cache."""
+    return _get_float("MEDIA_CACHE_DISK_TTL_SECONDS", 7 * 86400.0)
+
+
+def get_media_cache_disk_max_entries() -> int:
+    """Return max number of entries per persistent media result cache."""
+    return _get_int("MEDIA_CACHE_DISK_MAX_ENTRIES", 10_000)
+
+
+# Per-upstream bulkhead defaults: name -> (max concurrent calls, max waiting calls)
+BULKHEAD_DEFAULTS = {
+    "model": (32, 64),
+    "image_model": (4, 8),
+    "docling": (8, 16),
+    "gcs": (16, 64),
+    "sessions": (32, 64),
+}
+
+
+def get_bulkhead_limits(name: str) -> tuple[int, int]:
+    """Return (max concurrent, max waiting) calls for an upstream's bulkhead.
+
+    Read from BULKHEAD_<NAME>_MAX_CONCURRENT / BULKHEAD_<NAME>_MAX_QUEUE.
+    """
+    max_concurrent, max_queue = BULKHEAD_DEFAULTS[name]
+    prefix = f"BULKHEAD_{name.upper()}"
+    return (
+        max(1, _get_int(f"{prefix}_MAX_CONCURRENT", max_concurrent)),
+        max(0, _get_int(f"{prefix}_MAX_QUEUE", max_queue)),
+    )
+
+
+def get_bulkhead_queue_timeout() -> float:
+    """Return max seconds a call may wait for a bulkhead slot before a 503."""
+    return _get_float("BULKHEAD_QUEUE_TIMEOUT_SECONDS", 10.0)
+
+
+def get_model_retry_max_attempts() -> int:
+    """Return total attempts per model call for transient errors (1 disables retries)."""
+    return max(1, _get_int("MODEL_RETRY_MAX_ATTEMPTS", 3))
+
+
+def get_model_retry_base_delay() -> float:
+    """Return backoff in seconds before the first model call retry (doubles per retry)."""
+    return _get_float("MODEL_RETRY_BASE_DELAY_SECONDS", 0.5)
+
+
+def get_model_retry_max_delay() -> float:
+    """Return max backoff in seconds; a longer server Retry-After is not waited for."""
+    return _get_float("MODEL_RETRY_MAX_DELAY_SECONDS", 10.0)
+
+
+def get_model_retry_budget_ratio() -> float:
+    """Return long-run model call retries allowed per request (retry budget)."""
+    return _get_float("MODEL_RETRY_BUDGET_RATIO", 0.2)
+
+
+def get_otlp_endpoint() -> Optional[str]:
+    """Return the OTLP/HTTP collector endpoint for traces (None disables span export)."""
+    return os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") or None
+
+
+def get_trace_sample_ratio() -> float:
+    """Return the fraction of new traces sampled up front (head sampling)."""
+    return min(max(_get_float("TRACE_SAMPLE_RATIO", 0.1), 0.0), 1.0)
+
+
+def get_trace_tail_latency() -> float:
+    """Return the root span duration above which unsampled traces are kept (0 disables tail sampling)."""
+    return _get_float("TRACE_TAIL_LATENCY_SECONDS", 2.0)
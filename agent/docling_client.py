@@ -1,44 +1,108 @@
 """HTTP client for calling the Docling agent (Cloud Run service)."""
 
 import logging
+from typing import Optional
 
 import httpx
+from opentelemetry.trace import SpanKind
+
+from agent.auth import TokenManager
+from agent.bulkhead import Bulkhead, admit
+from agent.metrics import timed_stage
+from agent.tracing import inject_context, stage_span
 
 logger = logging.getLogger(__name__)
 
 _DOCLING_TIMEOUT = 310.0  # slightly above docling agent's 300s processing timeout
+_KEEPALIVE_EXPIRY = 60.0
 
 
-def _is_localhost(url: str) -> bool:
-    return "localhost" in url or "127.0.0.1" in url
-
-
-def _get_id_token(audience: str) -> str:
-    """Fetch a Google Cloud ID token for the given audience."""
-    import google.auth.transport.requests
-    import google.oauth2.id_token
-
-    request = google.auth.transport.requests.Request()
-    return google.oauth2.id_token.fetch_id_token(request, audience)
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional ``h2`` package (``httpx[http2]``)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
 
 
 class DoclingClient:
-    """Client for calling the Docling agent's /api/process-document endpoint."""
+    """Client for calling the Docling agent's /api/process-document endpoint.
+
+    One instance (and one pooled ``httpx.AsyncClient``) is created per process
+    in the app lifespan, so TCP/TLS setup to the docling service is paid once
+    per pooled connection rather than once per document.
+    """
+
+    def __init__(
+        self,
+        agent_url: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_connections: int = 10,
+        http2: bool = True,
+        token_manager: Optional[TokenManager] = None,
+        bulkhead: Optional[Bulkhead] = None,
+    ):
+        """Initialize the client.
 
-    def __init__(self, agent_url: str):
+        Args:
+            agent_url: Docling agent base URL.
+            http_client: Optional HTTP client; one is created (and owned) if omitted.
+            max_connections: Connection pool size for the owned HTTP client.
+            http2: Negotiate HTTP/2 if the ``h2`` package is installed.
+            token_manager: Shared ID token cache; a private one is created if omitted.
+            bulkhead: Optional concurrency limit for docling requests.
+        """
         self._agent_url = agent_url.rstrip("/")
+        self._owns_tokens = token_manager is None
+        self._tokens = token_manager or TokenManager()
+        self._owns_http = http_client is None
+        if http_client is None:
+            if http2 and not _http2_available():
+                logger.warning("HTTP/2 requested for docling client but h2 is not installed")
+                http2 = False
+            http_client = httpx.AsyncClient(
+                timeout=_DOCLING_TIMEOUT,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=_KEEPALIVE_EXPIRY,
+                ),
+            )
+        self._http = http_client
+        self._http2 = http2
+        self._bulkhead = bulkhead
+        # Connection reuse stats, fed by the httpcore "trace" request extension
+        self._requests = 0
+        self._connections_opened = 0
+        self._tls_handshakes = 0
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        """httpcore trace hook: count new TCP connections and TLS handshakes."""
+        if event_name == "connection.connect_tcp.complete":
+            self._connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self._tls_handshakes += 1
+
+    def stats(self) -> dict:
+        """Return connection reuse statistics."""
+        return {
+            "requests": self._requests,
+            "connections_opened": self._connections_opened,
+            "tls_handshakes": self._tls_handshakes,
+            "reused_connections": max(self._requests - self._connections_opened, 0),
+            "http2": self._http2,
+        }
 
-    def _get_auth_header(self) -> dict:
-        """Return Authorization header for Cloud Run; empty dict for localhost."""
-        if _is_localhost(self._agent_url):
-            return {}
-        try:
-            token = _get_id_token(self._agent_url)
-            return {"Authorization": f"Bearer {token}"}
-        except Exception as e:
-            logger.warning("Failed to fetch ID token for docling agent: %s", e)
-            return {}
+    async def close(self) -> None:
+        """Close the owned HTTP client (connection pool) and token manager."""
+        if self._owns_http:
+            await self._http.aclose()
+        if self._owns_tokens:
+            await self._tokens.close()
 
+    @timed_stage("docling_process_document")
     async def process_document(self, gcs_uri: str, mime_type: str, filename: str) -> dict:
         """Call docling agent to process a document from GCS.
 
@@ -53,9 +117,10 @@ class DoclingClient:
         Raises:
             RuntimeError: If docling agent returns a non-200 response.
             TimeoutError: If the request times out.
+            BulkheadFull: If the docling bulkhead cannot admit the request.
         """
         url = f"{self._agent_url}/api/process-document"
-        headers = self._get_auth_header()
+        headers = await self._tokens.id_token_header(self._agent_url)
         payload = {
             "document_url": gcs_uri,
             "mime_type": mime_type,
@@ -69,15 +134,26 @@ class DoclingClient:
             filename,
         )
 
-        try:
-            async with httpx.AsyncClient(timeout=_DOCLING_TIMEOUT) as client:
-                response = await client.post(url, json=payload, headers=headers)
-        except httpx.TimeoutException as e:
-            logger.error("Docling agent timeout: filename=%s, error=%s", filename, e)
-            raise TimeoutError(f"Docling agent did not respond within {_DOCLING_TIMEOUT}s") from e
-        except Exception as e:
-            logger.error("Docling agent request failed: filename=%s, error=%s", filename, e)
-            raise RuntimeError(f"Docling agent request failed: {e}") from e
+        async with admit(self._bulkhead):
+            self._requests += 1
+            try:
+                with stage_span(
+                    "docling.post", {"http.request.method": "POST", "url.full": url}, SpanKind.CLIENT
+                ):
+                    response = await self._http.post(
+                        url,
+                        json=payload,
+                        headers=inject_context(headers),
+                        extensions={"trace": self._trace},
+                    )
+            except httpx.TimeoutException as e:
+                logger.error("Docling agent timeout: filename=%s, error=%s", filename, e)
+                raise TimeoutError(
+                    f"Docling agent did not respond within {_DOCLING_TIMEOUT}s"
+                ) from e
+            except Exception as e:
+                logger.error("Docling agent request failed: filename=%s, error=%s", filename, e)
+                raise RuntimeError(f"Docling agent request failed: {e}") from e
 
         if response.status_code != 200:
             body = response.text[:500]
@@ -0,0 +1,142 @@
+"""Content-hash index of processed documents, persisted in SQLite.
+
+Maps a document's SHA-256 (plus MIME type) to its ``/api/document`` response
+(GCS URIs, extracted content, metadata, summary), so a document that was
+already extracted, e.g. the same PDF shared in another chat, is answered
+without a GCS upload or a Docling call.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def document_key(content_hash: str, mime_type: str) -> str:
+    """Build the index key for a document."""
+    return f"{content_hash}:{mime_type}"
+
+
+class DocumentIndex:
+    """SQLite-backed ``key -> response record`` store with a TTL.
+
+    SQLite calls are blocking, so they run in a worker thread behind a lock
+    (one shared connection). ``path=":memory:"`` keeps the index for the
+    lifetime of the process only.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Open (or create) the index.
+
+        Args:
+            path: SQLite database file, or ":memory:".
+            ttl_seconds: Age after which entries are ignored and removed; None keeps them forever.
+            clock: Wall-clock time source (entries store a Unix timestamp).
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " key TEXT PRIMARY KEY,"
+                " record TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and self._clock() - created_at > self.ttl_seconds
+
+    def _get_sync(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record, created_at FROM documents WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            record, created_at = row
+            if self._expired(created_at):
+                with self._conn:
+                    self._conn.execute("DELETE FROM documents WHERE key = ?", (key,))
+                return None
+        return json.loads(record)
+
+    def _put_sync(self, key: str, record: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (key, record, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(record), self._clock()),
+            )
+
+    def _prune_sync(self) -> int:
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM documents WHERE created_at < ?", (self._clock() - self.ttl_seconds,)
+            )
+            return cursor.rowcount
+
+    def _count_sync(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    async def get(self, key: str) -> Optional[dict]:
+        """Return the stored record for ``key``, or None if absent or expired."""
+        record = await asyncio.to_thread(self._get_sync, key)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    async def put(self, key: str, record: dict) -> None:
+        """Store (or replace) the record for ``key``."""
+        await asyncio.to_thread(self._put_sync, key, record)
+        self.writes += 1
+
+    async def prune(self) -> int:
+        """Delete expired entries. Returns the number removed."""
+        removed = await asyncio.to_thread(self._prune_sync)
+        if removed:
+            logger.info("Document index pruned: removed=%d", removed)
+        return removed
+
+    async def size(self) -> int:
+        """Return the number of stored entries."""
+        return await asyncio.to_thread(self._count_sync)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        """Return hit/miss/write counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+        }
@@ -0,0 +1,54 @@
+"""JSON request decoding and response encoding without intermediate copies.
+
+Request bodies are validated straight from the raw bytes with Pydantic's
+``model_validate_json`` (the Rust JSON parser builds the model directly),
+instead of ``json.loads`` into a dict and ``Model(**body)`` — for a
+multi-megabyte ``*_base64`` field that saves decoding the body to ``str``
+and building the string twice. Responses are rendered with ``orjson`` when
+installed, falling back to the standard library.
+"""
+
+import json
+from typing import Any, TypeVar
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class InvalidBody(ValueError):
+    """Request body is not valid JSON or does not match the model."""
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_model(body: bytes, model: type[M]) -> M:
+    """Validate a raw JSON body into ``model``.
+
+    Raises:
+        InvalidBody: "Invalid JSON" for malformed JSON, otherwise the validation message.
+    """
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        if any(error["type"] == "json_invalid" for error in e.errors(include_input=False)):
+            raise InvalidBody("Invalid JSON") from e
+        raise InvalidBody(str(e)) from e
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with ``dumps`` (orjson when available)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
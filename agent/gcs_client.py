@@ -1,13 +1,32 @@
-"""Google Cloud Storage client for persisting images."""
+"""Google Cloud Storage client for persisting images and documents.
+
+Uploads go straight to the GCS JSON API over a pooled ``httpx.AsyncClient``
+instead of the blocking ``google-cloud-storage`` client, so upload
+concurrency is bounded by the connection pool rather than by executor
+threads. Objects larger than ``_RESUMABLE_THRESHOLD`` use resumable
+uploads. Setting ``STORAGE_EMULATOR_HOST`` (e.g. fake-gcs-server) points the
+client at a local emulator without authentication.
+"""
 
-import asyncio
 import logging
 import time
+from typing import Optional
+
+import httpx
 
-from google.cloud import storage
+from agent.auth import TokenManager
+from agent.bulkhead import Bulkhead, admit
+from agent.metrics import timed_stage
+from agent.tracing import inject_context
 
 logger = logging.getLogger(__name__)
 
+_GCS_ENDPOINT = "https://storage.googleapis.com"
+_GCS_SCOPE = "https://www.googleapis.com/auth/devstorage.read_write"
+_UPLOAD_TIMEOUT = 60.0
+_RESUMABLE_THRESHOLD = 8 * 1024 * 1024
+_RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024  # must be a multiple of 256 KiB
+
 _MIME_TO_EXT = {
     "image/jpeg": "jpg",
     "image/jpg": "jpg",
@@ -22,29 +41,114 @@ def _mime_to_ext(mime_type: str) -> str:
 
 
 class GCSStorageClient:
-    """Client for uploading images to Google Cloud Storage."""
+    """Client for uploading images and documents to Google Cloud Storage."""
+
+    def __init__(
+        self,
+        bucket_name: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        endpoint: Optional[str] = None,
+        max_connections: int = 20,
+        token_manager: Optional[TokenManager] = None,
+        bulkhead: Optional[Bulkhead] = None,
+    ):
+        """Initialize the client.
 
-    def __init__(self, bucket_name: str):
+        Args:
+            bucket_name: Target bucket.
+            http_client: Optional shared HTTP client; one is created (and owned) if omitted.
+            endpoint: Emulator base URL (e.g. http://localhost:4443). When set,
+                requests are sent there without credentials.
+            max_connections: Connection pool size for the owned HTTP client.
+            token_manager: Shared access token cache; a private one is created if omitted.
+            bulkhead: Optional concurrency limit for uploads (shared across clients).
+        """
         self._bucket_name = bucket_name
-        self._client = storage.Client()
+        self._endpoint = (endpoint or _GCS_ENDPOINT).rstrip("/")
+        self._anonymous = endpoint is not None
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.AsyncClient(
+            timeout=_UPLOAD_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._owns_tokens = token_manager is None
+        self._tokens = token_manager or TokenManager()
+        self._bulkhead = bulkhead
+
+    async def _auth_headers(self) -> dict:
+        """Return an Authorization header (empty for the emulator)."""
+        if self._anonymous:
+            return {}
+        token = await self._tokens.access_token([_GCS_SCOPE])
+        return {"Authorization": f"Bearer {token}"}
+
+    def _upload_url(self) -> str:
+        return f"{self._endpoint}/upload/storage/v1/b/{self._bucket_name}/o"
 
-    def _upload_bytes_sync(self, data: bytes, object_name: str, mime_type: str) -> str:
-        """Synchronous upload — called via run_in_executor."""
-        bucket = self._client.bucket(self._bucket_name)
-        blob = bucket.blob(object_name)
-        blob.upload_from_string(data, content_type=mime_type)
+    @timed_stage("gcs_upload")
+    async def _upload_bytes(self, data: bytes, object_name: str, mime_type: str) -> str:
+        """Upload an object and return its gs:// URI. Raises on error."""
+        headers = inject_context(await self._auth_headers())
+        async with admit(self._bulkhead):
+            if len(data) <= _RESUMABLE_THRESHOLD:
+                response = await self._http.post(
+                    self._upload_url(),
+                    params={"uploadType": "media", "name": object_name},
+                    content=data,
+                    headers={**headers, "Content-Type": mime_type},
+                )
+                response.raise_for_status()
+            else:
+                await self._upload_resumable(data, object_name, mime_type, headers)
         return f"gs://{self._bucket_name}/{object_name}"
 
+    async def _upload_resumable(
+        self, data: bytes, object_name: str, mime_type: str, headers: dict
+    ) -> None:
+        """Upload a large object in chunks via a resumable upload session."""
+        total = len(data)
+        response = await self._http.post(
+            self._upload_url(),
+            params={"uploadType": "resumable", "name": object_name},
+            headers={
+                **headers,
+                "X-Upload-Content-Type": mime_type,
+                "X-Upload-Content-Length": str(total),
+            },
+        )
+        response.raise_for_status()
+        session_url = response.headers["Location"]
+
+        view = memoryview(data)
+        offset = 0
+        while offset < total:
+            end = min(offset + _RESUMABLE_CHUNK_SIZE, total)
+            response = await self._http.put(
+                session_url,
+                content=bytes(view[offset:end]),
+                headers={**headers, "Content-Range": f"bytes {offset}-{end - 1}/{total}"},
+            )
+            if response.status_code == 308:
+                # Resume from what the server actually persisted
+                committed = response.headers.get("Range")
+                next_offset = int(committed.rsplit("-", 1)[1]) + 1 if committed else 0
+                if next_offset <= offset:
+                    raise RuntimeError(f"Resumable upload stalled at byte {offset}")
+                offset = next_offset
+                continue
+            response.raise_for_status()
+            offset = end
+
     async def _upload(self, data: bytes, folder: str, mime_type: str, session_id: str) -> str | None:
         """Upload bytes to GCS. Returns GCS URI or None on error."""
         ext = _mime_to_ext(mime_type)
         timestamp_ms = int(time.time() * 1000)
         object_name = f"{folder}/{session_id}/{timestamp_ms}.{ext}"
         try:
-            loop = asyncio.get_event_loop()
-            uri = await loop.run_in_executor(
-                None, self._upload_bytes_sync, data, object_name, mime_type
-            )
+            uri = await self._upload_bytes(data, object_name, mime_type)
             logger.info("GCS upload complete: uri=%s", uri)
             return uri
         except Exception as e:
@@ -67,9 +171,13 @@ class GCSStorageClient:
         """
         timestamp_ms = int(time.time() * 1000)
         object_name = f"input/{conversation_id}/{timestamp_ms}_{filename}"
-        loop = asyncio.get_event_loop()
-        uri = await loop.run_in_executor(
-            None, self._upload_bytes_sync, data, object_name, "application/octet-stream"
-        )
+        uri = await self._upload_bytes(data, object_name, "application/octet-stream")
         logger.info("GCS document upload complete: uri=%s", uri)
         return uri
+
+    async def close(self) -> None:
+        """Close the owned HTTP client (connection pool) and token manager."""
+        if self._owns_http:
+            await self._http.aclose()
+        if self._owns_tokens:
+            await self._tokens.close()
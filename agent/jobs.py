@@ -0,0 +1,351 @@
+"""Background jobs for long-running requests (document extraction, image edits).
+
+A job is submitted with a coroutine factory and answered at once with a job
+id; a bounded pool of workers runs it, and its state is kept in SQLite so
+status and results survive a restart. Jobs that were queued or running when
+the process stopped are marked failed on the next start (their input bytes
+are held in memory only).
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_CALLBACK_TIMEOUT = 10.0
+
+
+class JobQueueFull(Exception):
+    """Raised by ``JobManager.submit`` when the job queue is at capacity."""
+
+
+class JobError(Exception):
+    """Expected job failure with a client-facing message and HTTP-style status."""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class JobStore:
+    """SQLite persistence for job records (blocking calls run in a worker thread)."""
+
+    def __init__(self, path: str = ":memory:", clock: Callable[[], float] = time.time):
+        """Open (or create) the store.
+
+        Args:
+            path: SQLite database file, or ":memory:".
+            clock: Wall-clock time source for created/updated timestamps.
+        """
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " error_status INTEGER,"
+                " callback_url TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        record = dict(row)
+        record["result"] = json.loads(record["result"]) if record["result"] else None
+        return record
+
+    def _insert_sync(self, job_id: str, kind: str, callback_url: Optional[str]) -> dict:
+        now = self._clock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, callback_url, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, callback_url, now, now),
+            )
+        return self._get_sync(job_id)
+
+    def _update_sync(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+        error_status: Optional[int] = None,
+    ) -> Optional[dict]:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, error_status = ?, updated_at = ?"
+                " WHERE id = ?",
+                (
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    error_status,
+                    self._clock(),
+                    job_id,
+                ),
+            )
+        return self._get_sync(job_id)
+
+    def _get_sync(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def _fail_interrupted_sync(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, error_status = ?, updated_at = ?"
+                " WHERE status IN (?, ?)",
+                (FAILED, "Interrupted by service restart", 503, self._clock(), QUEUED, RUNNING),
+            )
+            return cursor.rowcount
+
+    def _prune_sync(self, max_age_seconds: float) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (SUCCEEDED, FAILED, self._clock() - max_age_seconds),
+            )
+            return cursor.rowcount
+
+    async def insert(self, job_id: str, kind: str, callback_url: Optional[str] = None) -> dict:
+        """Create a queued job record."""
+        return await asyncio.to_thread(self._insert_sync, job_id, kind, callback_url)
+
+    async def update(self, job_id: str, status: str, **fields) -> Optional[dict]:
+        """Set a job's status (and result/error fields). Returns the updated record."""
+        return await asyncio.to_thread(self._update_sync, job_id, status, **fields)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """Return a job record, or None if unknown."""
+        return await asyncio.to_thread(self._get_sync, job_id)
+
+    async def fail_interrupted(self) -> int:
+        """Mark jobs left queued/running by a previous process as failed."""
+        return await asyncio.to_thread(self._fail_interrupted_sync)
+
+    async def prune(self, max_age_seconds: float) -> int:
+        """Delete finished jobs not updated for ``max_age_seconds``."""
+        return await asyncio.to_thread(self._prune_sync, max_age_seconds)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """Runs submitted jobs on a bounded worker pool and records their outcome."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 4,
+        max_queue_size: int = 100,
+        retention_seconds: Optional[float] = 86400.0,
+        http_client: Optional[httpx.AsyncClient] = None,
+        prune_interval_seconds: float = 300.0,
+    ):
+        """Initialize the manager.
+
+        Args:
+            store: Persistent job store.
+            workers: Number of jobs run concurrently.
+            max_queue_size: Maximum number of queued jobs; further submits raise JobQueueFull.
+            retention_seconds: Finished jobs older than this are pruned on start
+                and then every ``prune_interval_seconds``; None keeps them forever.
+            http_client: Client for completion callbacks; one is created (and owned) if omitted.
+            prune_interval_seconds: Time between prunes while running.
+        """
+        self.store = store
+        self._workers = workers
+        self._retention = retention_seconds
+        self._prune_interval = prune_interval_seconds
+        self._queue: asyncio.Queue[tuple[str, Callable[[], Awaitable[dict]]]] = asyncio.Queue(
+            maxsize=max_queue_size
+        )
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.AsyncClient(timeout=_CALLBACK_TIMEOUT)
+        self._tasks: list[asyncio.Task] = []
+        self._running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.callbacks_failed = 0
+
+    async def start(self) -> None:
+        """Recover state left by a previous process and start the workers (idempotent)."""
+        if self._tasks:
+            return
+        interrupted = await self.store.fail_interrupted()
+        if interrupted:
+            logger.warning("Jobs interrupted by restart marked failed: count=%d", interrupted)
+        if self._retention is not None:
+            await self.store.prune(self._retention)
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"job-worker-{i}") for i in range(self._workers)
+        ]
+        if self._retention is not None:
+            self._tasks.append(asyncio.create_task(self._prune_periodically(), name="job-pruner"))
+
+    async def submit(
+        self,
+        kind: str,
+        work: Callable[[], Awaitable[dict]],
+        callback_url: Optional[str] = None,
+    ) -> dict:
+        """Queue a job and return its (queued) record.
+
+        Args:
+            kind: Job type, e.g. "document" or "image".
+            work: Coroutine factory producing the job result. Raise JobError
+                for expected failures.
+            callback_url: Optional URL that receives the finished job as a JSON POST.
+
+        Raises:
+            JobQueueFull: If the queue is at capacity.
+        """
+        if self._queue.full():
+            self.rejected += 1
+            raise JobQueueFull(f"Job queue full ({self._queue.maxsize} jobs)")
+        job_id = uuid.uuid4().hex
+        record = await self.store.insert(job_id, kind, callback_url)
+        try:
+            self._queue.put_nowait((job_id, work))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            await self.store.update(job_id, FAILED, error="Job queue full", error_status=503)
+            raise JobQueueFull(f"Job queue full ({self._queue.maxsize} jobs)") from None
+        self.submitted += 1
+        logger.info("Job queued: job_id=%s, kind=%s", job_id, kind)
+        return record
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """Return a job record, or None if unknown."""
+        return await self.store.get(job_id)
+
+    async def _execute(self, job_id: str, work: Callable[[], Awaitable[dict]]) -> dict:
+        await self.store.update(job_id, RUNNING)
+        try:
+            result = await work()
+        except JobError as e:
+            self.failed += 1
+            return await self.store.update(
+                job_id, FAILED, error=str(e), error_status=e.status_code
+            )
+        except Exception as e:
+            self.failed += 1
+            logger.error("Job failed: job_id=%s, error=%s", job_id, e)
+            return await self.store.update(job_id, FAILED, error="Job failed", error_status=500)
+        self.succeeded += 1
+        return await self.store.update(job_id, SUCCEEDED, result=result)
+
+    async def _notify(self, record: dict) -> None:
+        try:
+            response = await self._http.post(record["callback_url"], json=job_view(record))
+            response.raise_for_status()
+        except Exception as e:
+            self.callbacks_failed += 1
+            logger.warning("Job callback failed: job_id=%s, error=%s", record["id"], e)
+
+    async def _run(self) -> None:
+        while True:
+            job_id, work = await self._queue.get()
+            self._running += 1
+            try:
+                record = await self._execute(job_id, work)
+                logger.info("Job finished: job_id=%s, status=%s", job_id, record["status"])
+                if record.get("callback_url"):
+                    await self._notify(record)
+            except Exception as e:
+                logger.error("Job worker error: job_id=%s, error=%s", job_id, e)
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _prune_periodically(self) -> None:
+        # Results hold whole documents / images; without this the store only grows
+        while True:
+            await asyncio.sleep(self._prune_interval)
+            try:
+                pruned = await self.store.prune(self._retention)
+            except Exception as e:
+                logger.warning("Job prune failed: error=%s", e)
+                continue
+            if pruned:
+                logger.info("Expired jobs pruned: count=%d", pruned)
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """Let queued jobs finish (up to ``timeout`` seconds), then stop the workers."""
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Jobs still pending at shutdown: pending=%d",
+                    self._queue.qsize() + self._running,
+                )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._owns_http:
+            await self._http.aclose()
+
+    def stats(self) -> dict:
+        """Return queue depth and outcome counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "running": self._running,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "callbacks_failed": self.callbacks_failed,
+        }
+
+
+def job_view(record: dict) -> dict:
+    """Public JSON representation of a job record."""
+    view = {
+        "job_id": record["id"],
+        "kind": record["kind"],
+        "status": record["status"],
+        "created_at": record["created_at"],
+        "updated_at": record["updated_at"],
+    }
+    if record["status"] == SUCCEEDED:
+        view["result"] = record["result"]
+    elif record["status"] == FAILED:
+        view["error"] = record["error"]
+        view["error_status"] = record["error_status"]
+    return view
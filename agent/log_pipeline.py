@@ -0,0 +1,165 @@
+"""Non-blocking log pipeline: queue handler, background writer, sampling.
+
+``setup_logging`` in ``app`` puts a ``TraceQueueHandler`` on the root
+logger. Emitting a record only resolves its message, stamps the current
+trace context (a background thread has none) and enqueues it; a
+``QueueListener`` thread does the JSON formatting and stdout writes. The
+queue is bounded: when the writer falls behind, records are dropped and
+counted instead of growing memory or blocking the event loop.
+
+``SamplingFilter`` thins out high-volume loggers (``agent.gcs_client``,
+``agent.processor``, ...) per logger name or dotted prefix: a sample rate
+and/or a per-second rate limit. Only INFO and below are ever dropped.
+"""
+
+import copy
+import logging
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Optional
+
+from agent.tracing import current_trace_ids
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "tokens", "updated")
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate  # burst of one second's worth
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Per-logger sampling and rate limiting of INFO/DEBUG records.
+
+    A rule for ``agent`` also covers ``agent.processor``; the most specific
+    configured name wins (resolved once per logger name).
+    """
+
+    def __init__(
+        self,
+        sample_rates: Optional[dict[str, float]] = None,
+        rate_limits: Optional[dict[str, float]] = None,
+        rng: Callable[[], float] = random.random,
+    ):
+        """Initialize the filter.
+
+        Args:
+            sample_rates: Logger name -> fraction of records kept (0..1).
+            rate_limits: Logger name -> max records per second (with a one-second burst).
+            rng: Uniform [0, 1) source (injectable for tests).
+        """
+        super().__init__()
+        self._sample_rates = dict(sample_rates or {})
+        self._rate_limits = dict(rate_limits or {})
+        self._rng = rng
+        self._rules: dict[str, tuple[Optional[float], Optional[_TokenBucket]]] = {}
+        self._buckets: dict[str, _TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.sampled_out: dict[str, int] = {}
+        self.rate_limited: dict[str, int] = {}
+
+    @staticmethod
+    def _lookup(name: str, table: dict) -> Optional[str]:
+        while name:
+            if name in table:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def _rule(self, name: str) -> tuple[Optional[float], Optional[_TokenBucket]]:
+        rule = self._rules.get(name)
+        if rule is not None:
+            return rule
+        with self._lock:
+            rate_key = self._lookup(name, self._sample_rates)
+            limit_key = self._lookup(name, self._rate_limits)
+            bucket = None
+            if limit_key is not None:
+                # Loggers under one configured prefix share its budget
+                bucket = self._buckets.get(limit_key)
+                if bucket is None:
+                    bucket = self._buckets[limit_key] = _TokenBucket(self._rate_limits[limit_key])
+            rule = self._rules[name] = (
+                self._sample_rates[rate_key] if rate_key is not None else None,
+                bucket,
+            )
+            return rule
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        sample_rate, bucket = self._rule(record.name)
+        if sample_rate is not None and self._rng() >= sample_rate:
+            with self._lock:
+                self.sampled_out[record.name] = self.sampled_out.get(record.name, 0) + 1
+            return False
+        if bucket is not None:
+            with self._lock:
+                if not bucket.take():
+                    self.rate_limited[record.name] = self.rate_limited.get(record.name, 0) + 1
+                    return False
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sampled_out": dict(self.sampled_out), "rate_limited": dict(self.rate_limited)}
+
+
+class TraceQueueHandler(QueueHandler):
+    """Enqueues records for a ``QueueListener``; formatting happens on its thread.
+
+    ``prepare`` captures what is only available at emit time: the
+    interpolated message (arguments may change later) and the current
+    trace context, as ``record.trace_context`` (trace id, span id, sampled).
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.listener: Optional[QueueListener] = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.trace_context = current_trace_ids()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self, *handlers: logging.Handler) -> None:
+        """Start the background thread writing queued records to ``handlers``."""
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Write out the queued records and stop the background thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self) -> dict:
+        result = {"queued": self.queue.qsize(), "dropped_queue_full": self.dropped}
+        for log_filter in self.filters:
+            if isinstance(log_filter, SamplingFilter):
+                result.update(log_filter.stats())
+        return result
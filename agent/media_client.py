@@ -1,16 +1,27 @@
 """Media processing client using Vertex AI (voice transcription, image description)."""
 
-import base64
+import asyncio
+import hashlib
 import logging
 from typing import Optional
 
 from google import genai
 from google.genai import types
+from opentelemetry.trace import SpanKind
 
+from agent.bulkhead import Bulkhead, BulkheadFull, admit
+from agent.chunking import split_markdown
 from agent.config import mask_token
+from agent.media_payload import MediaPayload
+from agent.metrics import timed_stage
+from agent.result_cache import ResultCache
+from agent.retry import RetryPolicy, call_with_retry
+from agent.tracing import inject_context, stage_span
 
 logger = logging.getLogger(__name__)
 
+_MAX_REDUCE_ROUNDS = 4  # combine rounds before falling back to truncation
+
 
 class MediaClient:
     """Client for processing media (audio, images) via Vertex AI."""
@@ -21,6 +32,12 @@ class MediaClient:
         location: str,
         model_name: str,
         image_model_name: str = "gemini-3-pro-image-preview",
+        summary_chunk_chars: int = 30_000,
+        summary_concurrency: int = 4,
+        chunk_summary_cache: Optional[ResultCache] = None,
+        text_bulkhead: Optional[Bulkhead] = None,
+        image_bulkhead: Optional[Bulkhead] = None,
+        retry_policy: Optional[RetryPolicy] = None,
     ):
         """Initialize the media client with Vertex AI.
 
@@ -29,11 +46,23 @@ class MediaClient:
             location: GCP location (e.g., europe-west4).
             model_name: Model name to use.
             image_model_name: Model name for image processing with Nano Banana Pro.
+            summary_chunk_chars: Documents longer than this are summarized in chunks of this size.
+            summary_concurrency: Max concurrent model calls per process for chunk summaries.
+            chunk_summary_cache: Optional cache of chunk summaries keyed by chunk hash.
+            text_bulkhead: Optional concurrency limit for text model calls.
+            image_bulkhead: Optional concurrency limit for image model calls.
+            retry_policy: Optional retry policy for transient model errors (429/5xx).
         """
         self.project = project
         self.location = location
         self.model_name = model_name
         self.image_model_name = image_model_name
+        self.summary_chunk_chars = summary_chunk_chars
+        self.chunk_summary_cache = chunk_summary_cache
+        self._summary_semaphore = asyncio.Semaphore(summary_concurrency)
+        self.text_bulkhead = text_bulkhead
+        self.image_bulkhead = image_bulkhead
+        self.retry_policy = retry_policy
         self.client = genai.Client(
             vertexai=True,
             project=project,
@@ -46,12 +75,37 @@ class MediaClient:
             location="global",
         )
 
-    async def transcribe(self, audio_base64: str, mime_type: str, session_id: str) -> str:
+    async def _generate(
+        self, operation: str, client: genai.Client, bulkhead: Optional[Bulkhead], **kwargs
+    ) -> types.GenerateContentResponse:
+        """Call ``generate_content`` with retries; each attempt takes its own bulkhead slot.
+
+        Each attempt is a client span whose context is sent to Vertex AI.
+        """
+
+        async def attempt() -> types.GenerateContentResponse:
+            with stage_span(
+                f"gemini.{operation}",
+                {"gen_ai.system": "vertex_ai", "gen_ai.request.model": kwargs.get("model", "")},
+                SpanKind.CLIENT,
+            ):
+                headers = inject_context({})
+                if headers:
+                    config = kwargs.get("config") or types.GenerateContentConfig()
+                    kwargs["config"] = config.model_copy(
+                        update={"http_options": types.HttpOptions(headers=headers)}
+                    )
+                async with admit(bulkhead):
+                    return await client.aio.models.generate_content(**kwargs)
+
+        return await call_with_retry(self.retry_policy, operation, attempt)
+
+    @timed_stage("media_transcribe")
+    async def transcribe(self, audio: MediaPayload, session_id: str) -> str:
         """Transcribe audio to text.
 
         Args:
-            audio_base64: Base64-encoded audio bytes.
-            mime_type: Audio MIME type (e.g., "audio/ogg").
+            audio: Decoded audio payload (e.g., "audio/ogg").
             session_id: Session ID for logging.
 
         Returns:
@@ -60,12 +114,11 @@ class MediaClient:
         Raises:
             RuntimeError: If transcription fails.
         """
-        audio_size = len(audio_base64) * 3 // 4
         logger.info(
             "Transcription request: session_id=%s, audio_size=%d, mime_type=%s",
             session_id,
-            audio_size,
-            mime_type,
+            audio.size,
+            audio.mime_type,
         )
 
         try:
@@ -74,8 +127,8 @@ class MediaClient:
                     role="user",
                     parts=[
                         types.Part.from_bytes(
-                            data=base64.b64decode(audio_base64),
-                            mime_type=mime_type,
+                            data=audio.data,
+                            mime_type=audio.mime_type,
                         ),
                         types.Part.from_text(
                             text="Transcribe this audio message exactly as spoken. "
@@ -85,7 +138,10 @@ class MediaClient:
                 )
             ]
 
-            response = await self.client.aio.models.generate_content(
+            response = await self._generate(
+                "transcribe",
+                self.client,
+                self.text_bulkhead,
                 model=self.model_name,
                 contents=contents,
             )
@@ -98,19 +154,21 @@ class MediaClient:
             )
             return transcription
 
+        except BulkheadFull:
+            raise
         except Exception as e:
             error_msg = mask_token(str(e))
             logger.error("Transcription error: session_id=%s, error=%s", session_id, error_msg)
             raise RuntimeError(f"Transcription error: {error_msg}") from e
 
+    @timed_stage("media_describe_image")
     async def describe_image(
-        self, image_base64: str, mime_type: str, session_id: str, prompt: str | None = None
+        self, image: MediaPayload, session_id: str, prompt: str | None = None
     ) -> str:
         """Describe an image or answer a question about it.
 
         Args:
-            image_base64: Base64-encoded image bytes.
-            mime_type: Image MIME type (e.g., "image/jpeg").
+            image: Decoded image payload (e.g., "image/jpeg").
             session_id: Session ID for logging.
             prompt: Optional question about the image.
 
@@ -120,12 +178,11 @@ class MediaClient:
         Raises:
             RuntimeError: If processing fails.
         """
-        image_size = len(image_base64) * 3 // 4
         logger.info(
             "Image description request: session_id=%s, image_size=%d, mime_type=%s, has_prompt=%s",
             session_id,
-            image_size,
-            mime_type,
+            image.size,
+            image.mime_type,
             prompt is not None,
         )
 
@@ -144,15 +201,18 @@ class MediaClient:
                     role="user",
                     parts=[
                         types.Part.from_bytes(
-                            data=base64.b64decode(image_base64),
-                            mime_type=mime_type,
+                            data=image.data,
+                            mime_type=image.mime_type,
                         ),
                         types.Part.from_text(text=prompt_text),
                     ],
                 )
             ]
 
-            response = await self.client.aio.models.generate_content(
+            response = await self._generate(
+                "describe_image",
+                self.client,
+                self.text_bulkhead,
                 model=self.model_name,
                 contents=contents,
             )
@@ -165,34 +225,36 @@ class MediaClient:
             )
             return description
 
+        except BulkheadFull:
+            raise
         except Exception as e:
             error_msg = mask_token(str(e))
             logger.error("Image description error: session_id=%s, error=%s", session_id, error_msg)
             raise RuntimeError(f"Image description error: {error_msg}") from e
 
+    @timed_stage("media_process_image")
     async def process_image_with_model(
-        self, image_base64: str, mime_type: str, session_id: str, prompt: str
+        self, image: MediaPayload, session_id: str, prompt: str
     ) -> dict:
         """Process an image with a text prompt using Nano Banana Pro model.
 
         Args:
-            image_base64: Base64-encoded image bytes.
-            mime_type: Image MIME type (e.g., "image/jpeg").
+            image: Decoded image payload (e.g., "image/jpeg").
             session_id: Session ID for logging.
             prompt: Text prompt describing the desired processing.
 
         Returns:
-            Dict with "text" (str), "image_base64" (str|None), "image_mime_type" (str|None).
+            Dict with "text" (str) and "image" (MediaPayload|None) — the
+            generated image, if the model returned one.
 
         Raises:
             RuntimeError: If processing fails.
         """
-        image_size = len(image_base64) * 3 // 4
         logger.info(
             "Image model processing request: session_id=%s, image_size=%d, mime_type=%s, model=%s",
             session_id,
-            image_size,
-            mime_type,
+            image.size,
+            image.mime_type,
             self.image_model_name,
         )
 
@@ -202,15 +264,18 @@ class MediaClient:
                     role="user",
                     parts=[
                         types.Part.from_bytes(
-                            data=base64.b64decode(image_base64),
-                            mime_type=mime_type,
+                            data=image.data,
+                            mime_type=image.mime_type,
                         ),
                         types.Part.from_text(text=prompt),
                     ],
                 )
             ]
 
-            response = await self.image_client.aio.models.generate_content(
+            response = await self._generate(
+                "process_image",
+                self.image_client,
+                self.image_bulkhead,
                 model=self.image_model_name,
                 contents=contents,
                 config=types.GenerateContentConfig(
@@ -219,18 +284,16 @@ class MediaClient:
             )
 
             result_text = None
-            result_image_base64 = None
-            result_image_mime_type = None
+            result_image = None
 
             if response.candidates and response.candidates[0].content:
                 for part in response.candidates[0].content.parts:
                     if part.text:
                         result_text = (result_text or "") + part.text
                     elif part.inline_data:
-                        result_image_base64 = base64.b64encode(
-                            part.inline_data.data
-                        ).decode("utf-8")
-                        result_image_mime_type = part.inline_data.mime_type
+                        result_image = MediaPayload(
+                            part.inline_data.data, part.inline_data.mime_type
+                        )
 
             if result_text:
                 result_text = result_text.strip()
@@ -239,15 +302,16 @@ class MediaClient:
                 "Image model processing complete: session_id=%s, has_text=%s, has_image=%s",
                 session_id,
                 result_text is not None,
-                result_image_base64 is not None,
+                result_image is not None,
             )
 
             return {
                 "text": result_text or "",
-                "image_base64": result_image_base64,
-                "image_mime_type": result_image_mime_type,
+                "image": result_image,
             }
 
+        except BulkheadFull:
+            raise
         except Exception as e:
             error_msg = mask_token(str(e))
             logger.error(
@@ -257,9 +321,78 @@ class MediaClient:
             )
             raise RuntimeError(f"Image model processing error: {error_msg}") from e
 
+    async def _generate_text(self, prompt: str) -> str:
+        contents = [
+            types.Content(
+                role="user",
+                parts=[types.Part.from_text(text=prompt)],
+            )
+        ]
+        response = await self._generate(
+            "summarize", self.client, self.text_bulkhead, model=self.model_name, contents=contents
+        )
+        return response.text.strip()
+
+    async def _summarize_chunk(self, chunk: str, index: int, total: int) -> str:
+        """Map step: summarize one chunk (cached by chunk hash)."""
+
+        async def compute() -> str:
+            async with self._summary_semaphore:
+                return await self._generate_text(
+                    f"Below is part {index + 1} of {total} of a document extracted as markdown. "
+                    "Summarise the key points of this part in a short plain-text paragraph. "
+                    "Output ONLY the summary.\n\n"
+                    f"{chunk}"
+                )
+
+        if self.chunk_summary_cache is None:
+            return await compute()
+        key = hashlib.sha256(f"summarize_chunk\0{self.model_name}\0{chunk}".encode()).hexdigest()
+        return await self.chunk_summary_cache.get_or_compute(key, compute)
+
+    async def _reduce_summaries(self, summaries: list[str]) -> list[str]:
+        """Combine partial summaries until they fit into one final prompt.
+
+        Gives up after ``_MAX_REDUCE_ROUNDS`` rounds, or as soon as a round does
+        not shrink the text (a model that echoes its input); the remaining text
+        is then truncated to ``summary_chunk_chars``.
+        """
+
+        async def combine(group: str) -> str:
+            async with self._summary_semaphore:
+                return await self._generate_text(
+                    "Below are summaries of consecutive parts of one document. Combine them "
+                    "into one short plain-text paragraph keeping the key points. "
+                    "Output ONLY the summary.\n\n"
+                    f"{group}"
+                )
+
+        joined = "\n\n".join(summaries)
+        for _ in range(_MAX_REDUCE_ROUNDS):
+            if len(joined) <= self.summary_chunk_chars or len(summaries) == 1:
+                return summaries
+            groups = split_markdown(joined, self.summary_chunk_chars)
+            combined = [c for c in await asyncio.gather(*(combine(group) for group in groups)) if c]
+            combined_joined = "\n\n".join(combined)
+            if len(combined_joined) >= len(joined):
+                break
+            summaries, joined = combined, combined_joined
+        logger.warning(
+            "Chunk summaries did not converge, truncating: length=%d, limit=%d",
+            len(joined),
+            self.summary_chunk_chars,
+        )
+        return [joined[: self.summary_chunk_chars]]
+
+    @timed_stage("summarize_document")
     async def summarize_document(self, content: str) -> Optional[str]:
         """Generate a brief plain-text summary of extracted document content.
 
+        Content longer than ``summary_chunk_chars`` is summarized map-reduce
+        style: split on headings/page breaks, chunk summaries generated
+        concurrently (at most ``summary_concurrency`` model calls at a time,
+        cached by chunk hash), then combined into the final summary.
+
         Args:
             content: Markdown text extracted from the document.
 
@@ -270,27 +403,35 @@ class MediaClient:
         if not content:
             return None
 
-        truncated = content[:30_000]
-
         try:
-            prompt = (
-                "Below is the text content of a document extracted as markdown. "
-                "Write a brief description (2-4 sentences) in plain text summarising "
+            if len(content) <= self.summary_chunk_chars:
+                body = content
+                intro = "Below is the text content of a document extracted as markdown. "
+            else:
+                chunks = split_markdown(content, self.summary_chunk_chars)
+                results = await asyncio.gather(
+                    *(self._summarize_chunk(chunk, i, len(chunks)) for i, chunk in enumerate(chunks)),
+                    return_exceptions=True,
+                )
+                partial = [r for r in results if isinstance(r, str) and r]
+                failed = len(results) - len(partial)
+                if failed:
+                    logger.warning("Document chunk summaries failed: failed=%d, total=%d", failed, len(chunks))
+                if not partial:
+                    return None
+                body = "\n\n".join(await self._reduce_summaries(partial))
+                intro = "Below are summaries of consecutive parts of one document. "
+                logger.info(
+                    "Document chunks summarized: chunks=%d, content_length=%d", len(chunks), len(content)
+                )
+
+            summary = await self._generate_text(
+                intro
+                + "Write a brief description (2-4 sentences) in plain text summarising "
                 "what this document is about. Do not use bullet points or headers. "
                 "Output ONLY the summary.\n\n"
-                f"{truncated}"
-            )
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=prompt)],
-                )
-            ]
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name,
-                contents=contents,
+                f"{body}"
             )
-            summary = response.text.strip()
             logger.info("Document summary generated: length=%d", len(summary))
             return summary or None
 
@@ -0,0 +1,49 @@
+"""Immutable decoded media payload shared by the API, processor and media client."""
+
+import base64
+import binascii
+import hashlib
+from dataclasses import dataclass, field
+from functools import cached_property
+
+
+@dataclass(frozen=True)
+class MediaPayload:
+    """Raw media bytes plus their MIME type, decoded once at the API edge.
+
+    Passed by reference through MessageProcessor, MediaClient and
+    GCSStorageClient so no stage has to decode (or copy) the bytes again.
+    """
+
+    data: bytes = field(repr=False)
+    mime_type: str
+
+    @classmethod
+    def from_base64(cls, encoded: str, mime_type: str) -> "MediaPayload":
+        """Decode a base64 string.
+
+        Strict ``a2b_base64`` reads the ASCII string in place; ``b64decode(validate=True)``
+        would copy it to bytes and run a regex over it first.
+
+        Raises:
+            ValueError: If ``encoded`` is not valid base64.
+        """
+        try:
+            data = binascii.a2b_base64(encoded, strict_mode=True)
+        except binascii.Error as e:
+            raise ValueError("Invalid base64 encoding") from e
+        return cls(data, mime_type)
+
+    @property
+    def size(self) -> int:
+        """Size of the decoded payload in bytes."""
+        return len(self.data)
+
+    @cached_property
+    def content_hash(self) -> str:
+        """SHA-256 hex digest of the bytes (computed on first use)."""
+        return hashlib.sha256(self.data).hexdigest()
+
+    def to_base64(self) -> str:
+        """Encode the payload as a base64 string (for JSON responses)."""
+        return base64.b64encode(self.data).decode("ascii")
@@ -0,0 +1,145 @@
+"""Background worker that saves sessions to Vertex AI Memory Bank off the request path."""
+
+import asyncio
+import logging
+from typing import Optional
+
+from agent.adk_agent import APP_NAME
+from agent.bulkhead import Bulkhead, admit
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryIngestionWorker:
+    """Ingests sessions into long-term memory from a bounded background queue.
+
+    ``submit()`` never blocks the caller: at most one job per session is
+    pending at a time (later turns are coalesced into it, since ingestion
+    reads the session when the job runs), and jobs submitted while the
+    queue is full are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        session_service,
+        memory_service,
+        max_queue_size: int = 1000,
+        concurrency: int = 2,
+        session_bulkhead: Optional[Bulkhead] = None,
+    ):
+        """Initialize the worker.
+
+        Args:
+            session_service: Session service used to load the session at ingest time.
+            memory_service: Memory service providing ``add_session_to_memory``.
+            max_queue_size: Maximum number of pending sessions.
+            concurrency: Number of concurrent ingestion tasks.
+            session_bulkhead: Optional concurrency limit for session service calls.
+        """
+        self.session_service = session_service
+        self.memory_service = memory_service
+        self.session_bulkhead = session_bulkhead
+        self._concurrency = concurrency
+        self._queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue(maxsize=max_queue_size)
+        self._pending: set[tuple[str, str]] = set()
+        self._tasks: list[asyncio.Task] = []
+        self._in_flight = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the background ingestion tasks (idempotent)."""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"memory-ingestion-{i}")
+            for i in range(self._concurrency)
+        ]
+
+    def submit(self, user_id: str, session_id: str) -> bool:
+        """Schedule a session for ingestion.
+
+        Returns:
+            True if the session is (now or already) pending, False if dropped.
+        """
+        key = (user_id, session_id)
+        if key in self._pending:
+            self.coalesced += 1
+            return True
+        try:
+            self._queue.put_nowait(key)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(
+                "Memory ingestion queue full, dropping: session_id=%s, queue_size=%d",
+                session_id,
+                self._queue.qsize(),
+            )
+            return False
+        self._pending.add(key)
+        self.submitted += 1
+        return True
+
+    async def _ingest(self, user_id: str, session_id: str) -> None:
+        async with admit(self.session_bulkhead):
+            session = await self.session_service.get_session(
+                app_name=APP_NAME,
+                user_id=user_id,
+                session_id=session_id,
+            )
+        if session:
+            await self.memory_service.add_session_to_memory(session)
+
+    async def _run(self) -> None:
+        while True:
+            user_id, session_id = await self._queue.get()
+            self._pending.discard((user_id, session_id))
+            self._in_flight += 1
+            try:
+                await self._ingest(user_id, session_id)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning(
+                    "Failed to save session to memory: session_id=%s, error=%s",
+                    session_id,
+                    e,
+                )
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    async def flush(self) -> None:
+        """Wait until every submitted session has been ingested."""
+        await self._queue.join()
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """Flush pending jobs (up to ``timeout`` seconds), then stop the tasks."""
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self.flush(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Memory ingestion flush timed out: pending=%d",
+                    self._queue.qsize() + self._in_flight,
+                )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        """Return queue depth and backpressure counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "in_flight": self._in_flight,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
@@ -0,0 +1,345 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+A small, dependency-free subset of the Prometheus client: counters, gauges
+and fixed-bucket histograms with labels. Label children are created once
+and cached; ``StageTimer`` and ``HttpMetrics`` keep their children per
+endpoint (and status), so recording an observation is a dict lookup, a
+bisect and a few integer/float updates. Values that already live in other
+components (cache sizes, bulkhead utilization, job queue depth) are read at
+scrape time through ``Registry.on_collect`` hooks instead of being mirrored
+on every update.
+"""
+
+import functools
+import logging
+import math
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
+
+from agent.timing import record_stage
+from agent.tracing import stage_span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Request/stage latencies range from cache hits (~ms) to Docling runs (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+OK = "ok"
+ERROR = "error"
+UNMATCHED = "unmatched"  # endpoint label of requests no route matched
+BACKGROUND = "background"  # endpoint label of stages outside a request (job workers)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for these label values (created on first use, then cached)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonic counter (``inc`` only by convention)."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _samples(self) -> Iterable[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}{_label_str(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down, or be set at scrape time."""
+
+    kind = "gauge"
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram (cumulative buckets are computed at render time)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> Iterable[str]:
+        bounds = self.buckets + (math.inf,)
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, child.counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_label_str(self.labelnames, values, le)} {cumulative}"
+            labels = _label_str(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class Registry:
+    """Ordered set of metrics plus scrape-time collect hooks."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._hooks: list[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def on_collect(self, hook: Callable[[], None]) -> None:
+        """Run ``hook`` before every render (to refresh scrape-time gauges); failures are logged."""
+        self._hooks.append(hook)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text format (version 0.0.4)."""
+        for hook in self._hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.warning("Metrics collect hook failed: error=%s", e)
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "master_agent_http_requests_total", "HTTP requests by route, method and status code.",
+    ("endpoint", "method", "status"),
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "master_agent_http_request_duration_seconds", "HTTP request latency by route and outcome.",
+    ("endpoint", "outcome"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "master_agent_http_requests_in_flight", "HTTP requests currently being handled."
+).labels()
+STAGE_LATENCY = REGISTRY.histogram(
+    "master_agent_stage_duration_seconds", "Latency of pipeline stages by route and outcome.",
+    ("stage", "endpoint", "outcome"),
+)
+CACHE_ENTRIES = REGISTRY.gauge(
+    "master_agent_cache_entries", "Entries in in-memory caches.", ("cache",)
+)
+BULKHEAD_ACTIVE = REGISTRY.gauge(
+    "master_agent_bulkhead_active", "Calls in flight per upstream bulkhead.", ("upstream",)
+)
+BULKHEAD_WAITING = REGISTRY.gauge(
+    "master_agent_bulkhead_waiting", "Calls waiting for a slot per upstream bulkhead.", ("upstream",)
+)
+BULKHEAD_REJECTED = REGISTRY.counter(
+    "master_agent_bulkhead_rejected_total",
+    "Calls shed by an upstream bulkhead (queue full or wait timed out).",
+    ("upstream",),
+)
+MODEL_RETRIES = REGISTRY.counter(
+    "master_agent_model_retries_total", "Model call retries by operation.", ("operation",)
+)
+JOBS = REGISTRY.gauge("master_agent_jobs", "Async jobs by state.", ("state",))
+
+
+class StageTimer:
+    """``ok``/``error`` histogram children for one pipeline stage, resolved once per endpoint."""
+
+    __slots__ = ("stage", "_histogram", "_children")
+
+    def __init__(self, stage: str, histogram: Histogram = STAGE_LATENCY):
+        self.stage = stage
+        self._histogram = histogram
+        self._children: dict[str, tuple[_HistogramChild, _HistogramChild]] = {}
+
+    def children(self, endpoint: str) -> tuple[_HistogramChild, _HistogramChild]:
+        """Return the (ok, error) children for ``endpoint``."""
+        pair = self._children.get(endpoint)
+        if pair is None:
+            pair = self._children[endpoint] = (
+                self._histogram.labels(self.stage, endpoint, OK),
+                self._histogram.labels(self.stage, endpoint, ERROR),
+            )
+        return pair
+
+    def observe(self, start: float, failed: bool = False) -> None:
+        """Record the time elapsed since ``start`` (a ``time.perf_counter()`` value).
+
+        The duration also goes to the current request's Server-Timing breakdown.
+        """
+        elapsed = time.perf_counter() - start
+        ok, error = self.children(current_endpoint())
+        (error if failed else ok).observe(elapsed)
+        record_stage(self.stage, elapsed)
+
+
+class HttpMetrics:
+    """``HTTP_REQUESTS``/``HTTP_LATENCY`` children resolved once per (endpoint, method, status)."""
+
+    __slots__ = ("_children",)
+
+    def __init__(self):
+        self._children: dict[tuple[str, str, int], tuple[_Value, _HistogramChild]] = {}
+
+    def observe(self, endpoint: str, method: str, status: int, elapsed: float) -> None:
+        """Count one request and record its latency."""
+        key = (endpoint, method, status)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                HTTP_REQUESTS.labels(endpoint, method, str(status)),
+                HTTP_LATENCY.labels(endpoint, OK if status < 500 else ERROR),
+            )
+        requests, latency = children
+        requests.inc()
+        latency.observe(elapsed)
+
+
+HTTP_METRICS = HttpMetrics()
+
+
+def timed_stage(stage: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorator recording an async function's latency in ``STAGE_LATENCY``.
+
+    Raising marks the call ``outcome="error"``. The call also runs in a span
+    named after the stage.
+    """
+    timer = StageTimer(stage)
+
+    def decorate(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            with stage_span(stage):
+                start = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    timer.observe(start, failed=True)
+                    raise
+                timer.observe(start)
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+def route_label(scope: dict) -> Optional[str]:
+    """Return the matched route's path template (bounded cardinality), if any."""
+    route = scope.get("route")
+    return getattr(route, "path", None)
+
+
+# ASGI scope of the request being handled, set by the HTTP metrics middleware
+request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+def current_endpoint() -> str:
+    """Return the endpoint label of the current request (``background`` outside one)."""
+    scope = request_scope.get()
+    if scope is None:
+        return BACKGROUND
+    return route_label(scope) or UNMATCHED
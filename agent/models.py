@@ -85,6 +85,14 @@ class VoiceRequest(BaseModel):
         return self
 
 
+class VoiceUploadRequest(BaseModel):
+    """Metadata for a binary voice upload (multipart form fields or X-* headers)."""
+
+    conversation_id: str
+    mime_type: str = "audio/ogg"
+    metadata: Optional[RequestMetadata] = None
+
+
 class ChatResponse(BaseModel):
     """Chat API response model."""
 
@@ -112,6 +120,15 @@ class ImageRequest(BaseModel):
         return self.conversation_id
 
 
+class ImageUploadRequest(BaseModel):
+    """Metadata for a binary image upload (multipart form fields or X-* headers)."""
+
+    conversation_id: str
+    mime_type: str = "image/jpeg"
+    prompt: Optional[str] = None
+    metadata: Optional[RequestMetadata] = None
+
+
 class ImageResponse(BaseModel):
     """Image API response model."""
 
@@ -129,6 +146,17 @@ class DocumentRequest(BaseModel):
     mime_type: str
     filename: str
     metadata: Optional[RequestMetadata] = None
+    defer_summary: bool = False
+
+
+class DocumentUploadRequest(BaseModel):
+    """Metadata for a binary document upload (multipart form fields or X-* headers)."""
+
+    conversation_id: str
+    mime_type: str
+    filename: str
+    metadata: Optional[RequestMetadata] = None
+    defer_summary: bool = False
 
 
 class DocumentMetadata(BaseModel):
@@ -149,6 +177,8 @@ class DocumentResponse(BaseModel):
     gcs_uri: str
     result_gcs_uri: Optional[str] = None
     summary: Optional[str] = None
+    summary_job_id: Optional[str] = None
+    summary_url: Optional[str] = None
 
 
 class SessionInfoRequest(BaseModel):
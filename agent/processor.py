@@ -1,20 +1,32 @@
 """Message processor using ADK Runner."""
 
-import base64
 import logging
 import re
-from typing import Optional
+import time
+from typing import AsyncIterator, Optional
 
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
 from google.adk.sessions import BaseSessionService
 from google.genai import types
 
+from agent.adk_agent import APP_NAME
+from agent.background import BackgroundTaskSet
+from agent.bulkhead import Bulkhead, BulkheadFull, admit
+from agent.cache import LRUCache
 from agent.gcs_client import GCSStorageClient
 from agent.media_client import MediaClient
+from agent.media_payload import MediaPayload
+from agent.memory_worker import MemoryIngestionWorker
+from agent.metrics import StageTimer, timed_stage
+from agent.result_cache import ResultCache, media_cache_key
+from agent.scheduler import KeyedScheduler
+from agent.tracing import stage_span
 
 logger = logging.getLogger(__name__)
 
-APP_NAME = "master_agent"
+# Time from handing the message to the Runner until its final response
+_RUN_TURN = StageTimer("run_turn")
 
 # Vertex AI resource names only allow letters, digits, and hyphens
 _SANITIZE_RE = re.compile(r"[^a-zA-Z0-9-]")
@@ -28,6 +40,13 @@ def _sanitize_id(raw_id: str) -> str:
     return _SANITIZE_RE.sub("-", raw_id)
 
 
+def _event_text(event) -> Optional[str]:
+    """Return the text of the first content part of an ADK event, if any."""
+    if event.content and event.content.parts:
+        return event.content.parts[0].text
+    return None
+
+
 class MessageProcessor:
     """Processes messages using ADK Runner."""
 
@@ -38,6 +57,13 @@ class MessageProcessor:
         media_client: Optional[MediaClient] = None,
         memory_service=None,
         gcs_client: Optional[GCSStorageClient] = None,
+        session_cache: Optional[LRUCache] = None,
+        memory_worker: Optional[MemoryIngestionWorker] = None,
+        background_tasks: Optional[BackgroundTaskSet] = None,
+        description_cache: Optional[ResultCache] = None,
+        transcription_cache: Optional[ResultCache] = None,
+        model_bulkhead: Optional[Bulkhead] = None,
+        session_bulkhead: Optional[Bulkhead] = None,
     ):
         """Initialize the processor.
 
@@ -47,15 +73,43 @@ class MessageProcessor:
             media_client: Optional client for media (voice, image) processing.
             memory_service: Optional memory service for long-term memory.
             gcs_client: Optional GCS client for persisting images.
+            session_cache: Optional bounded cache for conversation -> session ID
+                mappings. Defaults to 10,000 entries with a 1 hour idle TTL.
+            memory_worker: Optional background worker for Memory Bank ingestion.
+                When set, sessions are saved to memory after the reply is
+                returned instead of inline.
+            background_tasks: Optional tracker for fire-and-forget work (GCS
+                uploads). Share one across processors so shutdown can drain it.
+            description_cache: Optional cache of image descriptions keyed by
+                image content, consulted before calling the model.
+            transcription_cache: Optional cache of transcriptions keyed by
+                audio content (forwarded voice messages are byte-identical).
+            model_bulkhead: Optional concurrency limit for agent turns (text model).
+            session_bulkhead: Optional concurrency limit for session service calls.
         """
         self.runner = runner
         self.session_service = session_service
         self.media_client = media_client
         self.memory_service = memory_service
         self.gcs_client = gcs_client
-        # Cache: conversation_id -> vertex session_id (avoids list_sessions on every message)
-        self._session_cache: dict[str, str] = {}
-
+        self.memory_worker = memory_worker
+        if background_tasks is None:
+            background_tasks = BackgroundTaskSet()
+        self.background_tasks = background_tasks
+        self.description_cache = description_cache
+        self.transcription_cache = transcription_cache
+        self.model_bulkhead = model_bulkhead
+        self.session_bulkhead = session_bulkhead
+        # Cache: conversation_id -> vertex session_id (avoids list_sessions on every message).
+        # Bounded: an evicted entry only costs one list_sessions call on the next message.
+        if session_cache is None:
+            session_cache = LRUCache(max_size=10_000, ttl_seconds=3600.0)
+        self._session_cache = session_cache
+        # Serializes turns per conversation; different conversations run in parallel
+        self._scheduler = KeyedScheduler()
+        self.runner_swaps = 0
+
+    @timed_stage("get_or_create_session")
     async def _get_or_create_session(self, user_id: str) -> str:
         """Find existing session or create a new one for the user.
 
@@ -68,41 +122,109 @@ class MessageProcessor:
         """
         # InMemorySessionService: use user_id as session_id directly
         if not self.memory_service:
-            existing = await self.session_service.get_session(
-                app_name=APP_NAME,
-                user_id=user_id,
-                session_id=user_id,
-            )
-            if existing is None:
-                await self.session_service.create_session(
+            async with admit(self.session_bulkhead):
+                existing = await self.session_service.get_session(
                     app_name=APP_NAME,
                     user_id=user_id,
                     session_id=user_id,
                 )
+                if existing is None:
+                    await self.session_service.create_session(
+                        app_name=APP_NAME,
+                        user_id=user_id,
+                        session_id=user_id,
+                    )
             return user_id
 
         # Check cache first
-        if user_id in self._session_cache:
-            return self._session_cache[user_id]
+        cached = self._session_cache.get(user_id)
+        if cached is not None:
+            return cached
 
-        # VertexAiSessionService: list sessions to find existing one
-        sessions_response = await self.session_service.list_sessions(
-            app_name=APP_NAME,
-            user_id=user_id,
-        )
-        if sessions_response and sessions_response.sessions:
-            sid = sessions_response.sessions[0].id
-            self._session_cache[user_id] = sid
-            return sid
-
-        # No session found — create one (server generates ID)
-        new_session = await self.session_service.create_session(
-            app_name=APP_NAME,
-            user_id=user_id,
-        )
-        self._session_cache[user_id] = new_session.id
+        async with admit(self.session_bulkhead):
+            # VertexAiSessionService: list sessions to find existing one
+            sessions_response = await self.session_service.list_sessions(
+                app_name=APP_NAME,
+                user_id=user_id,
+            )
+            if sessions_response and sessions_response.sessions:
+                sid = sessions_response.sessions[0].id
+                self._session_cache.set(user_id, sid)
+                return sid
+
+            # No session found — create one (server generates ID)
+            new_session = await self.session_service.create_session(
+                app_name=APP_NAME,
+                user_id=user_id,
+            )
+        self._session_cache.set(user_id, new_session.id)
         return new_session.id
 
+    def invalidate_session(self, conversation_id: str) -> bool:
+        """Drop the cached session ID for a conversation (e.g. after the session was deleted).
+
+        Returns:
+            True if a cached entry was removed.
+        """
+        return self._session_cache.invalidate(_sanitize_id(conversation_id))
+
+    def swap_runner(self, runner: Runner) -> None:
+        """Replace the ADK Runner (e.g. after a prompt change) without a new processor.
+
+        Session cache, scheduler, workers and background tasks are kept. Turns
+        that already started finish on the runner they started with; turns
+        started afterwards use the new one.
+        """
+        self.runner = runner
+        self.runner_swaps += 1
+
+    def queue_depth(self, conversation_id: str) -> int:
+        """Return the number of running + queued turns for a conversation."""
+        return self._scheduler.depth(_sanitize_id(conversation_id))
+
+    def stats(self) -> dict:
+        """Return runtime statistics for the /api/stats endpoint."""
+        return {
+            "conversation_queue": self._scheduler.stats(),
+            "session_cache": self._session_cache.stats(),
+            "background_tasks": self.background_tasks.stats(),
+            "runner_swaps": self.runner_swaps,
+            **({"memory_ingestion": self.memory_worker.stats()} if self.memory_worker else {}),
+            **({"description_cache": self.description_cache.stats()} if self.description_cache else {}),
+            **(
+                {"transcription_cache": self.transcription_cache.stats()}
+                if self.transcription_cache
+                else {}
+            ),
+        }
+
+    @timed_stage("memory_save")
+    async def _save_to_memory(self, user_id: str, session_id: str) -> None:
+        """Save the session to long-term memory if configured (errors are logged).
+
+        With a memory worker this only enqueues the session and returns at once.
+        """
+        if not self.memory_service:
+            return
+        if self.memory_worker is not None:
+            self.memory_worker.submit(user_id, session_id)
+            return
+        try:
+            async with admit(self.session_bulkhead):
+                session = await self.session_service.get_session(
+                    app_name=APP_NAME,
+                    user_id=user_id,
+                    session_id=session_id,
+                )
+            if session:
+                await self.memory_service.add_session_to_memory(session)
+        except Exception as mem_err:
+            logger.warning(
+                "Failed to save session to memory: session_id=%s, error=%s",
+                session_id,
+                mem_err,
+            )
+
     async def process(self, conversation_id: str, message: str) -> str:
         """Process a user message and return the agent response.
 
@@ -119,10 +241,17 @@ class MessageProcessor:
         if not message or not message.strip():
             return "Empty message received. Please send a text message."
 
-        try:
-            # Sanitize conversation_id for Vertex AI resource name compatibility
-            user_id = _sanitize_id(conversation_id)
+        # Sanitize conversation_id for Vertex AI resource name compatibility
+        user_id = _sanitize_id(conversation_id)
+
+        # Turns for one conversation run strictly in order
+        async with self._scheduler.slot(user_id):
+            return await self._run_turn(conversation_id, user_id, message)
 
+    async def _run_turn(self, conversation_id: str, user_id: str, message: str) -> str:
+        """Run one agent turn; caller must hold the conversation's scheduler slot."""
+        runner = self.runner  # pin: a prompt swap mid-turn must not change it
+        try:
             # Find or create session for this user
             session_id = await self._get_or_create_session(user_id)
 
@@ -140,15 +269,22 @@ class MessageProcessor:
 
             # Run agent and collect final response
             response_text = None
-            async for event in self.runner.run_async(
-                user_id=user_id,
-                session_id=session_id,
-                new_message=content,
-            ):
-                if event.is_final_response():
-                    if event.content and event.content.parts:
-                        response_text = event.content.parts[0].text
-                    break
+            start = time.perf_counter()
+            try:
+                with stage_span("run_turn", {"session.id": session_id}):
+                    async with admit(self.model_bulkhead):
+                        async for event in runner.run_async(
+                            user_id=user_id,
+                            session_id=session_id,
+                            new_message=content,
+                        ):
+                            if event.is_final_response():
+                                response_text = _event_text(event)
+                                break
+            except BaseException:
+                _RUN_TURN.observe(start, failed=True)
+                raise
+            _RUN_TURN.observe(start)
 
             if response_text is None:
                 logger.warning("No final response from agent: session_id=%s", session_id)
@@ -160,26 +296,17 @@ class MessageProcessor:
                 len(response_text),
             )
 
-            # Save session to long-term memory if configured
-            if self.memory_service:
-                try:
-                    session = await self.session_service.get_session(
-                        app_name=APP_NAME,
-                        user_id=user_id,
-                        session_id=session_id,
-                    )
-                    if session:
-                        await self.memory_service.add_session_to_memory(session)
-                except Exception as mem_err:
-                    logger.warning(
-                        "Failed to save session to memory: session_id=%s, error=%s",
-                        session_id,
-                        mem_err,
-                    )
+            await self._save_to_memory(user_id, session_id)
 
             return response_text
 
+        except BulkheadFull:
+            raise
         except Exception as e:
+            # Runner raises ValueError for an unknown session (e.g. deleted in Vertex);
+            # drop the cached ID so the next message looks it up again
+            if isinstance(e, ValueError):
+                self._session_cache.invalidate(user_id)
             logger.error(
                 "Processing error: conversation_id=%s, error=%s",
                 conversation_id,
@@ -187,9 +314,105 @@ class MessageProcessor:
             )
             raise RuntimeError("Failed to process message") from e
 
-    async def process_voice(
-        self, conversation_id: str, audio_base64: str, mime_type: str
-    ) -> dict:
+    async def process_stream(self, conversation_id: str, message: str) -> AsyncIterator[dict]:
+        """Process a user message, yielding partial text as the agent generates it.
+
+        Yields ``{"type": "delta", "text": ...}`` for every partial text chunk,
+        followed by exactly one ``{"type": "final", "response": ...}`` carrying
+        the complete response text.
+
+        Args:
+            conversation_id: Conversation identifier (used as session_id).
+            message: User message text.
+
+        Raises:
+            RuntimeError: If processing fails.
+        """
+        if not message or not message.strip():
+            yield {"type": "final", "response": "Empty message received. Please send a text message."}
+            return
+
+        user_id = _sanitize_id(conversation_id)
+
+        async with self._scheduler.slot(user_id):
+            async for event in self._stream_turn(conversation_id, user_id, message):
+                yield event
+
+    async def _stream_turn(self, conversation_id: str, user_id: str, message: str) -> AsyncIterator[dict]:
+        """Stream one agent turn; caller must hold the conversation's scheduler slot."""
+        runner = self.runner  # pin: a prompt swap mid-turn must not change it
+        try:
+            session_id = await self._get_or_create_session(user_id)
+
+            content = types.Content(
+                role="user",
+                parts=[types.Part(text=message)],
+            )
+
+            logger.info(
+                "Processing streamed message: session_id=%s, message_length=%d",
+                session_id,
+                len(message),
+            )
+
+            response_text = None
+            chunks: list[str] = []
+            start = time.perf_counter()
+            try:
+                with stage_span("run_turn", {"session.id": session_id}):
+                    async with admit(self.model_bulkhead):
+                        async for event in runner.run_async(
+                            user_id=user_id,
+                            session_id=session_id,
+                            new_message=content,
+                            run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+                        ):
+                            text = _event_text(event)
+                            if event.partial:
+                                if text:
+                                    chunks.append(text)
+                                    yield {"type": "delta", "text": text}
+                                continue
+                            if event.is_final_response():
+                                # The closing non-partial event carries the aggregated text
+                                response_text = text or "".join(chunks) or None
+                                break
+            except BaseException:
+                _RUN_TURN.observe(start, failed=True)
+                raise
+            _RUN_TURN.observe(start)
+
+            if response_text is None:
+                logger.warning("No final response from agent: session_id=%s", session_id)
+                yield {"type": "final", "response": "I couldn't generate a response. Please try again."}
+                return
+
+            logger.info(
+                "Agent streamed response: session_id=%s, chunks=%d, response_length=%d",
+                session_id,
+                len(chunks),
+                len(response_text),
+            )
+
+            await self._save_to_memory(user_id, session_id)
+
+            yield {"type": "final", "response": response_text}
+
+        except BulkheadFull:
+            raise
+        except Exception as e:
+            # Runner raises ValueError for an unknown session (e.g. deleted in Vertex);
+            # drop the cached ID so the next message looks it up again
+            if isinstance(e, ValueError):
+                self._session_cache.invalidate(user_id)
+            logger.error(
+                "Streaming error: conversation_id=%s, error=%s",
+                conversation_id,
+                e,
+            )
+            raise RuntimeError("Failed to process message") from e
+
+    async def process_voice(self, conversation_id: str, audio: MediaPayload) -> dict:
         """Process a voice message and return transcription + response.
 
         Transcribes audio, then processes transcription through ADK Runner
@@ -197,8 +420,7 @@ class MessageProcessor:
 
         Args:
             conversation_id: Conversation identifier.
-            audio_base64: Base64-encoded audio bytes.
-            mime_type: Audio MIME type.
+            audio: Decoded audio payload.
 
         Returns:
             dict with "response" and "transcription" keys.
@@ -206,7 +428,7 @@ class MessageProcessor:
         Raises:
             RuntimeError: If processing fails.
         """
-        if not audio_base64 or not audio_base64.strip():
+        if not audio.data:
             return {
                 "response": "Empty audio received. Please send a voice message.",
                 "transcription": "",
@@ -220,9 +442,7 @@ class MessageProcessor:
 
         try:
             # Step 1: Transcribe audio
-            transcription = await self.media_client.transcribe(
-                audio_base64, mime_type, conversation_id
-            )
+            transcription = await self._transcribe(audio, conversation_id)
 
             if not transcription:
                 return {
@@ -237,7 +457,7 @@ class MessageProcessor:
                 "response": response,
                 "transcription": transcription,
             }
-        except RuntimeError:
+        except (RuntimeError, BulkheadFull):
             raise
         except Exception as e:
             logger.error(
@@ -247,8 +467,26 @@ class MessageProcessor:
             )
             raise RuntimeError("Failed to process voice message") from e
 
+    async def _transcribe(self, audio: MediaPayload, conversation_id: str) -> str:
+        """Transcribe audio, reusing a cached transcription of identical bytes."""
+        if self.transcription_cache is None:
+            return await self.media_client.transcribe(audio, conversation_id)
+        key = media_cache_key("transcribe", audio, self.media_client.model_name)
+        return await self.transcription_cache.get_or_compute(
+            key, lambda: self.media_client.transcribe(audio, conversation_id)
+        )
+
+    async def _describe_image(self, image: MediaPayload, conversation_id: str) -> str:
+        """Describe an image, reusing a cached description of identical bytes."""
+        if self.description_cache is None:
+            return await self.media_client.describe_image(image, conversation_id)
+        key = media_cache_key("describe_image", image, self.media_client.model_name)
+        return await self.description_cache.get_or_compute(
+            key, lambda: self.media_client.describe_image(image, conversation_id)
+        )
+
     async def process_image(
-        self, conversation_id: str, image_base64: str, mime_type: str, prompt: str | None = None
+        self, conversation_id: str, image: MediaPayload, prompt: str | None = None
     ) -> dict:
         """Process an image and return description + response.
 
@@ -257,8 +495,7 @@ class MessageProcessor:
 
         Args:
             conversation_id: Conversation identifier.
-            image_base64: Base64-encoded image bytes.
-            mime_type: Image MIME type.
+            image: Decoded image payload.
             prompt: Optional question about the image.
 
         Returns:
@@ -267,7 +504,7 @@ class MessageProcessor:
         Raises:
             RuntimeError: If processing fails.
         """
-        if not image_base64 or not image_base64.strip():
+        if not image.data:
             return {
                 "response": "Empty image received. Please send an image.",
                 "description": "",
@@ -284,24 +521,29 @@ class MessageProcessor:
             }
 
         try:
-            # Save original image to GCS (fire-and-forget)
+            # Save original image to GCS in the background, overlapping the model call
             if self.gcs_client:
-                image_bytes = base64.b64decode(image_base64)
-                await self.gcs_client.upload_original(image_bytes, mime_type, conversation_id)
+                self.background_tasks.spawn(
+                    self.gcs_client.upload_original(image.data, image.mime_type, conversation_id),
+                    name=f"gcs-upload-original:{conversation_id}",
+                )
 
             if prompt and self.media_client:
                 # Image + prompt: use Nano Banana Pro model for processing
                 model_result = await self.media_client.process_image_with_model(
-                    image_base64, mime_type, conversation_id, prompt
+                    image, conversation_id, prompt
                 )
 
                 description = model_result["text"]
-
-                # Save processed image to GCS if model returned one (fire-and-forget)
-                if self.gcs_client and model_result["image_base64"] and model_result["image_mime_type"]:
-                    processed_bytes = base64.b64decode(model_result["image_base64"])
-                    await self.gcs_client.upload_processed(
-                        processed_bytes, model_result["image_mime_type"], conversation_id
+                processed: Optional[MediaPayload] = model_result["image"]
+
+                # Save processed image to GCS in the background, overlapping the agent turn
+                if self.gcs_client and processed:
+                    self.background_tasks.spawn(
+                        self.gcs_client.upload_processed(
+                            processed.data, processed.mime_type, conversation_id
+                        ),
+                        name=f"gcs-upload-processed:{conversation_id}",
                     )
 
                 # Build message for ADK Runner to preserve context
@@ -311,14 +553,12 @@ class MessageProcessor:
                 return {
                     "response": response,
                     "description": description,
-                    "processed_image_base64": model_result["image_base64"],
-                    "processed_image_mime_type": model_result["image_mime_type"],
+                    "processed_image_base64": processed.to_base64() if processed else None,
+                    "processed_image_mime_type": processed.mime_type if processed else None,
                 }
 
             # Image without prompt: use existing description pipeline
-            description = await self.media_client.describe_image(
-                image_base64, mime_type, conversation_id
-            )
+            description = await self._describe_image(image, conversation_id)
 
             if not description:
                 return {
@@ -339,7 +579,7 @@ class MessageProcessor:
                 "processed_image_base64": None,
                 "processed_image_mime_type": None,
             }
-        except RuntimeError:
+        except (RuntimeError, BulkheadFull):
             raise
         except Exception as e:
             logger.error(
@@ -0,0 +1,200 @@
+"""Async loader for the system prompt stored in Vertex AI Prompt Management.
+
+Uses the REST API directly to bypass the SDK thinkingConfig parsing bug.
+See: https://github.com/googleapis/google-cloud-python/issues/14941
+
+Every instance runs a background poller that first asks only for the
+prompt's ``etag``/``updateTime`` (conditionally, with ``If-None-Match``) and
+downloads the full prompt only when that version changed, so a prompt edit
+reaches all Cloud Run instances without a per-instance reload call.
+"""
+
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from agent.auth import TokenManager
+
+logger = logging.getLogger(__name__)
+
+_TIMEOUT = 30.0
+_VERSION_FIELDS = "etag,updateTime"
+
+OnChange = Callable[[str], Awaitable[None]]
+
+
+def extract_system_instruction(data: dict) -> Optional[str]:
+    """Return the system instruction text of a prompt dataset, if any.
+
+    Path: metadata.promptApiSchema.multimodalPrompt.promptMessage.systemInstruction.parts[0].text
+    """
+    try:
+        return (
+            data.get("metadata", {})
+            .get("promptApiSchema", {})
+            .get("multimodalPrompt", {})
+            .get("promptMessage", {})
+            .get("systemInstruction", {})
+            .get("parts", [{}])[0]
+            .get("text")
+        )
+    except (IndexError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _version_of(data: dict) -> Optional[str]:
+    return data.get("etag") or data.get("updateTime")
+
+
+class PromptLoader:
+    """Loads and tracks the current version of one Vertex AI prompt."""
+
+    def __init__(
+        self,
+        project_id: str,
+        location: str,
+        prompt_id: str,
+        token_manager: Optional[TokenManager] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        """Initialize the loader.
+
+        Args:
+            project_id: GCP project ID.
+            location: GCP location (e.g., europe-west4).
+            prompt_id: Vertex AI Prompt resource ID.
+            token_manager: Shared access token cache; a private one is created if omitted.
+            http_client: Optional HTTP client; one is created (and owned) if omitted.
+        """
+        self.prompt_id = prompt_id
+        self._url = (
+            f"https://{location}-aiplatform.googleapis.com/v1beta1/"
+            f"projects/{project_id}/locations/{location}/datasets/{prompt_id}"
+        )
+        self._owns_tokens = token_manager is None
+        self._tokens = token_manager or TokenManager()
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.AsyncClient(timeout=_TIMEOUT)
+        self._lock = asyncio.Lock()
+        self._poller: Optional[asyncio.Task] = None
+        self._http_etag: Optional[str] = None
+        self.version: Optional[str] = None
+        self.instruction: Optional[str] = None
+        self.checks = 0
+        self.unchanged = 0
+        self.fetches = 0
+        self.changes = 0
+        self.failures = 0
+
+    async def _headers(self) -> dict:
+        token = await self._tokens.access_token()
+        return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+    async def _remote_changed(self) -> bool:
+        """Cheap version check: fetch only etag/updateTime, conditionally."""
+        headers = await self._headers()
+        if self._http_etag:
+            headers["If-None-Match"] = self._http_etag
+        response = await self._http.get(
+            self._url, params={"readMask": _VERSION_FIELDS}, headers=headers
+        )
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        self._http_etag = response.headers.get("ETag")
+        version = _version_of(response.json())
+        return version is None or version != self.version
+
+    async def refresh(self, force: bool = False, on_change: Optional[OnChange] = None) -> bool:
+        """Load the prompt if its version changed since the last load.
+
+        Args:
+            force: Skip the version check and always download the prompt.
+            on_change: Awaited with the new instruction when it changed. Runs
+                under the loader lock, so concurrent refreshes apply in order.
+
+        Returns:
+            True if a new instruction was loaded.
+
+        Raises:
+            httpx.HTTPError: If Vertex AI cannot be reached or returns an error.
+            ValueError: If the prompt has no system instruction.
+        """
+        async with self._lock:
+            self.checks += 1
+            try:
+                if not force and self.instruction is not None and not await self._remote_changed():
+                    self.unchanged += 1
+                    return False
+
+                self.fetches += 1
+                response = await self._http.get(self._url, headers=await self._headers())
+                response.raise_for_status()
+                data = response.json()
+                instruction = extract_system_instruction(data)
+                if not instruction:
+                    raise ValueError(f"Prompt {self.prompt_id} has no system instruction")
+            except Exception:
+                self.failures += 1
+                raise
+
+            self.version = _version_of(data)
+            if instruction == self.instruction:
+                return False
+            self.instruction = instruction
+            self.changes += 1
+            logger.info(
+                "Loaded prompt from Vertex AI: prompt_id=%s, version=%s, length=%d",
+                self.prompt_id,
+                self.version,
+                len(instruction),
+            )
+            if on_change is not None:
+                await on_change(instruction)
+            return True
+
+    def start(self, interval: float, on_change: OnChange) -> None:
+        """Start polling for new prompt versions every ~``interval`` seconds (idempotent)."""
+        if self._poller is not None or interval <= 0:
+            return
+        self._poller = asyncio.create_task(self._poll(interval, on_change), name="prompt-poller")
+
+    async def _poll(self, interval: float, on_change: OnChange) -> None:
+        while True:
+            # Jitter keeps instances from polling Vertex AI in lockstep
+            await asyncio.sleep(interval * random.uniform(0.9, 1.1))
+            try:
+                await self.refresh(on_change=on_change)
+            except Exception as e:
+                logger.warning(
+                    "Prompt poll failed, keeping current version: prompt_id=%s, error=%s",
+                    self.prompt_id,
+                    e,
+                )
+
+    async def close(self) -> None:
+        """Stop the poller and close owned clients."""
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        if self._owns_http:
+            await self._http.aclose()
+        if self._owns_tokens:
+            await self._tokens.close()
+
+    def stats(self) -> dict:
+        """Return the loaded version and poll counters."""
+        return {
+            "prompt_id": self.prompt_id,
+            "version": self.version,
+            "polling": self._poller is not None,
+            "checks": self.checks,
+            "unchanged": self.unchanged,
+            "fetches": self.fetches,
+            "changes": self.changes,
+            "failures": self.failures,
+        }
@@ -0,0 +1,207 @@
+"""Content-addressed cache for text results of media model calls.
+
+Keys are derived from the media bytes (``MediaPayload.content_hash``), MIME
+type, model and prompt, so a forwarded copy of the same image or voice
+message is answered from cache instead of another Gemini call. Results live
+in an in-memory ``LRUCache`` and, optionally, in a directory of small files
+(local disk, or a Cloud Storage FUSE volume to share them across instances).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from agent.cache import LRUCache
+from agent.media_payload import MediaPayload
+
+logger = logging.getLogger(__name__)
+
+_PRUNE_EVERY = 100  # disk writes between size/TTL sweeps
+
+
+def media_cache_key(
+    operation: str, payload: MediaPayload, model: str, prompt: Optional[str] = None
+) -> str:
+    """Build a cache key for ``operation`` applied to ``payload`` by ``model``."""
+    parts = (operation, payload.content_hash, payload.mime_type, model, prompt or "")
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier (memory + optional disk) cache of text results.
+
+    ``get_or_compute`` also coalesces concurrent misses for the same key,
+    so two copies of a message arriving together cost one model call.
+    Empty results and failures are never cached.
+    """
+
+    def __init__(
+        self,
+        memory: LRUCache,
+        disk_dir: Optional[str] = None,
+        disk_ttl_seconds: Optional[float] = None,
+        disk_max_entries: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize the cache.
+
+        Args:
+            memory: In-memory tier (size limit and idle TTL).
+            disk_dir: Directory for the persistent tier; None disables it.
+            disk_ttl_seconds: Age after which disk entries expire; None disables expiry.
+            disk_max_entries: Oldest disk entries are pruned beyond this count.
+            clock: Wall-clock time source (compared with file mtimes).
+        """
+        self.memory = memory
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_ttl = disk_ttl_seconds
+        self._disk_max_entries = disk_max_entries
+        self._clock = clock
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._writes_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.disk_errors = 0
+        self.coalesced = 0
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+
+    # --- disk tier (blocking helpers, run via asyncio.to_thread) ---
+
+    def _path(self, key: str) -> Path:
+        return self._disk_dir / f"{key}.json"
+
+    def _disk_read(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if self._disk_ttl is not None and self._clock() - path.stat().st_mtime > self._disk_ttl:
+                path.unlink(missing_ok=True)
+                return None
+            return json.loads(path.read_text())["value"]
+        except FileNotFoundError:
+            return None
+
+    def _disk_write(self, key: str, value: str) -> None:
+        path = self._path(key)
+        # Unique name: instances sharing the directory may all run as pid 1
+        tmp = tempfile.NamedTemporaryFile(
+            "w", dir=self._disk_dir, prefix=f"{key}.", suffix=".tmp", delete=False
+        )
+        try:
+            with tmp:
+                tmp.write(json.dumps({"value": value}))
+            os.replace(tmp.name, path)
+        except BaseException:
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+
+    def _disk_prune(self) -> None:
+        entries = []
+        for path in self._disk_dir.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        now = self._clock()
+        excess = len(entries) - self._disk_max_entries
+        for i, (mtime, path) in enumerate(entries):
+            expired = self._disk_ttl is not None and now - mtime > self._disk_ttl
+            if i < excess or expired:
+                path.unlink(missing_ok=True)
+
+    # --- public API ---
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached result (memory first, then disk) or None."""
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self._disk_dir is not None:
+            try:
+                value = await asyncio.to_thread(self._disk_read, key)
+            except Exception as e:
+                self.disk_errors += 1
+                logger.warning("Result cache disk read failed: key=%s, error=%s", key, e)
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a result in both tiers (disk errors are logged, not raised)."""
+        self.memory.set(key, value)
+        if self._disk_dir is None:
+            return
+        try:
+            await asyncio.to_thread(self._disk_write, key, value)
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= _PRUNE_EVERY:
+                self._writes_since_prune = 0
+                await asyncio.to_thread(self._disk_prune)
+        except Exception as e:
+            self.disk_errors += 1
+            logger.warning("Result cache disk write failed: key=%s, error=%s", key, e)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached result for ``key`` or compute, cache and return it.
+
+        If the caller computing a result is cancelled, callers waiting for it
+        retry (one of them computes) instead of being cancelled too.
+        """
+        while (pending := self._in_flight.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await self.get(key)
+            if value is None:
+                value = await compute()
+                if value:
+                    await self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a future nobody awaited doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for both tiers."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "memory": self.memory.stats(),
+            **(
+                {"disk": {"hits": self.disk_hits, "errors": self.disk_errors}}
+                if self._disk_dir is not None
+                else {}
+            ),
+        }
@@ -0,0 +1,201 @@
+"""Retries with jittered exponential backoff and a process-wide retry budget.
+
+Model calls (MediaClient and the agent's Gemini model) share one
+``RetryPolicy``. Only transient failures are retried: 408/429/5xx from Vertex
+AI and network errors. A server ``Retry-After`` is honoured, and a
+token-bucket ``RetryBudget`` caps retries to a fraction of requests, so
+during an outage retries cannot multiply the load on the upstream.
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from google.genai import errors as genai_errors
+
+from agent.bulkhead import BulkheadFull
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for transient upstream failures worth retrying."""
+    if isinstance(exc, BulkheadFull):
+        return False  # local load shedding; retrying would defeat it
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (httpx.TimeoutException, httpx.NetworkError, TimeoutError, ConnectionError))
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Return the server's Retry-After (seconds or HTTP date) from an error response."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    """Token bucket limiting retries to ``ratio`` per request (plus a burst of ``max_tokens``).
+
+    Every request deposits ``ratio`` tokens and every retry withdraws one.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 20.0):
+        """Initialize a full bucket.
+
+        Args:
+            ratio: Long-run retries allowed per request.
+            max_tokens: Bucket size, i.e. retries allowed in a burst.
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+
+    def deposit(self) -> None:
+        """Credit one request."""
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """Take a token for one retry; False if the budget is exhausted."""
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+class RetryPolicy:
+    """Decides whether and when to retry, and keeps retry counters."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        budget: Optional[RetryBudget] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        rng: Callable[[], float] = random.random,
+    ):
+        """Initialize the policy.
+
+        Args:
+            max_attempts: Total attempts per call, including the first.
+            base_delay: Backoff before the first retry (doubles per attempt).
+            max_delay: Backoff cap; a longer server Retry-After is not waited for.
+            budget: Shared retry budget; None allows every retry up to max_attempts.
+            sleep: Awaitable sleep (injectable for tests).
+            rng: Uniform [0, 1) source for jitter (injectable for tests).
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self._sleep = sleep
+        self._rng = rng
+        self.requests = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.gave_up = 0
+        self.retries_by_operation: dict[str, int] = {}
+
+    def record_request(self) -> None:
+        """Count a new logical call (and credit the retry budget)."""
+        self.requests += 1
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt + 1``."""
+        return self._rng() * min(self.max_delay, self.base_delay * (2**attempt))
+
+    def retry_delay(self, operation: str, exc: BaseException, attempt: int) -> Optional[float]:
+        """Return the delay before retrying after failed attempt ``attempt`` (0-based), or None.
+
+        Counts the retry when one is granted.
+        """
+        if not is_retryable(exc):
+            return None
+        if attempt + 1 >= self.max_attempts:
+            self.gave_up += 1
+            return None
+        delay = retry_after_seconds(exc)
+        if delay is None:
+            delay = self.backoff(attempt)
+        elif delay > self.max_delay:
+            self.gave_up += 1
+            return None
+        if self.budget is not None and not self.budget.try_withdraw():
+            self.budget_exhausted += 1
+            return None
+        self.retries += 1
+        self.retries_by_operation[operation] = self.retries_by_operation.get(operation, 0) + 1
+        logger.warning(
+            "Retrying model call: operation=%s, attempt=%d, delay=%.2fs, error=%s",
+            operation,
+            attempt + 1,
+            delay,
+            exc,
+        )
+        return delay
+
+    async def wait(self, delay: float) -> None:
+        """Sleep for a delay returned by ``retry_delay``."""
+        await self._sleep(delay)
+
+    async def call(self, operation: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()``, retrying transient failures per this policy."""
+        self.record_request()
+        attempt = 0
+        while True:
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self.retry_delay(operation, e, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            await self.wait(delay)
+
+    def stats(self) -> dict:
+        """Return retry counters."""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "retries_by_operation": dict(self.retries_by_operation),
+            "gave_up": self.gave_up,
+            "budget_exhausted": self.budget_exhausted,
+            **({"budget_tokens": round(self.budget.tokens, 2)} if self.budget is not None else {}),
+        }
+
+
+async def call_with_retry(
+    policy: Optional[RetryPolicy], operation: str, fn: Callable[[], Awaitable[T]]
+) -> T:
+    """``policy.call(operation, fn)``, or a single attempt when no policy is configured."""
+    if policy is None:
+        return await fn()
+    return await policy.call(operation, fn)
@@ -0,0 +1,51 @@
+"""Keyed scheduler: ordered execution per key, parallel across keys."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class KeyedScheduler:
+    """Serializes work that shares a key while letting different keys run concurrently.
+
+    Each key gets a FIFO-fair ``asyncio.Lock``, so turns for one conversation
+    run strictly in arrival order. Per-key state is dropped as soon as the
+    last holder or waiter leaves, so idle conversations cost nothing.
+    """
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+        # key -> number of holders + waiters (0 or 1 holder at a time)
+        self._depths: dict[str, int] = {}
+
+    @asynccontextmanager
+    async def slot(self, key: str) -> AsyncIterator[None]:
+        """Wait for the key's turn, then hold it for the duration of the block."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._depths[key] = self._depths.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            remaining = self._depths[key] - 1
+            if remaining:
+                self._depths[key] = remaining
+            else:
+                del self._depths[key]
+                del self._locks[key]
+
+    def depth(self, key: str) -> int:
+        """Return the number of running + queued turns for a key."""
+        return self._depths.get(key, 0)
+
+    def stats(self) -> dict:
+        """Return queue statistics; ``backlog`` lists only keys with waiters."""
+        backlog = {key: depth for key, depth in self._depths.items() if depth > 1}
+        return {
+            "active_keys": len(self._depths),
+            "waiting": sum(depth - 1 for depth in self._depths.values()),
+            "max_depth": max(self._depths.values(), default=0),
+            "backlog": backlog,
+        }
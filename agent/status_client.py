@@ -5,6 +5,10 @@ import logging
 from datetime import datetime, timezone
 
 import httpx
+from opentelemetry.trace import SpanKind
+
+from agent.auth import TokenManager
+from agent.tracing import inject_context, stage_span
 
 logger = logging.getLogger(__name__)
 
@@ -12,10 +16,19 @@ _TIMEOUT = 5.0
 _UNREACHABLE: dict = {"status": "unreachable", "version": "unknown", "uptime_seconds": None}
 
 
-async def _fetch_status(client: httpx.AsyncClient, url: str, name: str, purpose: str) -> dict:
+async def _fetch_status(
+    client: httpx.AsyncClient,
+    url: str,
+    name: str,
+    purpose: str,
+    token_manager: TokenManager | None = None,
+) -> dict:
     try:
-        resp = await client.get(f"{url}/status", timeout=_TIMEOUT)
-        resp.raise_for_status()
+        # Cloud Run services with IAM-restricted ingress need an ID token
+        headers = await token_manager.id_token_header(url) if token_manager else {}
+        with stage_span("agent_status", {"peer.service": name}, SpanKind.CLIENT):
+            resp = await client.get(f"{url}/status", headers=inject_context(headers), timeout=_TIMEOUT)
+            resp.raise_for_status()
         data = resp.json()
         return {
             "name": name,
@@ -35,6 +48,7 @@ async def collect_agents_status(
     docling_agent_url: str | None,
     self_version: str,
     self_started_at: datetime,
+    token_manager: TokenManager | None = None,
 ) -> list[dict]:
     """Collect status from all known agents and return ordered list."""
     self_uptime = (datetime.now(timezone.utc) - self_started_at).total_seconds()
@@ -54,10 +68,14 @@ async def collect_agents_status(
 
     async with httpx.AsyncClient() as client:
         if telegram_bot_url:
-            tasks.append(_fetch_status(client, telegram_bot_url, "telegram-bot", bot_purpose))
+            tasks.append(_fetch_status(
+                client, telegram_bot_url, "telegram-bot", bot_purpose, token_manager
+            ))
             labels.append("telegram-bot")
         if docling_agent_url:
-            tasks.append(_fetch_status(client, docling_agent_url, "docling-agent", docling_purpose))
+            tasks.append(_fetch_status(
+                client, docling_agent_url, "docling-agent", docling_purpose, token_manager
+            ))
             labels.append("docling-agent")
 
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,65 @@
+"""Per-request stage timing, emitted as a Server-Timing header and a log field.
+
+The HTTP middleware puts a ``RequestTiming`` on the ``request_timing``
+contextvar; every ``StageTimer`` observation in ``agent.metrics`` is also
+recorded there, so processor, media, GCS and Docling stages show up without
+passing the recorder around. Work spawned
+from the request (background uploads) inherits the context, but anything
+it records after the response started only reaches the log line.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+
+class RequestTiming:
+    """Accumulated duration and call count per stage for one request."""
+
+    __slots__ = ("_start", "_stages")
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        # stage -> [total seconds, calls]; concurrent calls (e.g. chunk summaries) add up
+        self._stages: dict[str, list] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        entry = self._stages.get(stage)
+        if entry is None:
+            self._stages[stage] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        """Seconds since the request started."""
+        return time.perf_counter() - self._start
+
+    def header(self) -> str:
+        """Server-Timing header value, e.g. ``run_turn;dur=812.4, gcs_upload;desc="2 calls";dur=40.1``."""
+        metrics = []
+        for stage, (seconds, calls) in self._stages.items():
+            desc = f';desc="{calls} calls"' if calls > 1 else ""
+            metrics.append(f"{stage}{desc};dur={seconds * 1000:.1f}")
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def summary(self) -> dict:
+        """Structured breakdown for the request log line (milliseconds)."""
+        return {
+            "total_ms": round(self.elapsed() * 1000, 1),
+            "stages": {
+                stage: {"ms": round(seconds * 1000, 1), "calls": calls}
+                for stage, (seconds, calls) in self._stages.items()
+            },
+        }
+
+
+request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add a stage duration to the current request's timing, if there is one."""
+    timing = request_timing.get()
+    if timing is not None:
+        timing.record(stage, seconds)
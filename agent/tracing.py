@@ -0,0 +1,299 @@
+"""OpenTelemetry spans, trace propagation and head/tail sampling.
+
+Every ``timed_stage`` (and the processor's ``run_turn``) is also a span, and
+ADK adds its own agent/LLM spans under them through the global tracer
+provider. Outbound calls carry the current context as ``traceparent`` and
+``X-Cloud-Trace-Context`` (``inject_context``), so Docling, GCS, the status
+endpoints and Vertex AI join the same trace.
+
+Sampling: a ratio of new traces is sampled up front (callers' sampling
+decisions are respected). With tail sampling enabled, the other traces are
+still recorded in memory, and a trace is exported only if its local root
+span took longer than the latency threshold or any of its spans failed.
+Tail-kept traces are not flagged as sampled downstream, so they contain
+this service's spans only.
+
+Without ``setup_tracing`` (no OTLP endpoint configured) the API's no-op
+tracer is used: spans cost a context switch, and an incoming trace context
+is still passed on to upstream calls.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.propagators.composite import CompositePropagator
+from opentelemetry.propagators.textmap import (
+    CarrierT,
+    Getter,
+    Setter,
+    TextMapPropagator,
+    default_getter,
+    default_setter,
+)
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanKind, StatusCode
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+logger = logging.getLogger(__name__)
+
+TRACER = trace.get_tracer("master_agent")
+
+CLOUD_TRACE_HEADER = "X-Cloud-Trace-Context"
+
+
+class CloudTraceFormatPropagator(TextMapPropagator):
+    """``X-Cloud-Trace-Context: TRACE_ID/SPAN_ID;o=1`` (span id in decimal)."""
+
+    _field = CLOUD_TRACE_HEADER.lower()
+
+    def extract(
+        self,
+        carrier: CarrierT,
+        context: Optional[otel_context.Context] = None,
+        getter: Getter = default_getter,
+    ) -> otel_context.Context:
+        context = context if context is not None else otel_context.get_current()
+        values = getter.get(carrier, self._field) or getter.get(carrier, CLOUD_TRACE_HEADER)
+        if not values:
+            return context
+        header = values[0]
+        trace_part, _, rest = header.partition("/")
+        span_part, _, options = rest.partition(";")
+        try:
+            trace_id = int(trace_part, 16)
+            span_id = int(span_part) if span_part else 0
+        except ValueError:
+            return context
+        if not trace_id or not span_id or span_id >= 2**64:
+            return context
+        sampled = options.strip() == "o=1"
+        span_context = trace.SpanContext(
+            trace_id=trace_id,
+            span_id=span_id,
+            is_remote=True,
+            trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED if sampled else trace.TraceFlags.DEFAULT),
+        )
+        return trace.set_span_in_context(trace.NonRecordingSpan(span_context), context)
+
+    def inject(
+        self,
+        carrier: CarrierT,
+        context: Optional[otel_context.Context] = None,
+        setter: Setter = default_setter,
+    ) -> None:
+        span_context = trace.get_current_span(context).get_span_context()
+        if not span_context.is_valid:
+            return
+        setter.set(
+            carrier,
+            CLOUD_TRACE_HEADER,
+            f"{span_context.trace_id:032x}/{span_context.span_id};o={int(span_context.trace_flags.sampled)}",
+        )
+
+    @property
+    def fields(self) -> set:
+        return {CLOUD_TRACE_HEADER}
+
+
+# traceparent wins over X-Cloud-Trace-Context when a caller sends both
+PROPAGATOR = CompositePropagator([CloudTraceFormatPropagator(), TraceContextTextMapPropagator()])
+propagate.set_global_textmap(PROPAGATOR)
+
+
+def inject_context(headers: dict) -> dict:
+    """Add the current trace context to outbound request headers (in place) and return them."""
+    PROPAGATOR.inject(headers)
+    return headers
+
+
+def extract_context(headers) -> otel_context.Context:
+    """Return the caller's trace context from incoming request headers."""
+    return PROPAGATOR.extract(headers)
+
+
+def current_trace_ids() -> tuple[str, str, bool]:
+    """Return (trace id, span id, sampled) of the current span; empty ids if there is none."""
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid:
+        return "", "", False
+    return f"{span_context.trace_id:032x}", f"{span_context.span_id:016x}", span_context.trace_flags.sampled
+
+
+@contextmanager
+def stage_span(
+    name: str, attributes: Optional[dict] = None, kind: SpanKind = SpanKind.INTERNAL
+) -> Iterator[trace.Span]:
+    """Current span for one pipeline stage or upstream call; exceptions mark it as failed."""
+    with TRACER.start_as_current_span(name, kind=kind, attributes=attributes) as span:
+        yield span
+
+
+class HeadSampler(Sampler):
+    """Parent-based ratio sampling; unsampled spans are still recorded for tail sampling."""
+
+    def __init__(self, ratio: float, record_unsampled: bool):
+        self._delegate = ParentBased(TraceIdRatioBased(ratio))
+        self._record_unsampled = record_unsampled
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None, trace_state=None):
+        result = self._delegate.should_sample(
+            parent_context, trace_id, name, kind, attributes, links, trace_state
+        )
+        if result.decision is Decision.DROP and self._record_unsampled:
+            return SamplingResult(Decision.RECORD_ONLY, result.attributes, result.trace_state)
+        return result
+
+    def get_description(self) -> str:
+        return f"HeadSampler({self._delegate.get_description()}, tail={self._record_unsampled})"
+
+
+def _as_sampled(span: ReadableSpan) -> ReadableSpan:
+    """Copy of a finished span with the sampled flag set."""
+    ctx = span.context
+    return ReadableSpan(
+        name=span.name,
+        context=trace.SpanContext(
+            ctx.trace_id, ctx.span_id, ctx.is_remote, trace.TraceFlags(trace.TraceFlags.SAMPLED), ctx.trace_state
+        ),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """Forwards head-sampled spans; buffers the rest per trace until its local root ends.
+
+    The buffered trace is exported if the root ran for at least
+    ``latency_threshold`` seconds or any span has an error status. Spans of
+    a kept trace that end after the root (background work) are forwarded
+    too. At most ``max_traces`` traces are buffered; the oldest is dropped.
+    Kept spans are flagged as sampled, since export processors skip
+    unsampled spans.
+    """
+
+    def __init__(self, next_processor: SpanProcessor, latency_threshold: float, max_traces: int = 1000):
+        self._next = next_processor
+        self._threshold_ns = int(latency_threshold * 1e9)
+        self._max_traces = max_traces
+        self._pending: OrderedDict[int, list[ReadableSpan]] = OrderedDict()
+        self._kept: OrderedDict[int, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self.kept_traces = 0
+        self.dropped_traces = 0
+
+    def on_start(self, span, parent_context=None) -> None:
+        self._next.on_start(span, parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        span_context = span.context
+        if span_context.trace_flags.sampled:
+            self._next.on_end(span)
+            return
+        trace_id = span_context.trace_id
+        is_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            if trace_id in self._kept:
+                spans = [span]
+            else:
+                spans = self._pending.setdefault(trace_id, [])
+                spans.append(span)
+                if not is_root:
+                    if len(self._pending) > self._max_traces:
+                        self._pending.popitem(last=False)
+                        self.dropped_traces += 1
+                    return
+                del self._pending[trace_id]
+                if not self._keep(span, spans):
+                    self.dropped_traces += 1
+                    return
+                self.kept_traces += 1
+                self._kept[trace_id] = None
+                if len(self._kept) > self._max_traces:
+                    self._kept.popitem(last=False)
+        for buffered in spans:
+            self._next.on_end(_as_sampled(buffered))
+
+    def _keep(self, root: ReadableSpan, spans: list[ReadableSpan]) -> bool:
+        if root.end_time - root.start_time >= self._threshold_ns:
+            return True
+        return any(s.status.status_code is StatusCode.ERROR for s in spans)
+
+    def shutdown(self) -> None:
+        self._next.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+
+def build_tracer_provider(
+    service_name: str,
+    exporter: SpanExporter,
+    sample_ratio: float,
+    tail_latency: float,
+) -> TracerProvider:
+    """Tracer provider exporting through ``exporter`` with head (and optional tail) sampling.
+
+    Args:
+        service_name: ``service.name`` resource attribute.
+        exporter: Span exporter (batched).
+        sample_ratio: Fraction of new traces sampled up front.
+        tail_latency: Keep unsampled traces whose root took at least this many
+            seconds, or that failed; 0 disables tail sampling.
+    """
+    tail = tail_latency > 0
+    provider = TracerProvider(
+        sampler=HeadSampler(sample_ratio, record_unsampled=tail),
+        resource=Resource.create({"service.name": service_name}),
+    )
+    export: SpanProcessor = BatchSpanProcessor(exporter)
+    if tail:
+        export = TailSamplingSpanProcessor(export, tail_latency)
+    provider.add_span_processor(export)
+    return provider
+
+
+def setup_tracing(
+    service_name: str, endpoint: Optional[str], sample_ratio: float, tail_latency: float
+) -> Optional[TracerProvider]:
+    """Install the global tracer provider exporting to an OTLP/HTTP collector.
+
+    Returns None (tracing stays no-op) if no endpoint is configured or the
+    optional ``opentelemetry-exporter-otlp-proto-http`` package is missing.
+    """
+    if not endpoint:
+        return None
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        logger.warning("OTLP endpoint configured but opentelemetry-exporter-otlp-proto-http is not installed")
+        return None
+    provider = build_tracer_provider(
+        service_name,
+        OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces"),
+        sample_ratio,
+        tail_latency,
+    )
+    trace.set_tracer_provider(provider)
+    return provider
@@ -1,35 +1,88 @@
 import asyncio
+import json
 import logging
 import os
 import pathlib
+import queue
 import sys
+import time
 from contextlib import asynccontextmanager
-from contextvars import ContextVar
 from datetime import datetime, timezone
+from typing import Awaitable, Callable, TypeVar
+from urllib.parse import unquote, urlsplit
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
 from pythonjsonlogger import jsonlogger
 
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 
-from agent.adk_agent import create_agent, load_prompt_from_vertex_ai
+from agent.adk_agent import APP_NAME, create_agent
+from agent.auth import TokenManager
+from agent.background import BackgroundTaskSet
+from agent.bulkhead import Bulkhead, BulkheadFull
 from agent.config import (
+    BULKHEAD_DEFAULTS,
     get_agent_engine_id,
+    get_background_drain_timeout,
+    get_bulkhead_limits,
+    get_bulkhead_queue_timeout,
     get_docling_agent_url,
     get_docling_gcs_bucket,
+    get_docling_http2,
+    get_docling_max_connections,
+    get_document_index_path,
+    get_document_index_ttl,
     get_gcs_bucket_name,
+    get_gcs_max_connections,
+    get_image_cache_max_size,
+    get_image_cache_ttl,
     get_image_model_name,
+    get_job_callback_allowed_hosts,
+    get_job_queue_max_size,
+    get_job_retention,
+    get_job_store_path,
+    get_job_workers,
     get_location,
     get_log_level,
+    get_log_queue_max_size,
+    get_log_rate_limits,
+    get_log_sample_rates,
+    get_media_cache_dir,
+    get_media_cache_disk_max_entries,
+    get_media_cache_disk_ttl,
+    get_memory_flush_timeout,
+    get_memory_queue_max_size,
+    get_memory_worker_concurrency,
     get_model_name,
+    get_model_retry_base_delay,
+    get_model_retry_budget_ratio,
+    get_model_retry_max_attempts,
+    get_model_retry_max_delay,
+    get_otlp_endpoint,
     get_port,
     get_project_id,
     get_prompt_id,
+    get_prompt_poll_interval,
     get_region,
     get_service_name,
+    get_session_cache_max_size,
+    get_session_cache_ttl,
+    get_storage_emulator_host,
+    get_summary_chunk_cache_max_size,
+    get_summary_chunk_cache_ttl,
+    get_summary_chunk_chars,
+    get_summary_concurrency,
     get_telegram_bot_url,
+    get_trace_sample_ratio,
+    get_trace_tail_latency,
+    get_transcription_cache_max_size,
+    get_transcription_cache_ttl,
     mask_token,
 )
 from agent.models import (
@@ -37,25 +90,50 @@ from agent.models import (
     DocumentMetadata,
     DocumentRequest,
     DocumentResponse,
+    DocumentUploadRequest,
     ImageRequest,
+    ImageUploadRequest,
     SessionInfoRequest,
     SessionInfoResponse,
     VoiceRequest,
+    VoiceUploadRequest,
 )
+from agent.cache import LRUCache
 from agent.docling_client import DoclingClient
+from agent.document_index import DocumentIndex, document_key
+from agent.fast_json import FastJSONResponse, InvalidBody, decode_model, dumps as json_dumps
+from agent.media_payload import MediaPayload
+from agent.memory_worker import MemoryIngestionWorker
+from agent.metrics import (
+    BULKHEAD_ACTIVE,
+    BULKHEAD_REJECTED,
+    BULKHEAD_WAITING,
+    CACHE_ENTRIES,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    HTTP_IN_FLIGHT,
+    HTTP_METRICS,
+    JOBS,
+    MODEL_RETRIES,
+    REGISTRY,
+    UNMATCHED,
+    request_scope,
+    route_label as metrics_route,
+    timed_stage,
+)
 from agent.processor import MessageProcessor, _sanitize_id
 from agent.media_client import MediaClient
 from agent.gcs_client import GCSStorageClient
-
-# Cloud Trace context variable
-trace_context: ContextVar[str] = ContextVar("trace_context", default="")
-
-# Lock for serializing reload operations
-reload_lock = asyncio.Lock()
+from agent.log_pipeline import SamplingFilter, TraceQueueHandler
+from agent.jobs import JobError, JobManager, JobQueueFull, JobStore, job_view
+from agent.prompt_loader import PromptLoader
+from agent.result_cache import ResultCache
+from agent.retry import RetryBudget, RetryPolicy
+from agent.timing import RequestTiming, request_timing
+from agent.tracing import TRACER, current_trace_ids, extract_context, setup_tracing
 
 
 class CloudTraceFormatter(jsonlogger.JsonFormatter):
-    """JSON formatter that includes Cloud Trace context."""
+    """JSON formatter that includes the current span's Cloud Trace context."""
 
     def __init__(self, *args, project_id: str = "", **kwargs):
         super().__init__(*args, **kwargs)
@@ -67,42 +145,73 @@ class CloudTraceFormatter(jsonlogger.JsonFormatter):
         log_record["level"] = record.levelname
         log_record["logger"] = record.name
 
-        trace_id = trace_context.get("")
+        # Stamped by TraceQueueHandler at emit time; formatting runs on the writer thread
+        trace_ids = log_record.pop("trace_context", None) or current_trace_ids()
+        trace_id, span_id, sampled = trace_ids
         if trace_id and self.project_id:
             log_record["logging.googleapis.com/trace"] = (
                 f"projects/{self.project_id}/traces/{trace_id}"
             )
+            log_record["logging.googleapis.com/spanId"] = span_id
+            log_record["logging.googleapis.com/trace_sampled"] = sampled
 
 
-def setup_logging(project_id: str, log_level: str) -> None:
-    """Configure JSON structured logging."""
-    handler = logging.StreamHandler(sys.stdout)
+def setup_logging(project_id: str, log_level: str) -> TraceQueueHandler:
+    """Configure JSON structured logging, written by a background thread.
+
+    Returns the root logger's queue handler (stop it on shutdown to flush).
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
     formatter = CloudTraceFormatter(
         "%(timestamp)s %(level)s %(logger)s %(message)s",
         project_id=project_id,
     )
-    handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+
+    queue_handler = TraceQueueHandler(queue.Queue(maxsize=get_log_queue_max_size()))
+    sample_rates = get_log_sample_rates()
+    rate_limits = get_log_rate_limits()
+    if sample_rates or rate_limits:
+        queue_handler.addFilter(SamplingFilter(sample_rates, rate_limits))
 
     root_logger = logging.getLogger()
+    for handler in root_logger.handlers:
+        if isinstance(handler, TraceQueueHandler):
+            handler.stop()
     root_logger.handlers.clear()
-    root_logger.addHandler(handler)
+    root_logger.addHandler(queue_handler)
     root_logger.setLevel(getattr(logging, log_level, logging.INFO))
+    queue_handler.start(stream_handler)
 
     # Suppress noisy third-party loggers
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
+    return queue_handler
 
 
 logger = logging.getLogger(__name__)
 
 
+def _make_result_cache(name: str, max_size: int, ttl_seconds: float) -> ResultCache | None:
+    """Build a media result cache; None if disabled (max_size <= 0)."""
+    if max_size <= 0:
+        return None
+    cache_dir = get_media_cache_dir()
+    return ResultCache(
+        LRUCache(max_size=max_size, ttl_seconds=ttl_seconds),
+        disk_dir=os.path.join(cache_dir, name) if cache_dir else None,
+        disk_ttl_seconds=get_media_cache_disk_ttl(),
+        disk_max_entries=get_media_cache_disk_max_entries(),
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage ADK components lifecycle."""
     # --- Startup ---
     project_id = get_project_id()
     log_level = get_log_level()
-    setup_logging(project_id, log_level)
+    log_handler = setup_logging(project_id, log_level)
 
     port = get_port()
     model_name = get_model_name()
@@ -120,12 +229,56 @@ async def lifespan(app: FastAPI):
         region,
     )
 
+    # Spans are exported only when an OTLP collector is configured
+    tracer_provider = setup_tracing(
+        service_name, get_otlp_endpoint(), get_trace_sample_ratio(), get_trace_tail_latency()
+    )
+    if tracer_provider:
+        logger.info(
+            "Tracing enabled: endpoint=%s, sample_ratio=%.3f, tail_latency=%.1fs",
+            get_otlp_endpoint(),
+            get_trace_sample_ratio(),
+            get_trace_tail_latency(),
+        )
+
+    # Access/ID tokens shared by every outbound client, refreshed off the event loop
+    token_manager = TokenManager()
+
+    # Transient model errors (429/5xx) are retried with jittered backoff, within a shared budget
+    retry_policy = RetryPolicy(
+        max_attempts=get_model_retry_max_attempts(),
+        base_delay=get_model_retry_base_delay(),
+        max_delay=get_model_retry_max_delay(),
+        budget=RetryBudget(ratio=get_model_retry_budget_ratio()),
+    )
+
+    # One bulkhead per upstream, so a backed-up dependency can't starve the others
+    queue_timeout = get_bulkhead_queue_timeout()
+    bulkheads = {}
+    for name in BULKHEAD_DEFAULTS:
+        max_concurrent, max_queue = get_bulkhead_limits(name)
+        bulkheads[name] = Bulkhead(name, max_concurrent, max_queue, queue_timeout)
+        logger.info(
+            "Bulkhead configured: name=%s, max_concurrent=%d, max_queue=%d",
+            name,
+            max_concurrent,
+            max_queue,
+        )
+
     # Load system prompt from Vertex AI Prompt Management (if configured)
     instruction = None
+    prompt_loader = None
     prompt_id = get_prompt_id()
     if prompt_id:
         logger.info("Loading prompt from Vertex AI: prompt_id=%s", prompt_id)
-        instruction = load_prompt_from_vertex_ai(project_id, location, prompt_id)
+        prompt_loader = PromptLoader(project_id, location, prompt_id, token_manager)
+        try:
+            await prompt_loader.refresh(force=True)
+        except Exception as e:
+            logger.warning(
+                "Failed to load prompt from Vertex AI: prompt_id=%s, error=%s", prompt_id, e
+            )
+        instruction = prompt_loader.instruction
         if instruction:
             logger.info("Using prompt from Vertex AI Prompt Management")
         else:
@@ -163,10 +316,12 @@ async def lifespan(app: FastAPI):
         session_service = InMemorySessionService()
 
     # Create ADK components
-    agent = create_agent(model_name=model_name, instruction=instruction, tools=agent_tools)
+    agent = create_agent(
+        model_name=model_name, instruction=instruction, tools=agent_tools, retry_policy=retry_policy
+    )
 
     runner = Runner(
-        app_name="master_agent",
+        app_name=APP_NAME,
         agent=agent,
         session_service=session_service,
         **({"memory_service": memory_service} if memory_service else {}),
@@ -175,28 +330,116 @@ async def lifespan(app: FastAPI):
     # Create media client for audio/image processing (uses Vertex AI)
     image_model_name = get_image_model_name()
     logger.info("Image processing model: %s", image_model_name)
-    media_client = MediaClient(project_id, location, model_name, image_model_name)
+    media_client = MediaClient(
+        project_id,
+        location,
+        model_name,
+        image_model_name,
+        summary_chunk_chars=get_summary_chunk_chars(),
+        summary_concurrency=get_summary_concurrency(),
+        chunk_summary_cache=_make_result_cache(
+            "summarize_chunk", get_summary_chunk_cache_max_size(), get_summary_chunk_cache_ttl()
+        ),
+        text_bulkhead=bulkheads["model"],
+        image_bulkhead=bulkheads["image_model"],
+        retry_policy=retry_policy,
+    )
 
-    # Create GCS client for image persistence
+    # Create GCS client for image persistence (async JSON API, pooled connections)
+    gcs_endpoint = get_storage_emulator_host()
+    gcs_max_connections = get_gcs_max_connections()
+    if gcs_endpoint:
+        logger.info("Using GCS emulator: endpoint=%s", gcs_endpoint)
     gcs_bucket = get_gcs_bucket_name()
-    gcs_client = GCSStorageClient(gcs_bucket)
+    gcs_client = GCSStorageClient(
+        gcs_bucket,
+        endpoint=gcs_endpoint,
+        max_connections=gcs_max_connections,
+        token_manager=token_manager,
+        bulkhead=bulkheads["gcs"],
+    )
     logger.info("GCS image storage enabled: bucket=%s", gcs_bucket)
 
     # Create GCS client for docling documents
     docling_gcs_bucket = get_docling_gcs_bucket()
-    docling_gcs_client = GCSStorageClient(docling_gcs_bucket)
+    docling_gcs_client = GCSStorageClient(
+        docling_gcs_bucket,
+        endpoint=gcs_endpoint,
+        max_connections=gcs_max_connections,
+        token_manager=token_manager,
+        bulkhead=bulkheads["gcs"],
+    )
     logger.info("GCS docling storage enabled: bucket=%s", docling_gcs_bucket)
 
     # Create Docling agent client if URL configured
     docling_agent_url = get_docling_agent_url()
-    docling_client = DoclingClient(docling_agent_url) if docling_agent_url else None
+    docling_client = (
+        DoclingClient(
+            docling_agent_url,
+            max_connections=get_docling_max_connections(),
+            http2=get_docling_http2(),
+            token_manager=token_manager,
+            bulkhead=bulkheads["docling"],
+        )
+        if docling_agent_url
+        else None
+    )
     if docling_client:
         logger.info("Docling agent client enabled: url=%s", docling_agent_url)
     else:
         logger.info("DOCLING_AGENT_URL not configured, document processing unavailable")
 
+    # Content-hash index of processed documents (dedup across chats and restarts)
+    document_index = None
+    if docling_client:
+        document_index = DocumentIndex(
+            get_document_index_path(), ttl_seconds=get_document_index_ttl()
+        )
+        await document_index.prune()
+        logger.info("Document index enabled: path=%s", document_index.path)
+
     # Create processor with ADK Runner
-    processor = MessageProcessor(runner, session_service, media_client, memory_service, gcs_client)
+    session_cache = LRUCache(
+        max_size=get_session_cache_max_size(),
+        ttl_seconds=get_session_cache_ttl(),
+    )
+    # Memory Bank ingestion runs in the background, off the request path
+    memory_worker = None
+    if memory_service:
+        memory_worker = MemoryIngestionWorker(
+            session_service,
+            memory_service,
+            max_queue_size=get_memory_queue_max_size(),
+            concurrency=get_memory_worker_concurrency(),
+            session_bulkhead=bulkheads["sessions"],
+        )
+        memory_worker.start()
+
+    # Fire-and-forget work (GCS uploads) shared by every processor instance
+    background_tasks = BackgroundTaskSet()
+
+    # Content-addressed caches of model results for forwarded images / voice messages
+    description_cache = _make_result_cache(
+        "describe_image", get_image_cache_max_size(), get_image_cache_ttl()
+    )
+    transcription_cache = _make_result_cache(
+        "transcribe", get_transcription_cache_max_size(), get_transcription_cache_ttl()
+    )
+
+    # Long-running document / image-edit requests can run as background jobs
+    job_manager = JobManager(
+        JobStore(get_job_store_path()),
+        workers=get_job_workers(),
+        max_queue_size=get_job_queue_max_size(),
+        retention_seconds=get_job_retention(),
+    )
+    await job_manager.start()
+
+    processor = MessageProcessor(
+        runner, session_service, media_client, memory_service, gcs_client, session_cache,
+        memory_worker, background_tasks, description_cache, transcription_cache,
+        model_bulkhead=bulkheads["model"], session_bulkhead=bulkheads["sessions"],
+    )
 
     app.state.started_at = datetime.now(timezone.utc)
     try:
@@ -209,6 +452,8 @@ async def lifespan(app: FastAPI):
     app.state.agent = agent
     app.state.session_service = session_service
     app.state.memory_service = memory_service
+    app.state.memory_worker = memory_worker
+    app.state.background_tasks = background_tasks
     app.state.processor = processor
     app.state.media_client = media_client
     app.state.project_id = project_id
@@ -217,33 +462,208 @@ async def lifespan(app: FastAPI):
     app.state.gcs_client = gcs_client
     app.state.docling_gcs_client = docling_gcs_client
     app.state.docling_client = docling_client
+    app.state.document_index = document_index
+    app.state.job_manager = job_manager
+    app.state.callback_allowed_hosts = get_job_callback_allowed_hosts()
+    app.state.token_manager = token_manager
+    app.state.bulkheads = bulkheads
+    app.state.retry_policy = retry_policy
+    app.state.prompt_loader = prompt_loader
+    app.state.log_handler = log_handler
+
+    # Keep this instance on the latest prompt version without a reload call
+    if prompt_loader:
+        prompt_loader.start(
+            get_prompt_poll_interval(),
+            on_change=lambda new_instruction: _apply_prompt(app, new_instruction),
+        )
 
     yield
 
     # --- Shutdown ---
     logger.info("Shutting down %s", service_name)
+    if prompt_loader:
+        await prompt_loader.close()
+    await job_manager.close(timeout=get_background_drain_timeout())
+    job_manager.store.close()
+    await background_tasks.drain(timeout=get_background_drain_timeout())
+    if memory_worker:
+        await memory_worker.close(timeout=get_memory_flush_timeout())
     await media_client.close()
+    await gcs_client.close()
+    await docling_gcs_client.close()
+    if docling_client:
+        await docling_client.close()
+    if document_index:
+        document_index.close()
+    await token_manager.close()
     if hasattr(session_service, "close"):
         await session_service.close()
+    if tracer_provider:
+        # Flushes batched spans (blocking HTTP export)
+        await asyncio.to_thread(tracer_provider.shutdown)
+    # Last: writes out queued log records, including the shutdown lines above
+    log_handler.stop()
+
 
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
-app = FastAPI(lifespan=lifespan)
+
+def _overloaded(e: BulkheadFull) -> JSONResponse:
+    """503 + Retry-After for a call an upstream's bulkhead did not admit."""
+    logger.warning("Request shed: upstream=%s, retry_after=%d", e.name, e.retry_after)
+    return FastJSONResponse(
+        status_code=503,
+        content={"error": "Service busy, please retry later", "retry_after": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+@app.exception_handler(BulkheadFull)
+async def bulkhead_full_handler(request: Request, exc: BulkheadFull):
+    return _overloaded(exc)
+
+
+def _collect_component_metrics() -> None:
+    """Scrape-time gauges read from components that already keep these numbers."""
+    state = app.state
+    processor: MessageProcessor | None = getattr(state, "processor", None)
+    if processor is not None:
+        processor_stats = processor.stats()
+        CACHE_ENTRIES.labels("session").set(processor_stats["session_cache"]["size"])
+        for name in ("description_cache", "transcription_cache"):
+            if name in processor_stats:
+                CACHE_ENTRIES.labels(name.removesuffix("_cache")).set(
+                    processor_stats[name]["memory"]["size"]
+                )
+    media_client = getattr(state, "media_client", None)
+    chunk_cache = getattr(media_client, "chunk_summary_cache", None)
+    if isinstance(chunk_cache, ResultCache):
+        CACHE_ENTRIES.labels("summarize_chunk").set(chunk_cache.memory.stats()["size"])
+    for name, bulkhead in getattr(state, "bulkheads", {}).items():
+        bulkhead_stats = bulkhead.stats()
+        BULKHEAD_ACTIVE.labels(name).set(bulkhead_stats["active"])
+        BULKHEAD_WAITING.labels(name).set(bulkhead_stats["waiting"])
+        BULKHEAD_REJECTED.labels(name).set(bulkhead_stats["rejected"] + bulkhead_stats["timed_out"])
+    retry_policy: RetryPolicy | None = getattr(state, "retry_policy", None)
+    if retry_policy is not None:
+        for operation, count in retry_policy.retries_by_operation.items():
+            MODEL_RETRIES.labels(operation).set(count)
+    job_manager: JobManager | None = getattr(state, "job_manager", None)
+    if job_manager is not None:
+        job_stats = job_manager.stats()
+        JOBS.labels("queued").set(job_stats["queued"])
+        JOBS.labels("running").set(job_stats["running"])
+
+
+REGISTRY.on_collect(_collect_component_metrics)
 
 
 @app.middleware("http")
-async def trace_middleware(request: Request, call_next):
-    """Extract X-Cloud-Trace-Context header and store in contextvar."""
-    trace_header = request.headers.get("X-Cloud-Trace-Context", "")
-    if trace_header:
-        trace_id = trace_header.split("/")[0]
-        trace_context.set(trace_id)
-    else:
-        trace_context.set("")
+async def metrics_middleware(request: Request, call_next):
+    """Count requests and record latency per matched route (path template, not raw path)."""
+    HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    # Stages observed while handling the request are labelled with its route
+    token = request_scope.set(request.scope)
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        request_scope.reset(token)
+        HTTP_IN_FLIGHT.dec()
+        HTTP_METRICS.observe(
+            metrics_route(request.scope) or UNMATCHED,
+            request.method,
+            status,
+            time.perf_counter() - start,
+        )
+
 
-    response = await call_next(request)
+@app.middleware("http")
+async def trace_middleware(request: Request, call_next):
+    """Run the request in a server span and start its stage timing.
+
+    The span continues the caller's trace (``traceparent`` or
+    ``X-Cloud-Trace-Context``), is named after the matched route, and for
+    ``/api/*`` ends only once the response is sent (or the client went
+    away), so a streamed turn stays inside it. Stages finished before the
+    response starts are sent as a Server-Timing header; the complete
+    breakdown is logged at the end.
+    """
+    span = TRACER.start_span(
+        f"{request.method} {request.url.path}",
+        context=extract_context(request.headers),
+        kind=SpanKind.SERVER,
+        attributes={"http.request.method": request.method, "url.path": request.url.path},
+    )
+    token = otel_context.attach(trace.set_span_in_context(span))
+    timing = RequestTiming()
+    request_timing.set(timing)
+    try:
+        response = await call_next(request)
+    except BaseException as e:
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+        raise
+    finally:
+        otel_context.detach(token)
+
+    route = metrics_route(request.scope)
+    if route:
+        span.update_name(f"{request.method} {route}")
+        span.set_attribute("http.route", route)
+    span.set_attribute("http.response.status_code", response.status_code)
+    if response.status_code >= 500:
+        span.set_status(Status(StatusCode.ERROR))
+    response.headers["Server-Timing"] = timing.header()
+    if request.url.path.startswith("/api/"):
+        return _FinishingResponse(
+            response, lambda: _finish_request(request, response.status_code, timing, span)
+        )
+    span.end()
     return response
 
 
+class _FinishingResponse(Response):
+    """Sends ``response`` unchanged, then calls ``finish``, also if the client disconnected.
+
+    A hook in the body iterator would not run when sending fails before the
+    body starts.
+    """
+
+    def __init__(self, response: Response, finish: Callable[[], None]):
+        # Not Response.__init__: status and headers are the wrapped response's
+        self.response = response
+        self.status_code = response.status_code
+        self.raw_headers = response.raw_headers
+        self.background = None
+        self._finish = finish
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.response(scope, receive, send)
+        finally:
+            self._finish()
+
+
+def _finish_request(request: Request, status_code: int, timing: RequestTiming, span: trace.Span) -> None:
+    """End the server span and log the stage breakdown as one field."""
+    with trace.use_span(span, end_on_exit=True):
+        summary = timing.summary()
+        logger.info(
+            "Request timing: method=%s, path=%s, status=%d, total_ms=%.1f",
+            request.method,
+            request.url.path,
+            status_code,
+            summary["total_ms"],
+            extra={"server_timing": summary},
+        )
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
@@ -276,10 +696,55 @@ async def agents_status(request: Request):
         docling_agent_url=get_docling_agent_url(),
         self_version=request.app.state.version,
         self_started_at=request.app.state.started_at,
+        token_manager=getattr(request.app.state, "token_manager", None),
     )
     return {"agents": agents}
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text-format metrics: request/stage latency histograms, counters, gauges."""
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/api/stats")
+async def stats(request: Request):
+    """
+    Runtime statistics of in-process components.
+
+    Response JSON:
+    {"processor": {"conversation_queue": {"active_keys": 3, "waiting": 1, ...}, ...},
+     "docling": {"requests": 10, "connections_opened": 2, ...}}
+    """
+    processor: MessageProcessor = request.app.state.processor
+    result = {"processor": processor.stats()}
+    docling_client: DoclingClient | None = getattr(request.app.state, "docling_client", None)
+    if docling_client is not None:
+        result["docling"] = docling_client.stats()
+    token_manager: TokenManager | None = getattr(request.app.state, "token_manager", None)
+    if token_manager is not None:
+        result["auth"] = token_manager.stats()
+    prompt_loader: PromptLoader | None = getattr(request.app.state, "prompt_loader", None)
+    if prompt_loader is not None:
+        result["prompt"] = prompt_loader.stats()
+    document_index: DocumentIndex | None = getattr(request.app.state, "document_index", None)
+    if document_index is not None:
+        result["document_index"] = document_index.stats()
+    job_manager: JobManager | None = getattr(request.app.state, "job_manager", None)
+    if job_manager is not None:
+        result["jobs"] = job_manager.stats()
+    retry_policy: RetryPolicy | None = getattr(request.app.state, "retry_policy", None)
+    if retry_policy is not None:
+        result["retries"] = retry_policy.stats()
+    bulkheads: dict[str, Bulkhead] = getattr(request.app.state, "bulkheads", {})
+    if bulkheads:
+        result["bulkheads"] = {name: bulkhead.stats() for name, bulkhead in bulkheads.items()}
+    log_handler: TraceQueueHandler | None = getattr(request.app.state, "log_handler", None)
+    if log_handler is not None:
+        result["logging"] = log_handler.stats()
+    return result
+
+
 @app.get("/api/prompt")
 async def get_prompt(request: Request):
     """
@@ -293,92 +758,111 @@ async def get_prompt(request: Request):
     return {"prompt": prompt, "length": len(prompt)}
 
 
+async def _apply_prompt(app: FastAPI, instruction: str) -> None:
+    """Swap in an agent with a new system instruction.
+
+    Only the Runner is replaced; the processor (session cache, turn queues,
+    memory worker) is kept, so a prompt change doesn't force a
+    list_sessions call for every conversation.
+    """
+    state = app.state
+    memory_svc = state.memory_service
+    tools = None
+    if memory_svc:
+        from google.adk.tools.preload_memory_tool import PreloadMemoryTool
+        tools = [PreloadMemoryTool()]
+    new_agent = create_agent(
+        model_name=state.model_name,
+        instruction=instruction,
+        tools=tools,
+        retry_policy=getattr(state, "retry_policy", None),
+    )
+    new_runner = Runner(
+        app_name=APP_NAME,
+        agent=new_agent,
+        session_service=state.session_service,
+        **({"memory_service": memory_svc} if memory_svc else {}),
+    )
+
+    state.agent = new_agent
+    state.runner = new_runner
+    state.processor.swap_runner(new_runner)
+    logger.info("Prompt applied: length=%d", len(instruction))
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """
+    Status (and result, once finished) of a job submitted with Prefer: respond-async.
+
+    Response JSON:
+    {"job_id": "...", "kind": "document", "status": "queued|running|succeeded|failed",
+     "created_at": 1700000000.0, "updated_at": 1700000042.0,
+     "result": {...}  # succeeded: same body as the synchronous endpoint
+     "error": "...", "error_status": 502}  # failed
+    """
+    job_manager: JobManager | None = getattr(request.app.state, "job_manager", None)
+    if job_manager is None:
+        return FastJSONResponse(status_code=503, content={"error": "Async jobs not configured"})
+    record = await job_manager.get(job_id)
+    if record is None:
+        return FastJSONResponse(status_code=404, content={"error": "Job not found"})
+    return job_view(record)
+
+
 @app.post("/api/reload-prompt")
 async def reload_prompt(request: Request):
     """
     Reload system prompt from Vertex AI Prompt Management.
 
+    Only downloads the prompt if its version changed; every instance also
+    polls for new versions in the background (PROMPT_POLL_INTERVAL_SECONDS).
+
     Response JSON (success):
-    {"status": "ok", "prompt_length": 1234}
+    {"status": "ok", "prompt_length": 1234, "changed": true, "version": "..."}
 
     Response JSON (error):
     {"status": "error", "error": "message"}
     """
-    prompt_id = get_prompt_id()
-    if not prompt_id:
-        return JSONResponse(
+    prompt_loader: PromptLoader | None = getattr(request.app.state, "prompt_loader", None)
+    if prompt_loader is None:
+        return FastJSONResponse(
             status_code=400,
             content={"status": "error", "error": "AGENT_PROMPT_ID not configured"},
         )
 
-    async with reload_lock:
-        try:
-            project_id = request.app.state.project_id
-            location = request.app.state.location
-            model_name = request.app.state.model_name
-            session_service = request.app.state.session_service
-
-            logger.info("Reloading prompt from Vertex AI: prompt_id=%s", prompt_id)
-            instruction = load_prompt_from_vertex_ai(project_id, location, prompt_id)
-
-            if not instruction:
-                return JSONResponse(
-                    status_code=500,
-                    content={"status": "error", "error": "Failed to load prompt from Vertex AI"},
-                )
-
-            # Create new agent and runner
-            memory_svc = request.app.state.memory_service
-            tools = None
-            if memory_svc:
-                from google.adk.tools.preload_memory_tool import PreloadMemoryTool
-                tools = [PreloadMemoryTool()]
-            new_agent = create_agent(model_name=model_name, instruction=instruction, tools=tools)
-            new_runner = Runner(
-                app_name="master_agent",
-                agent=new_agent,
-                session_service=session_service,
-                **({"memory_service": memory_svc} if memory_svc else {}),
-            )
-
-            # Update app state atomically
-            request.app.state.agent = new_agent
-            request.app.state.runner = new_runner
-            request.app.state.processor = MessageProcessor(
-                new_runner, session_service, request.app.state.media_client, memory_svc,
-                request.app.state.gcs_client,
-            )
-
-            logger.info("Prompt reloaded successfully: length=%d", len(instruction))
-            return {"status": "ok", "prompt_length": len(instruction)}
+    try:
+        logger.info("Reloading prompt from Vertex AI: prompt_id=%s", prompt_loader.prompt_id)
+        changed = await prompt_loader.refresh(
+            on_change=lambda instruction: _apply_prompt(request.app, instruction)
+        )
+    except Exception as e:
+        error_msg = mask_token(str(e))
+        logger.error("Reload prompt error: %s", error_msg)
+        return FastJSONResponse(
+            status_code=500,
+            content={"status": "error", "error": error_msg},
+        )
 
-        except Exception as e:
-            error_msg = mask_token(str(e))
-            logger.error("Reload prompt error: %s", error_msg)
-            return JSONResponse(
-                status_code=500,
-                content={"status": "error", "error": error_msg},
-            )
+    if not prompt_loader.instruction:
+        return FastJSONResponse(
+            status_code=500,
+            content={"status": "error", "error": "Failed to load prompt from Vertex AI"},
+        )
+    return {
+        "status": "ok",
+        "prompt_length": len(prompt_loader.instruction),
+        "changed": changed,
+        "version": prompt_loader.version,
+    }
 
 
 @app.post("/api/session-info")
 async def session_info(request: Request):
     """Get session information by conversation_id."""
-    try:
-        body = await request.json()
-    except Exception:
-        return JSONResponse(
-            status_code=400,
-            content={"error": "Invalid JSON"},
-        )
-
-    try:
-        info_request = SessionInfoRequest(**body)
-    except ValueError as e:
-        return JSONResponse(
-            status_code=400,
-            content={"error": str(e)},
-        )
+    info_request = await _parse_json(request, SessionInfoRequest)
+    if isinstance(info_request, JSONResponse):
+        return info_request
 
     conversation_id = info_request.conversation_id
     session_service = request.app.state.session_service
@@ -393,7 +877,7 @@ async def session_info(request: Request):
         if memory_service:
             # VertexAi: list sessions to find by user_id
             sessions_response = await session_service.list_sessions(
-                app_name="master_agent",
+                app_name=APP_NAME,
                 user_id=user_id,
             )
             if sessions_response and sessions_response.sessions:
@@ -406,7 +890,7 @@ async def session_info(request: Request):
         else:
             # InMemory: session_id == user_id
             session = await session_service.get_session(
-                app_name="master_agent",
+                app_name=APP_NAME,
                 user_id=user_id,
                 session_id=user_id,
             )
@@ -426,29 +910,29 @@ async def session_info(request: Request):
     return response.model_dump()
 
 
-@app.post("/api/chat")
-async def chat(request: Request):
-    try:
-        body = await request.json()
-    except Exception:
-        return JSONResponse(
-            status_code=400,
-            content={"error": "Invalid JSON"},
-        )
+M = TypeVar("M", bound=BaseModel)
+
+
+@timed_stage("request_parse")
+async def _parse_json(request: Request, model: type[M]) -> M | JSONResponse:
+    """Validate a JSON request body straight from its bytes; return a 400 response on error.
 
+    The error is "Invalid JSON" for malformed bodies, else the validation message.
+    """
     try:
-        chat_request = ChatRequest(**body)
-    except ValueError as e:
-        return JSONResponse(
-            status_code=400,
-            content={"error": str(e)},
-        )
+        return decode_model(await request.body(), model)
+    except InvalidBody as e:
+        return FastJSONResponse(status_code=400, content={"error": str(e)})
 
-    conversation_id = chat_request.get_conversation_id()
-    message = chat_request.message
 
-    if not message:
-        return JSONResponse(
+async def _parse_chat_request(request: Request) -> ChatRequest | JSONResponse:
+    """Parse and validate a chat request body; return a 400 response on error."""
+    chat_request = await _parse_json(request, ChatRequest)
+    if isinstance(chat_request, JSONResponse):
+        return chat_request
+
+    if not chat_request.message:
+        return FastJSONResponse(
             status_code=400,
             content={"error": "message is required"},
         )
@@ -458,25 +942,168 @@ async def chat(request: Request):
         tg = chat_request.metadata.telegram
         logger.info(
             "Chat request with Telegram metadata: conversation_id=%s, chat_id=%d, user_id=%d, chat_type=%s",
-            conversation_id,
+            chat_request.get_conversation_id(),
             tg.chat_id,
             tg.user_id,
             tg.chat_type,
         )
 
+    return chat_request
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a single Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json_dumps(data).decode()}\n\n"
+
+
+def _chat_event_stream(processor: MessageProcessor, conversation_id: str, message: str) -> StreamingResponse:
+    """Stream agent output as SSE: ``delta`` chunks, then ``final`` (or ``error``)."""
+
+    async def event_source():
+        try:
+            async for event in processor.process_stream(conversation_id, message):
+                if event["type"] == "delta":
+                    yield _sse_event("delta", {"text": event["text"]})
+                else:
+                    yield _sse_event("final", {"response": event["response"]})
+        except BulkheadFull as e:
+            logger.warning("Chat stream shed: upstream=%s", e.name)
+            yield _sse_event(
+                "error",
+                {"error": "Service busy, please retry later", "retry_after": e.retry_after},
+            )
+        except Exception as e:
+            error_msg = mask_token(str(e))
+            logger.error("Chat stream error: conversation_id=%s, error=%s", conversation_id, error_msg)
+            yield _sse_event("error", {"error": "Agent unavailable, please try again later"})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/chat")
+async def chat(request: Request):
+    chat_request = await _parse_chat_request(request)
+    if isinstance(chat_request, JSONResponse):
+        return chat_request
+
+    conversation_id = chat_request.get_conversation_id()
+    message = chat_request.message
+
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return _chat_event_stream(request.app.state.processor, conversation_id, message)
+
     try:
         processor: MessageProcessor = request.app.state.processor
         response_text = await processor.process(conversation_id, message)
         return {"response": response_text}
+    except BulkheadFull as e:
+        return _overloaded(e)
     except Exception as e:
         error_msg = mask_token(str(e))
         logger.error("Chat error: conversation_id=%s, error=%s", conversation_id, error_msg)
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"error": "Agent unavailable, please try again later"},
         )
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: Request):
+    """
+    Process a text message and stream the reply as Server-Sent Events.
+
+    Request JSON: same as /api/chat.
+
+    Response (text/event-stream):
+    event: delta
+    data: {"text": "<partial text>"}
+
+    event: final
+    data: {"response": "<complete agent reply>"}
+
+    On failure a single ``error`` event with {"error": "..."} replaces ``final``.
+    """
+    chat_request = await _parse_chat_request(request)
+    if isinstance(chat_request, JSONResponse):
+        return chat_request
+
+    return _chat_event_stream(
+        request.app.state.processor, chat_request.get_conversation_id(), chat_request.message
+    )
+
+
+# Metadata headers for raw application/octet-stream uploads (values may be percent-encoded)
+_UPLOAD_HEADERS = {
+    "conversation_id": "X-Conversation-Id",
+    "mime_type": "X-Mime-Type",
+    "prompt": "X-Prompt",
+    "filename": "X-Filename",
+    "metadata": "X-Metadata",
+    "defer_summary": "X-Defer-Summary",
+}
+
+
+def _is_binary_upload(request: Request) -> bool:
+    """Return True for multipart/form-data or raw application/octet-stream bodies."""
+    content_type = request.headers.get("content-type", "")
+    return content_type.startswith(("multipart/form-data", "application/octet-stream"))
+
+
+@timed_stage("request_parse")
+async def _parse_upload(
+    request: Request, model: type[BaseModel], file_field: str
+) -> tuple[BaseModel, bytes] | JSONResponse:
+    """Read a binary upload and validate its metadata; return a 400 response on error.
+
+    multipart/form-data: the payload is the ``file_field`` part, metadata are
+    form fields (the part's content type and filename are used as defaults).
+    application/octet-stream: the payload is the raw body, metadata come from
+    the ``X-*`` headers in ``_UPLOAD_HEADERS``.
+    ``metadata`` is a JSON string in both cases.
+    """
+    fields: dict = {}
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        try:
+            form = await request.form()
+        except Exception:
+            return FastJSONResponse(status_code=400, content={"error": "Invalid multipart body"})
+        upload = form.get(file_field)
+        if upload is None or isinstance(upload, str):
+            return FastJSONResponse(status_code=400, content={"error": f"{file_field} file is required"})
+        data = await upload.read()
+        fields = {key: value for key, value in form.items() if isinstance(value, str)}
+        if upload.content_type and upload.content_type != "application/octet-stream":
+            fields.setdefault("mime_type", upload.content_type)
+        if upload.filename:
+            fields.setdefault("filename", upload.filename)
+    else:
+        data = await request.body()
+        for field, header in _UPLOAD_HEADERS.items():
+            value = request.headers.get(header)
+            if value is not None:
+                fields[field] = unquote(value)
+
+    if "metadata" in fields:
+        try:
+            fields["metadata"] = json.loads(fields["metadata"])
+        except ValueError:
+            return FastJSONResponse(status_code=400, content={"error": "Invalid metadata JSON"})
+
+    try:
+        parsed = model(**fields)
+    except ValueError as e:
+        return FastJSONResponse(status_code=400, content={"error": str(e)})
+
+    if not data:
+        return FastJSONResponse(status_code=400, content={"error": f"{file_field} is required"})
+
+    return parsed, data
+
+
 @app.post("/api/voice")
 async def voice(request: Request):
     """
@@ -490,42 +1117,50 @@ async def voice(request: Request):
         "metadata": {"telegram": {"chat_id": 123, "user_id": 456, "chat_type": "private"}}
     }
 
+    Binary variants (no base64):
+    - multipart/form-data: "audio" file part + conversation_id, mime_type, metadata fields
+    - application/octet-stream: raw audio body + X-Conversation-Id, X-Mime-Type, X-Metadata headers
+
     Response JSON:
     {
         "response": "<agent_reply>",
         "transcription": "<transcribed_text>"
     }
     """
-    try:
-        body = await request.json()
-    except Exception:
-        return JSONResponse(status_code=400, content={"error": "Invalid JSON"})
+    if _is_binary_upload(request):
+        parsed = await _parse_upload(request, VoiceUploadRequest, "audio")
+        if isinstance(parsed, JSONResponse):
+            return parsed
+        voice_request, audio_bytes = parsed
+        conversation_id = voice_request.conversation_id
+        audio = MediaPayload(audio_bytes, voice_request.mime_type)
+    else:
+        voice_request = await _parse_json(request, VoiceRequest)
+        if isinstance(voice_request, JSONResponse):
+            return voice_request
 
-    try:
-        voice_request = VoiceRequest(**body)
-    except ValueError as e:
-        return JSONResponse(
-            status_code=400,
-            content={"error": str(e)},
-        )
+        conversation_id = voice_request.get_conversation_id()
 
-    conversation_id = voice_request.get_conversation_id()
-    audio_base64 = voice_request.audio_base64
-    mime_type = voice_request.mime_type
+        if not voice_request.audio_base64:
+            return FastJSONResponse(
+                status_code=400,
+                content={"error": "audio_base64 is required"},
+            )
 
-    if not audio_base64:
-        return JSONResponse(
-            status_code=400,
-            content={"error": "audio_base64 is required"},
-        )
+        try:
+            audio = MediaPayload.from_base64(voice_request.audio_base64, voice_request.mime_type)
+        except ValueError:
+            return FastJSONResponse(
+                status_code=400,
+                content={"error": "Invalid base64 encoding"},
+            )
 
     # Log request (without audio content)
-    audio_size = len(audio_base64) * 3 // 4
     logger.info(
         "Voice API request: conversation_id=%s, audio_size=%d, mime_type=%s",
         conversation_id,
-        audio_size,
-        mime_type,
+        audio.size,
+        audio.mime_type,
     )
 
     # Log telegram metadata if present
@@ -541,12 +1176,14 @@ async def voice(request: Request):
 
     try:
         processor: MessageProcessor = request.app.state.processor
-        result = await processor.process_voice(conversation_id, audio_base64, mime_type)
+        result = await processor.process_voice(conversation_id, audio)
         return result
+    except BulkheadFull as e:
+        return _overloaded(e)
     except Exception as e:
         error_msg = mask_token(str(e))
         logger.error("Voice API error: conversation_id=%s, error=%s", conversation_id, error_msg)
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"error": "Agent unavailable, please try again later"},
         )
@@ -566,60 +1203,68 @@ async def image(request: Request):
         "metadata": {"telegram": {"chat_id": 123, "user_id": 456, "chat_type": "private"}}
     }
 
+    Binary variants (no base64):
+    - multipart/form-data: "image" file part + conversation_id, mime_type, prompt, metadata fields
+    - application/octet-stream: raw image body + X-Conversation-Id, X-Mime-Type, X-Prompt,
+      X-Metadata headers
+
+    With "Prefer: respond-async" the request is queued as a job (202, see
+    GET /api/jobs/{job_id}), useful for slow image edits.
+
     Response JSON:
     {
         "response": "<agent_reply>",
         "description": "<image_description>"
     }
     """
-    try:
-        body = await request.json()
-    except Exception:
-        return JSONResponse(status_code=400, content={"error": "Invalid JSON"})
+    binary = _is_binary_upload(request)
+    if binary:
+        parsed = await _parse_upload(request, ImageUploadRequest, "image")
+        if isinstance(parsed, JSONResponse):
+            return parsed
+        image_request, image_bytes = parsed
+        conversation_id = image_request.conversation_id
+    else:
+        image_request = await _parse_json(request, ImageRequest)
+        if isinstance(image_request, JSONResponse):
+            return image_request
 
-    try:
-        image_request = ImageRequest(**body)
-    except ValueError as e:
-        return JSONResponse(
-            status_code=400,
-            content={"error": str(e)},
-        )
+        conversation_id = image_request.get_conversation_id()
+
+        if not image_request.image_base64:
+            return FastJSONResponse(
+                status_code=400,
+                content={"error": "image_base64 is required"},
+            )
 
-    conversation_id = image_request.get_conversation_id()
-    image_base64 = image_request.image_base64
     mime_type = image_request.mime_type
     prompt = image_request.prompt
 
-    if not image_base64:
-        return JSONResponse(
-            status_code=400,
-            content={"error": "image_base64 is required"},
-        )
-
     # Validate mime type
     supported_mime_types = {"image/jpeg", "image/png", "image/webp", "image/gif"}
     if mime_type not in supported_mime_types:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=400,
             content={"error": f"Unsupported mime_type. Supported: {', '.join(supported_mime_types)}"},
         )
 
-    # Validate base64 encoding
-    import base64 as b64
-    try:
-        b64.b64decode(image_base64, validate=True)
-    except Exception:
-        return JSONResponse(
-            status_code=400,
-            content={"error": "Invalid base64 encoding"},
-        )
+    # Decode once; the payload is shared by GCS upload and the model call
+    if binary:
+        image = MediaPayload(image_bytes, mime_type)
+    else:
+        try:
+            image = MediaPayload.from_base64(image_request.image_base64, mime_type)
+        except ValueError:
+            return FastJSONResponse(
+                status_code=400,
+                content={"error": "Invalid base64 encoding"},
+            )
 
     # Log request (without image content)
-    image_size = len(image_base64) * 3 // 4
     logger.info(
         "Image API request: conversation_id=%s, image_size=%d, mime_type=%s, has_prompt=%s",
         conversation_id,
-        image_size,
+        image.size,
         mime_type,
         prompt is not None,
     )
@@ -635,14 +1280,26 @@ async def image(request: Request):
             tg.chat_type,
         )
 
+    processor: MessageProcessor = request.app.state.processor
+    if _wants_async(request):
+        return await _submit_job(
+            request, "image", lambda: _process_image(processor, conversation_id, image, prompt)
+        )
+    return await _process_image(processor, conversation_id, image, prompt)
+
+
+async def _process_image(
+    processor: MessageProcessor, conversation_id: str, image: MediaPayload, prompt: str | None
+) -> dict | JSONResponse:
+    """Run the image pipeline; errors become a JSONResponse."""
     try:
-        processor: MessageProcessor = request.app.state.processor
-        result = await processor.process_image(conversation_id, image_base64, mime_type, prompt)
-        return result
+        return await processor.process_image(conversation_id, image, prompt)
+    except BulkheadFull as e:
+        return _overloaded(e)
     except Exception as e:
         error_msg = mask_token(str(e))
         logger.error("Image API error: conversation_id=%s, error=%s", conversation_id, error_msg)
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"error": "Agent unavailable, please try again later"},
         )
@@ -664,6 +1321,125 @@ _SUPPORTED_DOCUMENT_MIME_TYPES = {
 }
 
 
+def _wants_async(request: Request) -> bool:
+    """True if the client asked for a job instead of a held-open response (RFC 7240)."""
+    return "respond-async" in request.headers.get("Prefer", "").lower()
+
+
+def _callback_url(request: Request) -> str | None | JSONResponse:
+    """Return the X-Callback-Url header, or a 400 response if it may not be called.
+
+    Finished jobs (summaries, descriptions) are POSTed there, so only https
+    URLs whose host is in JOB_CALLBACK_ALLOWED_HOSTS are accepted.
+    """
+    url = request.headers.get("X-Callback-Url")
+    if url is None:
+        return None
+    allowed: frozenset[str] = getattr(request.app.state, "callback_allowed_hosts", frozenset())
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        parts = None
+    if parts is None or parts.scheme != "https" or parts.hostname not in allowed:
+        return FastJSONResponse(
+            status_code=400,
+            content={"error": "X-Callback-Url must be an https URL on an allowed host"},
+        )
+    return url
+
+
+async def _submit_job(
+    request: Request, kind: str, run: Callable[[], Awaitable[dict | JSONResponse]]
+) -> JSONResponse:
+    """Queue ``run`` as a background job and answer 202 with its status URL.
+
+    An optional X-Callback-Url header receives the finished job as a JSON POST.
+    """
+    callback_url = _callback_url(request)
+    if isinstance(callback_url, JSONResponse):
+        return callback_url
+    job_manager: JobManager | None = getattr(request.app.state, "job_manager", None)
+    if job_manager is None:
+        return FastJSONResponse(status_code=503, content={"error": "Async jobs not configured"})
+
+    async def work() -> dict:
+        result = await run()
+        if isinstance(result, JSONResponse):
+            raise JobError(json.loads(result.body).get("error", "Job failed"), result.status_code)
+        return result
+
+    try:
+        record = await job_manager.submit(kind, work, callback_url)
+    except JobQueueFull:
+        return FastJSONResponse(
+            status_code=503,
+            content={"error": "Too many pending jobs, please retry later"},
+            headers={"Retry-After": "30"},
+        )
+    status_url = f"/api/jobs/{record['id']}"
+    return FastJSONResponse(
+        status_code=202,
+        content={**job_view(record), "status_url": status_url},
+        headers={"Location": status_url},
+    )
+
+
+async def _index_document(index: DocumentIndex, key: str, response: DocumentResponse) -> None:
+    """Record a processed document in the index (failures are logged, not raised)."""
+    try:
+        # Summary job handles are per-request, not part of the document's record
+        await index.put(key, response.model_dump(exclude={"summary_job_id", "summary_url"}))
+    except Exception as e:
+        logger.warning("Document index write failed: key=%s, error=%s", key, e)
+
+
+async def _attach_summary(
+    app: FastAPI,
+    response: DocumentResponse,
+    defer: bool,
+    index_key: str | None,
+    callback_url: str | None,
+) -> bool:
+    """Fill ``response.summary``, or with ``defer`` queue it as a job and attach its handle.
+
+    A deferred summary is written back to the document index when its job
+    finishes. If jobs are unavailable or the queue is full, the summary is
+    generated inline as without ``defer``.
+
+    Returns:
+        True if the summary was deferred.
+    """
+    media_client: MediaClient = app.state.media_client
+    document_index: DocumentIndex | None = getattr(app.state, "document_index", None)
+    job_manager: JobManager | None = getattr(app.state, "job_manager", None)
+
+    if defer and job_manager is not None:
+        content = response.content
+
+        async def work() -> dict:
+            summary = await media_client.summarize_document(content)
+            if summary is None:
+                raise JobError("Summary generation failed", 502)
+            if document_index is not None and index_key is not None:
+                await _index_document(
+                    document_index, index_key, response.model_copy(update={"summary": summary})
+                )
+            return {"summary": summary}
+
+        try:
+            record = await job_manager.submit("document_summary", work, callback_url)
+        except JobQueueFull:
+            logger.warning("Job queue full, summarizing inline: gcs_uri=%s", response.gcs_uri)
+        else:
+            response.summary_job_id = record["id"]
+            response.summary_url = f"/api/jobs/{record['id']}"
+            return True
+
+    # Failure leaves the summary None
+    response.summary = await media_client.summarize_document(response.content)
+    return False
+
+
 @app.post("/api/document")
 async def document(request: Request):
     """
@@ -678,25 +1454,43 @@ async def document(request: Request):
         "metadata": {"telegram": {"chat_id": 123, "user_id": 456, "chat_type": "private"}}
     }
 
+    Binary variants (no base64):
+    - multipart/form-data: "document" file part + conversation_id, mime_type, filename,
+      metadata fields (part content type and filename are used as defaults)
+    - application/octet-stream: raw document body + X-Conversation-Id, X-Mime-Type,
+      X-Filename, X-Metadata headers
+
+    With "Prefer: respond-async" the request is queued as a job and answered
+    with 202 {"job_id", "status_url", ...}; see GET /api/jobs/{job_id}. An
+    optional X-Callback-Url header receives the finished job.
+
+    With "defer_summary": true (form field / X-Defer-Summary header for
+    binary uploads) the response does not wait for the summary: "summary" is
+    null and "summary_url" points to a "document_summary" job whose result
+    is {"summary": "..."} (also POSTed to X-Callback-Url, if given).
+
     Response JSON:
     {
         "content": "<extracted text in markdown>",
         "metadata": {"format": "markdown", "pages": 5, ...},
-        "gcs_uri": "gs://docling-documents/input/..."
+        "gcs_uri": "gs://docling-documents/input/...",
+        "summary": "...",
+        "summary_job_id": null, "summary_url": null  # set with defer_summary
     }
     """
-    try:
-        body = await request.json()
-    except Exception:
-        return JSONResponse(status_code=400, content={"error": "Invalid JSON"})
-
-    try:
-        doc_request = DocumentRequest(**body)
-    except ValueError as e:
-        return JSONResponse(status_code=400, content={"error": str(e)})
+    if _is_binary_upload(request):
+        parsed = await _parse_upload(request, DocumentUploadRequest, "document")
+        if isinstance(parsed, JSONResponse):
+            return parsed
+        doc_request, document_bytes = parsed
+    else:
+        doc_request = await _parse_json(request, DocumentRequest)
+        if isinstance(doc_request, JSONResponse):
+            return doc_request
+        document_bytes = None
 
     if doc_request.mime_type not in _SUPPORTED_DOCUMENT_MIME_TYPES:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=400,
             content={
                 "error": f"Unsupported mime_type '{doc_request.mime_type}'. "
@@ -704,22 +1498,44 @@ async def document(request: Request):
             },
         )
 
-    if not doc_request.document_base64:
-        return JSONResponse(status_code=400, content={"error": "document_base64 is required"})
+    if document_bytes is None:
+        if not doc_request.document_base64:
+            return FastJSONResponse(status_code=400, content={"error": "document_base64 is required"})
 
-    import base64 as b64
-    try:
-        document_bytes = b64.b64decode(doc_request.document_base64, validate=True)
-    except Exception:
-        return JSONResponse(status_code=400, content={"error": "Invalid base64 encoding"})
+        try:
+            document = MediaPayload.from_base64(doc_request.document_base64, doc_request.mime_type)
+        except ValueError:
+            return FastJSONResponse(status_code=400, content={"error": "Invalid base64 encoding"})
+    else:
+        document = MediaPayload(document_bytes, doc_request.mime_type)
 
     docling_client: DoclingClient | None = request.app.state.docling_client
     if docling_client is None:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=503,
             content={"error": "Document processing service not configured (DOCLING_AGENT_URL missing)"},
         )
 
+    callback_url = _callback_url(request)
+    if isinstance(callback_url, JSONResponse):
+        return callback_url
+    if _wants_async(request):
+        return await _submit_job(
+            request,
+            "document",
+            lambda: _process_document(request.app, doc_request, document, callback_url),
+        )
+    return await _process_document(request.app, doc_request, document, callback_url)
+
+
+async def _process_document(
+    app: FastAPI,
+    doc_request: DocumentUploadRequest | DocumentRequest,
+    document: MediaPayload,
+    callback_url: str | None = None,
+) -> dict | JSONResponse:
+    """Upload, extract and summarize a document; errors become a JSONResponse."""
+    docling_client: DoclingClient = app.state.docling_client
     conversation_id = doc_request.conversation_id
     filename = doc_request.filename
 
@@ -727,14 +1543,44 @@ async def document(request: Request):
         "Document API request: conversation_id=%s, filename=%s, mime_type=%s, size=%d",
         conversation_id,
         filename,
-        doc_request.mime_type,
-        len(document_bytes),
+        document.mime_type,
+        document.size,
     )
 
+    # Step 0: Skip upload + extraction if these exact bytes were already processed
+    document_index: DocumentIndex | None = getattr(app.state, "document_index", None)
+    index_key = None
+    if document_index is not None:
+        try:
+            # Hashing a large document is CPU-bound; keep it off the event loop
+            content_hash = await asyncio.to_thread(lambda: document.content_hash)
+            index_key = document_key(content_hash, document.mime_type)
+            cached = await document_index.get(index_key)
+        except Exception as e:
+            logger.warning("Document index lookup failed: filename=%s, error=%s", filename, e)
+            cached = None
+        if cached is not None:
+            logger.info(
+                "Document index hit: conversation_id=%s, filename=%s, gcs_uri=%s",
+                conversation_id,
+                filename,
+                cached.get("gcs_uri"),
+            )
+            cached_response = DocumentResponse(**cached)
+            if cached_response.summary is None:
+                deferred = await _attach_summary(
+                    app, cached_response, doc_request.defer_summary, index_key, callback_url
+                )
+                if not deferred and cached_response.summary is not None:
+                    await _index_document(document_index, index_key, cached_response)
+            return cached_response.model_dump()
+
     # Step 1: Upload to GCS
-    docling_gcs_client: GCSStorageClient = request.app.state.docling_gcs_client
+    docling_gcs_client: GCSStorageClient = app.state.docling_gcs_client
     try:
-        gcs_uri = await docling_gcs_client.upload_document(document_bytes, conversation_id, filename)
+        gcs_uri = await docling_gcs_client.upload_document(document.data, conversation_id, filename)
+    except BulkheadFull as e:
+        return _overloaded(e)
     except Exception as e:
         error_msg = mask_token(str(e))
         logger.error(
@@ -743,16 +1589,18 @@ async def document(request: Request):
             filename,
             error_msg,
         )
-        return JSONResponse(status_code=500, content={"error": "Failed to upload document to storage"})
+        return FastJSONResponse(status_code=500, content={"error": "Failed to upload document to storage"})
 
     # Step 2: Call docling agent
     try:
-        result = await docling_client.process_document(gcs_uri, doc_request.mime_type, filename)
+        result = await docling_client.process_document(gcs_uri, document.mime_type, filename)
+    except BulkheadFull as e:
+        return _overloaded(e)
     except TimeoutError:
         logger.error(
             "Docling agent timeout: conversation_id=%s, filename=%s", conversation_id, filename
         )
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=504, content={"error": "Document processing timed out"}
         )
     except RuntimeError as e:
@@ -763,7 +1611,7 @@ async def document(request: Request):
             filename,
             error_msg,
         )
-        return JSONResponse(status_code=502, content={"error": f"Document processing failed: {error_msg}"})
+        return FastJSONResponse(status_code=502, content={"error": f"Document processing failed: {error_msg}"})
     except Exception as e:
         error_msg = mask_token(str(e))
         logger.error(
@@ -772,24 +1620,30 @@ async def document(request: Request):
             filename,
             error_msg,
         )
-        return JSONResponse(status_code=500, content={"error": "Document processing unavailable"})
+        return FastJSONResponse(status_code=500, content={"error": "Document processing unavailable"})
 
     content = result.get("content", "")
     raw_metadata = result.get("metadata")
     doc_metadata = DocumentMetadata(**raw_metadata) if raw_metadata else None
     result_gcs_uri = result.get("result_gcs_uri")
 
-    # Generate AI summary (non-blocking — failure returns None)
-    media_client: MediaClient = request.app.state.media_client
-    summary = await media_client.summarize_document(content)
-
-    return DocumentResponse(
+    response = DocumentResponse(
         content=content,
         metadata=doc_metadata,
         gcs_uri=gcs_uri,
         result_gcs_uri=result_gcs_uri,
-        summary=summary,
-    ).model_dump()
+    )
+    indexed = document_index is not None and index_key is not None
+    if indexed and doc_request.defer_summary:
+        # Written before the summary job exists, so its write-back can't be overwritten
+        await _index_document(document_index, index_key, response)
+
+    deferred = await _attach_summary(
+        app, response, doc_request.defer_summary, index_key, callback_url
+    )
+    if indexed and not deferred:
+        await _index_document(document_index, index_key, response)
+    return response.model_dump()
 
 
 if __name__ == "__main__":
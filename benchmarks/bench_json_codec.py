@@ -0,0 +1,80 @@
+"""CPU cost per request of JSON decoding/encoding for a 10 MB base64 image body.
+
+Compares the previous path (``request.json()`` -> ``ImageRequest(**body)`` ->
+``b64decode(validate=True)``, responses through Starlette's ``JSONResponse``)
+with the current one (``decode_model`` on the raw bytes -> strict
+``a2b_base64``, responses through ``FastJSONResponse``).
+
+Run from the repository root:
+    python benchmarks/bench_json_codec.py [--size-mb 10] [--rounds 20]
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from agent.fast_json import FastJSONResponse, decode_model, orjson  # noqa: E402
+from agent.media_payload import MediaPayload  # noqa: E402
+from agent.models import ImageRequest  # noqa: E402
+
+
+def _old_decode(body: bytes) -> MediaPayload:
+    request = ImageRequest(**json.loads(body))
+    return MediaPayload(base64.b64decode(request.image_base64, validate=True), request.mime_type)
+
+
+def _new_decode(body: bytes) -> MediaPayload:
+    request = decode_model(body, ImageRequest)
+    return MediaPayload.from_base64(request.image_base64, request.mime_type)
+
+
+def _cpu_ms(old, new, arg, rounds: int) -> tuple[float, float]:
+    """Median CPU milliseconds per call; the two paths alternate so drift hits both."""
+    samples: tuple[list[float], list[float]] = ([], [])
+    for _ in range(rounds + 1):
+        for fn, times in ((old, samples[0]), (new, samples[1])):
+            start = time.process_time()
+            fn(arg)
+            times.append((time.process_time() - start) * 1000)
+    return tuple(statistics.median(times[1:]) for times in samples)  # first call is warm-up
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=10.0, help="size of the base64 field")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    raw = os.urandom(int(args.size_mb * 1024 * 1024 * 3 / 4))
+    encoded = base64.b64encode(raw).decode("ascii")
+    body = json.dumps(
+        {"conversation_id": "tg_1", "image_base64": encoded, "mime_type": "image/png", "prompt": "crop"}
+    ).encode()
+    response = {"response": "Done", "description": "A cat", "processed_image_base64": encoded}
+
+    assert _old_decode(body).data == _new_decode(body).data == raw
+    cases = [
+        ("decode request", _old_decode, _new_decode, body),
+        ("encode response", lambda c: JSONResponse(c).body, lambda c: FastJSONResponse(c).body, response),
+    ]
+    print(f"base64 field: {len(encoded) / 1e6:.1f} MB, rounds: {args.rounds}, orjson: {orjson is not None}")
+    print(f"{'step':<16} {'before ms':>10} {'after ms':>10} {'saved':>8}")
+    totals = [0.0, 0.0]
+    for name, old, new, arg in cases:
+        before, after = _cpu_ms(old, new, arg, args.rounds)
+        totals[0] += before
+        totals[1] += after
+        print(f"{name:<16} {before:>10.1f} {after:>10.1f} {1 - after / before:>8.0%}")
+    print(f"{'total':<16} {totals[0]:>10.1f} {totals[1]:>10.1f} {1 - totals[1] / totals[0]:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
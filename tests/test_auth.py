@@ -0,0 +1,128 @@
+"""Tests for TokenManager."""
+
+import asyncio
+import base64
+import json
+import threading
+
+import pytest
+
+from agent.auth import TokenManager, _jwt_expiry, is_localhost
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeFetcher:
+    """Blocking token fetcher that returns numbered tokens valid for ``ttl`` seconds."""
+
+    def __init__(self, clock, ttl=3600.0):
+        self.clock = clock
+        self.ttl = ttl
+        self.calls = []
+        self.threads = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, key):
+        self.threads.append(threading.current_thread())
+        self.release.wait(timeout=5)
+        self.calls.append(key)
+        return f"token-{len(self.calls)}", self.clock() + self.ttl
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.mark.asyncio
+async def test_access_token_is_cached_per_scope_set(clock):
+    fetcher = FakeFetcher(clock)
+    tokens = TokenManager(fetch_access_token=fetcher, clock=clock)
+
+    assert await tokens.access_token(["scope-a"]) == "token-1"
+    assert await tokens.access_token(["scope-a"]) == "token-1"
+    assert await tokens.access_token(["scope-b"]) == "token-2"
+
+    assert fetcher.calls == [("scope-a",), ("scope-b",)]
+    assert tokens.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_runs_off_the_event_loop(clock):
+    fetcher = FakeFetcher(clock)
+    tokens = TokenManager(fetch_id_token=fetcher, clock=clock)
+
+    await tokens.id_token("https://svc.run.app")
+
+    assert fetcher.threads[0] is not threading.main_thread()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(clock):
+    fetcher = FakeFetcher(clock)
+    fetcher.release.clear()
+    tokens = TokenManager(fetch_id_token=fetcher, clock=clock)
+
+    waiters = [asyncio.create_task(tokens.id_token("https://svc.run.app")) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    fetcher.release.set()
+
+    assert await asyncio.gather(*waiters) == ["token-1"] * 5
+    assert len(fetcher.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_near_expiry_refreshes_in_background(clock):
+    """Inside the refresh margin the cached token is returned while a refresh runs."""
+    fetcher = FakeFetcher(clock, ttl=600)
+    tokens = TokenManager(refresh_margin=300, fetch_id_token=fetcher, clock=clock)
+    await tokens.id_token("aud")
+
+    clock.now += 400  # 200s left: inside the margin, still valid
+    assert await tokens.id_token("aud") == "token-1"
+    await asyncio.sleep(0.05)
+
+    assert await tokens.id_token("aud") == "token-2"
+    assert tokens.stats()["background_refreshes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_refreshed_inline(clock):
+    fetcher = FakeFetcher(clock, ttl=600)
+    tokens = TokenManager(fetch_id_token=fetcher, clock=clock)
+    await tokens.id_token("aud")
+
+    clock.now += 590  # below min_validity
+    assert await tokens.id_token("aud") == "token-2"
+
+
+@pytest.mark.asyncio
+async def test_id_token_header_failure_and_localhost(clock):
+    def failing(audience):
+        raise RuntimeError("no metadata server")
+
+    tokens = TokenManager(fetch_id_token=failing, clock=clock)
+
+    assert await tokens.id_token_header("https://svc.run.app") == {}
+    assert await tokens.id_token_header("http://localhost:8081") == {}
+    assert tokens.stats()["failures"] == 1
+
+
+def test_jwt_expiry():
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": 1700000000}).encode()).rstrip(b"=")
+    token = f"header.{payload.decode()}.signature"
+
+    assert _jwt_expiry(token) == 1700000000.0
+    assert _jwt_expiry("not-a-jwt") is None
+
+
+def test_is_localhost():
+    assert is_localhost("http://127.0.0.1:8081")
+    assert not is_localhost("https://docling-agent-xxxx-ew.a.run.app")
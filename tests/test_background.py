@@ -0,0 +1,52 @@
+"""Tests for BackgroundTaskSet."""
+
+import asyncio
+
+import pytest
+
+from agent.background import BackgroundTaskSet
+
+
+@pytest.mark.asyncio
+async def test_spawn_tracks_until_done():
+    tasks = BackgroundTaskSet()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+
+    tasks.spawn(work(), name="work")
+    await asyncio.sleep(0)
+    assert len(tasks) == 1
+
+    release.set()
+    await tasks.drain()
+
+    assert len(tasks) == 0
+    assert tasks.stats() == {"in_flight": 0, "started": 1, "failed": 0}
+
+
+@pytest.mark.asyncio
+async def test_failure_is_logged_and_counted(caplog):
+    tasks = BackgroundTaskSet()
+
+    async def boom():
+        raise RuntimeError("upload failed")
+
+    tasks.spawn(boom(), name="gcs-upload")
+    await tasks.drain()
+    await asyncio.sleep(0)
+
+    assert tasks.failed == 1
+    assert "gcs-upload" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_drain_cancels_after_timeout():
+    tasks = BackgroundTaskSet()
+    task = tasks.spawn(asyncio.sleep(10), name="slow")
+
+    await tasks.drain(timeout=0.01)
+
+    assert task.cancelled()
+    assert len(tasks) == 0
@@ -0,0 +1,138 @@
+"""Tests for per-upstream bulkheads and load shedding in the API."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from httpx import ASGITransport, AsyncClient
+
+from agent.bulkhead import Bulkhead, BulkheadFull, admit
+
+
+@pytest.mark.asyncio
+async def test_limits_concurrency_and_queues():
+    bulkhead = Bulkhead("model", max_concurrent=2, max_queue=4, queue_timeout=1.0)
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with bulkhead.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+    stats = bulkhead.stats()
+    assert stats["admitted"] == 6
+    assert stats["rejected"] == 0
+    assert stats["peak_waiting"] == 4
+    assert stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_at_once_when_queue_full():
+    bulkhead = Bulkhead("image_model", max_concurrent=1, max_queue=1, queue_timeout=5.0)
+    release = asyncio.Event()
+
+    async def hold():
+        async with bulkhead.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(BulkheadFull) as excinfo:
+        async with bulkhead.slot():
+            pass
+    assert excinfo.value.name == "image_model"
+    assert excinfo.value.retry_after == 5
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert bulkhead.stats()["rejected"] == 1
+    assert bulkhead.stats()["admitted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects():
+    bulkhead = Bulkhead("docling", max_concurrent=1, max_queue=5, queue_timeout=0.01)
+    release = asyncio.Event()
+
+    async def hold():
+        async with bulkhead.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(BulkheadFull):
+        async with bulkhead.slot():
+            pass
+
+    release.set()
+    await holder
+    stats = bulkhead.stats()
+    assert stats["timed_out"] == 1
+    assert stats["waiting"] == 0
+    # The slot is usable again once the holder left
+    async with bulkhead.slot():
+        assert bulkhead.stats()["utilization"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_admit_without_bulkhead_is_noop():
+    async with admit(None):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_chat_sheds_with_503_and_retry_after():
+    from app import app
+    from agent.processor import MessageProcessor
+
+    processor = MagicMock(spec=MessageProcessor)
+    processor.process = AsyncMock(side_effect=BulkheadFull("model", 10))
+    app.state.processor = processor
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/chat", json={"session_id": "tg_1", "message": "hi"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "10"
+    assert response.json()["retry_after"] == 10
+
+
+@pytest.mark.asyncio
+async def test_docling_bulkhead_full_is_503_not_502():
+    import base64
+
+    from app import app
+
+    docling_client = MagicMock()
+    docling_client.process_document = AsyncMock(side_effect=BulkheadFull("docling", 10))
+    gcs = MagicMock()
+    gcs.upload_document = AsyncMock(return_value="gs://docling-documents/input/x.pdf")
+    app.state.docling_client = docling_client
+    app.state.docling_gcs_client = gcs
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_1",
+                "document_base64": base64.b64encode(b"%PDF-1.4").decode(),
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+            },
+        )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "10"
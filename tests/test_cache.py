@@ -0,0 +1,163 @@
+"""Tests for LRUCache and the MessageProcessor session-ID cache."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from agent.cache import LRUCache
+from agent.processor import MessageProcessor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# --- LRUCache ---
+
+
+def test_get_set_and_counters():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_evicts_least_recently_used():
+    """Reading an entry protects it from eviction."""
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+
+def test_idle_ttl_expires_and_access_refreshes():
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    clock.now = 8
+    assert cache.get("a") == 1  # refreshes a's idle timer
+    clock.now = 15
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.expirations == 1
+
+
+def test_invalidate():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+
+    assert cache.invalidate("a") is True
+    assert cache.invalidate("a") is False
+    assert cache.get("a") is None
+
+
+def test_stats():
+    cache = LRUCache(max_size=5)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("x")
+
+    stats = cache.stats()
+    assert stats["size"] == 1
+    assert stats["max_size"] == 5
+    assert stats["hit_rate"] == 0.5
+
+
+def test_max_size_must_be_positive():
+    with pytest.raises(ValueError):
+        LRUCache(max_size=0)
+
+
+# --- MessageProcessor session cache (Vertex path) ---
+
+
+def _make_final_event(text):
+    event = MagicMock()
+    event.is_final_response.return_value = True
+    event.content = MagicMock()
+    part = MagicMock()
+    part.text = text
+    event.content.parts = [part]
+    return event
+
+
+async def _async_iter(items):
+    for item in items:
+        yield item
+
+
+@pytest.fixture
+def vertex_processor():
+    runner = MagicMock()
+    runner.run_async = MagicMock(side_effect=lambda **kw: _async_iter([_make_final_event("ok")]))
+    session = MagicMock()
+    session.id = "vertex-session-1"
+    session_service = MagicMock()
+    session_service.get_session = AsyncMock(return_value=session)
+    sessions_response = MagicMock()
+    sessions_response.sessions = [session]
+    session_service.list_sessions = AsyncMock(return_value=sessions_response)
+    memory_service = MagicMock()
+    memory_service.add_session_to_memory = AsyncMock()
+    return MessageProcessor(
+        runner,
+        session_service,
+        memory_service=memory_service,
+        session_cache=LRUCache(max_size=1),
+    )
+
+
+@pytest.mark.asyncio
+async def test_session_lookup_is_cached(vertex_processor):
+    await vertex_processor.process("conv_1", "hi")
+    await vertex_processor.process("conv_1", "again")
+
+    vertex_processor.session_service.list_sessions.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_evicted_session_falls_back_to_list_sessions(vertex_processor):
+    await vertex_processor.process("conv_1", "hi")
+    await vertex_processor.process("conv_2", "hi")  # evicts conv_1 (max_size=1)
+    await vertex_processor.process("conv_1", "hi")
+
+    assert vertex_processor.session_service.list_sessions.call_count == 3
+    assert vertex_processor.stats()["session_cache"]["evictions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_session(vertex_processor):
+    await vertex_processor.process("conv_1", "hi")
+
+    assert vertex_processor.invalidate_session("conv_1") is True
+    await vertex_processor.process("conv_1", "hi")
+
+    assert vertex_processor.session_service.list_sessions.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_session_error_invalidates_cache(vertex_processor):
+    """Runner ValueError (session not found) drops the cached ID."""
+    await vertex_processor.process("conv_1", "hi")
+    vertex_processor.runner.run_async = MagicMock(side_effect=ValueError("Session not found"))
+
+    with pytest.raises(RuntimeError):
+        await vertex_processor.process("conv_1", "hi")
+
+    assert vertex_processor.invalidate_session("conv_1") is False
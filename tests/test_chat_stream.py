@@ -0,0 +1,194 @@
+"""Tests for SSE streaming chat (MessageProcessor.process_stream and /api/chat/stream)."""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from httpx import ASGITransport, AsyncClient
+
+from agent.processor import MessageProcessor
+
+
+def _make_event(text, partial=False, final=False):
+    event = MagicMock()
+    event.partial = partial
+    event.is_final_response.return_value = final
+    event.content = MagicMock()
+    part = MagicMock()
+    part.text = text
+    event.content.parts = [part]
+    return event
+
+
+async def _async_iter(items):
+    for item in items:
+        yield item
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    frames = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        frames.append((lines["event"], json.loads(lines["data"])))
+    return frames
+
+
+@pytest.fixture
+def mock_session_service():
+    service = MagicMock()
+    service.get_session = AsyncMock(return_value=MagicMock())
+    service.create_session = AsyncMock()
+    return service
+
+
+@pytest.fixture
+def streaming_processor(mock_session_service):
+    runner = MagicMock()
+    runner.run_async = MagicMock(
+        return_value=_async_iter(
+            [
+                _make_event("Hel", partial=True),
+                _make_event("lo!", partial=True),
+                _make_event("Hello!", final=True),
+            ]
+        )
+    )
+    return MessageProcessor(runner, mock_session_service)
+
+
+# --- MessageProcessor.process_stream ---
+
+
+@pytest.mark.asyncio
+async def test_process_stream_yields_deltas_then_final(streaming_processor):
+    """Partial events are forwarded as deltas, closing event as final."""
+    events = [e async for e in streaming_processor.process_stream("conv_1", "Hi")]
+
+    assert events == [
+        {"type": "delta", "text": "Hel"},
+        {"type": "delta", "text": "lo!"},
+        {"type": "final", "response": "Hello!"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_process_stream_requests_sse_streaming_mode(streaming_processor):
+    """Runner is invoked with StreamingMode.SSE."""
+    from google.adk.agents.run_config import StreamingMode
+
+    [e async for e in streaming_processor.process_stream("conv_1", "Hi")]
+
+    run_config = streaming_processor.runner.run_async.call_args.kwargs["run_config"]
+    assert run_config.streaming_mode == StreamingMode.SSE
+
+
+@pytest.mark.asyncio
+async def test_process_stream_final_falls_back_to_joined_chunks(mock_session_service):
+    """If the closing event carries no text, final response is the joined deltas."""
+    runner = MagicMock()
+    final = _make_event(None, final=True)
+    runner.run_async = MagicMock(
+        return_value=_async_iter([_make_event("a", partial=True), _make_event("b", partial=True), final])
+    )
+    processor = MessageProcessor(runner, mock_session_service)
+
+    events = [e async for e in processor.process_stream("conv_1", "Hi")]
+
+    assert events[-1] == {"type": "final", "response": "ab"}
+
+
+@pytest.mark.asyncio
+async def test_process_stream_empty_message(streaming_processor):
+    """Empty message yields a single final event without running the agent."""
+    events = [e async for e in streaming_processor.process_stream("conv_1", "  ")]
+
+    assert len(events) == 1
+    assert events[0]["type"] == "final"
+    streaming_processor.runner.run_async.assert_not_called()
+
+
+# --- /api/chat/stream endpoint ---
+
+
+@pytest.fixture
+def app_with_streaming_processor():
+    from app import app
+
+    async def fake_stream(conversation_id, message):
+        yield {"type": "delta", "text": "Hi "}
+        yield {"type": "delta", "text": "there"}
+        yield {"type": "final", "response": "Hi there"}
+
+    processor = MagicMock(spec=MessageProcessor)
+    processor.process_stream = MagicMock(side_effect=fake_stream)
+    processor.process = AsyncMock(return_value="Hi there")
+    app.state.processor = processor
+    return app
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_endpoint_emits_sse(app_with_streaming_processor):
+    """POST /api/chat/stream returns text/event-stream with delta and final frames."""
+    transport = ASGITransport(app=app_with_streaming_processor)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/chat/stream",
+            json={"conversation_id": "tg_dm_1", "message": "hello"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert _parse_sse(response.text) == [
+        ("delta", {"text": "Hi "}),
+        ("delta", {"text": "there"}),
+        ("final", {"response": "Hi there"}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_chat_endpoint_streams_when_accept_is_event_stream(app_with_streaming_processor):
+    """POST /api/chat with Accept: text/event-stream switches to SSE."""
+    transport = ASGITransport(app=app_with_streaming_processor)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/chat",
+            json={"conversation_id": "tg_dm_1", "message": "hello"},
+            headers={"Accept": "text/event-stream"},
+        )
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert _parse_sse(response.text)[-1] == ("final", {"response": "Hi there"})
+    app_with_streaming_processor.state.processor.process.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_endpoint_error_event(app_with_streaming_processor):
+    """Processor failure mid-stream is reported as an SSE error event."""
+
+    async def failing_stream(conversation_id, message):
+        yield {"type": "delta", "text": "partial"}
+        raise RuntimeError("Failed to process message")
+
+    app_with_streaming_processor.state.processor.process_stream = MagicMock(side_effect=failing_stream)
+    transport = ASGITransport(app=app_with_streaming_processor)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/chat/stream",
+            json={"conversation_id": "tg_dm_1", "message": "hello"},
+        )
+
+    frames = _parse_sse(response.text)
+    assert frames[0] == ("delta", {"text": "partial"})
+    assert frames[-1][0] == "error"
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_endpoint_missing_identifier(app_with_streaming_processor):
+    """Invalid request returns 400 JSON before streaming starts."""
+    transport = ASGITransport(app=app_with_streaming_processor)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/chat/stream", json={"message": "hello"})
+
+    assert response.status_code == 400
+    assert "error" in response.json()
@@ -0,0 +1,37 @@
+"""Tests for split_markdown."""
+
+import pytest
+
+from agent.chunking import split_markdown
+
+
+def test_short_content_is_one_chunk():
+    assert split_markdown("# Title\n\nBody\n", 1000) == ["# Title\n\nBody\n"]
+
+
+def test_sections_are_packed_up_to_limit():
+    content = "# A\naaaa\n# B\nbbbb\n# C\ncccc\n"
+
+    chunks = split_markdown(content, 20)
+
+    assert chunks == ["# A\naaaa\n# B\nbbbb\n", "# C\ncccc\n"]
+
+
+def test_page_breaks_split_and_are_dropped():
+    content = "page one text\n<!-- page break -->\npage two text\n"
+
+    assert split_markdown(content, 15) == ["page one text\n", "page two text\n"]
+
+
+def test_oversized_section_is_split_without_losing_text():
+    content = "# Big\n\n" + "para one. " * 10 + "\n\n" + "z" * 250
+
+    chunks = split_markdown(content, 100)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks) == content
+
+
+def test_max_chars_must_be_positive():
+    with pytest.raises(ValueError):
+        split_markdown("x", 0)
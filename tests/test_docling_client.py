@@ -1,8 +1,12 @@
 """Tests for DoclingClient."""
 
+import json
+
+import httpx
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import patch
 
+from agent.auth import TokenManager
 from agent.docling_client import DoclingClient
 
 
@@ -11,99 +15,155 @@ LOCALHOST_URL = "http://localhost:8081"
 GCS_URI = "gs://docling-documents/input/conv1/1700000000000_report.pdf"
 
 
-@pytest.fixture
-def cloud_run_client():
-    return DoclingClient(AGENT_URL)
+def _client(url, handler, fetch_id_token=lambda audience: ("fake-token", None)):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    tokens = TokenManager(fetch_id_token=fetch_id_token)
+    return DoclingClient(url, http_client=http, token_manager=tokens)
 
 
-@pytest.fixture
-def localhost_client():
-    return DoclingClient(LOCALHOST_URL)
+def _ok(request):
+    return httpx.Response(
+        200,
+        json={
+            "status": "ok",
+            "content": "# Report\n\nContent here",
+            "metadata": {"format": "markdown", "pages": 5},
+        },
+    )
 
 
 # --- process_document tests ---
 
 @pytest.mark.asyncio
-async def test_process_document_success(cloud_run_client):
+async def test_process_document_success():
     """Successful call returns content and metadata."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "status": "ok",
-        "content": "# Report\n\nContent here",
-        "metadata": {"format": "markdown", "pages": 5},
-    }
-
-    with patch("agent.docling_client._get_id_token", return_value="fake-token"), \
-         patch("httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
-        mock_client.post = AsyncMock(return_value=mock_response)
-        mock_client_cls.return_value = mock_client
-
-        result = await cloud_run_client.process_document(GCS_URI, "application/pdf", "report.pdf")
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return _ok(request)
+
+    client = _client(AGENT_URL, handler)
+    result = await client.process_document(GCS_URI, "application/pdf", "report.pdf")
 
     assert result["content"] == "# Report\n\nContent here"
     assert result["metadata"]["pages"] == 5
+    assert seen[0].url == f"{AGENT_URL}/api/process-document"
+    assert seen[0].headers["Authorization"] == "Bearer fake-token"
+    assert json.loads(seen[0].content)["document_url"] == GCS_URI
 
 
 @pytest.mark.asyncio
-async def test_process_document_non_200_raises_runtime_error(cloud_run_client):
+async def test_process_document_non_200_raises_runtime_error():
     """Non-200 response raises RuntimeError."""
-    mock_response = MagicMock()
-    mock_response.status_code = 422
-    mock_response.text = "Unprocessable document"
-
-    with patch("agent.docling_client._get_id_token", return_value="fake-token"), \
-         patch("httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
-        mock_client.post = AsyncMock(return_value=mock_response)
-        mock_client_cls.return_value = mock_client
+    client = _client(AGENT_URL, lambda request: httpx.Response(422, text="Unprocessable document"))
 
-        with pytest.raises(RuntimeError, match="422"):
-            await cloud_run_client.process_document(GCS_URI, "application/pdf", "report.pdf")
+    with pytest.raises(RuntimeError, match="422"):
+        await client.process_document(GCS_URI, "application/pdf", "report.pdf")
 
 
 @pytest.mark.asyncio
-async def test_process_document_timeout_raises_timeout_error(cloud_run_client):
+async def test_process_document_timeout_raises_timeout_error():
     """Timeout raises TimeoutError."""
-    import httpx
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
 
-    with patch("agent.docling_client._get_id_token", return_value="fake-token"), \
-         patch("httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
-        mock_client.post = AsyncMock(side_effect=httpx.TimeoutException("timed out"))
-        mock_client_cls.return_value = mock_client
-
-        with pytest.raises(TimeoutError):
-            await cloud_run_client.process_document(GCS_URI, "application/pdf", "report.pdf")
+    client = _client(AGENT_URL, handler)
+    with pytest.raises(TimeoutError):
+        await client.process_document(GCS_URI, "application/pdf", "report.pdf")
 
 
 @pytest.mark.asyncio
-async def test_localhost_url_no_authorization_header(localhost_client):
+async def test_localhost_url_no_authorization_header():
     """Localhost URL sends no Authorization header."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {"content": "text", "metadata": {"format": "markdown"}}
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return _ok(request)
+
+    client = _client(LOCALHOST_URL, handler, fetch_id_token=None)
+    await client.process_document(GCS_URI, "application/pdf", "report.pdf")
+
+    assert "Authorization" not in seen[0].headers
+
+
+@pytest.mark.asyncio
+async def test_id_token_fetched_once_across_requests():
+    """The ID token is cached by the token manager, not fetched per document."""
+    fetched = []
+
+    def fetch_id_token(audience):
+        fetched.append(audience)
+        return "fake-token", None
+
+    client = _client(AGENT_URL, _ok, fetch_id_token=fetch_id_token)
+    await client.process_document(GCS_URI, "application/pdf", "a.pdf")
+    await client.process_document(GCS_URI, "application/pdf", "b.pdf")
+
+    assert fetched == [AGENT_URL]
+
+
+@pytest.mark.asyncio
+async def test_token_failure_sends_request_without_authorization():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return _ok(request)
+
+    def fetch_id_token(audience):
+        raise RuntimeError("metadata server unavailable")
+
+    client = _client(AGENT_URL, handler, fetch_id_token=fetch_id_token)
+    await client.process_document(GCS_URI, "application/pdf", "report.pdf")
+
+    assert "Authorization" not in seen[0].headers
+
+
+# --- connection pooling ---
+
+@pytest.mark.asyncio
+async def test_requests_share_one_http_client():
+    """Consecutive calls reuse the long-lived client instead of opening a new one."""
+    client = _client(LOCALHOST_URL, _ok)
+
+    with patch("httpx.AsyncClient") as client_cls:
+        await client.process_document(GCS_URI, "application/pdf", "a.pdf")
+        await client.process_document(GCS_URI, "application/pdf", "b.pdf")
+
+    client_cls.assert_not_called()
+    assert client.stats()["requests"] == 2
+
 
-    captured_headers = {}
+@pytest.mark.asyncio
+async def test_trace_counts_new_connections_and_handshakes():
+    """Requests without a connect_tcp event are counted as reused connections."""
+    client = _client(LOCALHOST_URL, _ok)
+    for _ in range(3):
+        await client.process_document(GCS_URI, "application/pdf", "a.pdf")
+    await client._trace("connection.connect_tcp.complete", {})
+    await client._trace("connection.start_tls.complete", {})
+    await client._trace("http11.send_request_headers.started", {})
+
+    stats = client.stats()
+    assert stats["connections_opened"] == 1
+    assert stats["tls_handshakes"] == 1
+    assert stats["reused_connections"] == 2
 
-    async def capture_post(url, json, headers):
-        captured_headers.update(headers)
-        return mock_response
 
-    with patch("httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
-        mock_client.post = capture_post
-        mock_client_cls.return_value = mock_client
+@pytest.mark.asyncio
+async def test_close_only_closes_owned_client():
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(_ok))
+    await DoclingClient(LOCALHOST_URL, http_client=shared).close()
+    assert not shared.is_closed
+
+    owned = DoclingClient(LOCALHOST_URL, http2=False)
+    await owned.close()
+    assert owned._http.is_closed
 
-        await localhost_client.process_document(GCS_URI, "application/pdf", "report.pdf")
 
-    assert "Authorization" not in captured_headers
+def test_http2_falls_back_without_h2():
+    with patch("agent.docling_client._http2_available", return_value=False):
+        client = DoclingClient(LOCALHOST_URL, http2=True)
+    assert client.stats()["http2"] is False
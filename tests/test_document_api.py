@@ -240,3 +240,126 @@ async def test_document_endpoint_gcs_failure_returns_500_no_docling_call(
         )
     assert response.status_code == 500
     mock_docling_client.process_document.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_document_endpoint_multipart_upload(app_with_docling, mock_docling_gcs_client):
+    """multipart/form-data uploads raw bytes; filename and mime type come from the part."""
+    transport = ASGITransport(app=app_with_docling)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            data={"conversation_id": "tg_123456"},
+            files={"document": ("report.pdf", b"%PDF-1.4 raw", "application/pdf")},
+        )
+    assert response.status_code == 200
+    assert response.json()["gcs_uri"] == GCS_URI
+    mock_docling_gcs_client.upload_document.assert_called_once_with(
+        b"%PDF-1.4 raw", "tg_123456", "report.pdf"
+    )
+
+
+@pytest.mark.asyncio
+async def test_document_endpoint_octet_stream_upload(app_with_docling, mock_docling_gcs_client):
+    """application/octet-stream takes conversation_id, mime type and filename from headers."""
+    transport = ASGITransport(app=app_with_docling)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            content=b"%PDF-1.4 raw",
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Conversation-Id": "tg_123456",
+                "X-Mime-Type": "application/pdf",
+                "X-Filename": "%D0%BE%D1%82%D1%87%D0%B5%D1%82.pdf",
+            },
+        )
+    assert response.status_code == 200
+    mock_docling_gcs_client.upload_document.assert_called_once_with(
+        b"%PDF-1.4 raw", "tg_123456", "отчет.pdf"
+    )
+
+
+@pytest.mark.asyncio
+async def test_document_endpoint_octet_stream_missing_filename(app_with_docling):
+    """Binary upload without a filename returns 400."""
+    transport = ASGITransport(app=app_with_docling)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            content=b"%PDF-1.4 raw",
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Conversation-Id": "tg_123456",
+                "X-Mime-Type": "application/pdf",
+            },
+        )
+    assert response.status_code == 400
+
+
+# --- Content-hash document index ---
+
+
+@pytest.fixture
+def app_with_index(app_with_docling):
+    from agent.document_index import DocumentIndex
+
+    app_with_docling.state.document_index = DocumentIndex()
+    yield app_with_docling
+    app_with_docling.state.document_index.close()
+    app_with_docling.state.document_index = None
+
+
+@pytest.mark.asyncio
+async def test_repeat_document_skips_upload_and_extraction(
+    app_with_index, mock_docling_client, mock_docling_gcs_client, mock_media_client
+):
+    """The same bytes sent from another chat are answered from the index."""
+    transport = ASGITransport(app=app_with_index)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_1",
+                "document_base64": VALID_DOC_BASE64,
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+            },
+        )
+        second = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_2",
+                "document_base64": VALID_DOC_BASE64,
+                "mime_type": "application/pdf",
+                "filename": "copy.pdf",
+            },
+        )
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    mock_docling_gcs_client.upload_document.assert_called_once()
+    mock_docling_client.process_document.assert_called_once()
+    mock_media_client.summarize_document.assert_called_once()
+    assert app_with_index.state.document_index.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_index_hit_retries_missing_summary(
+    app_with_index, mock_docling_client, mock_media_client
+):
+    mock_media_client.summarize_document.side_effect = [None, "Late summary"]
+    payload = {
+        "conversation_id": "tg_1",
+        "document_base64": VALID_DOC_BASE64,
+        "mime_type": "application/pdf",
+        "filename": "report.pdf",
+    }
+    transport = ASGITransport(app=app_with_index)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post("/api/document", json=payload)
+        second = await client.post("/api/document", json=payload)
+
+    assert first.json()["summary"] is None
+    assert second.json()["summary"] == "Late summary"
+    mock_docling_client.process_document.assert_called_once()
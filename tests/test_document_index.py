@@ -0,0 +1,70 @@
+"""Tests for DocumentIndex."""
+
+import pytest
+
+from agent.document_index import DocumentIndex, document_key
+
+RECORD = {
+    "content": "# Report",
+    "metadata": {"format": "markdown", "pages": 3},
+    "gcs_uri": "gs://docling-documents/input/conv1/1_report.pdf",
+    "result_gcs_uri": None,
+    "summary": "A report.",
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_put_and_get():
+    index = DocumentIndex()
+    key = document_key("abc", "application/pdf")
+
+    assert await index.get(key) is None
+    await index.put(key, RECORD)
+
+    assert await index.get(key) == RECORD
+    assert index.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "writes": 1}
+
+
+@pytest.mark.asyncio
+async def test_key_includes_mime_type():
+    index = DocumentIndex()
+    await index.put(document_key("abc", "application/pdf"), RECORD)
+
+    assert await index.get(document_key("abc", "text/html")) is None
+
+
+@pytest.mark.asyncio
+async def test_persists_across_restarts(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    index = DocumentIndex(path)
+    await index.put("k", RECORD)
+    index.close()
+
+    reopened = DocumentIndex(path)
+
+    assert await reopened.get("k") == RECORD
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_ttl_expires_and_prunes():
+    clock = FakeClock()
+    index = DocumentIndex(ttl_seconds=60, clock=clock)
+    await index.put("old", RECORD)
+    clock.now += 30
+    await index.put("new", RECORD)
+    clock.now += 40
+
+    assert await index.get("old") is None  # expired on read
+    await index.put("older", RECORD)
+    clock.now += 61
+    assert await index.prune() == 2
+    assert await index.size() == 0
@@ -0,0 +1,55 @@
+"""Tests for raw-bytes request decoding and fast JSON responses."""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from httpx import ASGITransport, AsyncClient
+
+from agent.fast_json import FastJSONResponse, InvalidBody, decode_model
+from agent.models import ChatRequest, ImageRequest
+
+
+def test_decode_model_from_bytes():
+    request = decode_model(b'{"conversation_id": "tg_1", "image_base64": "aGk="}', ImageRequest)
+    assert request.conversation_id == "tg_1"
+    assert request.mime_type == "image/jpeg"
+
+
+@pytest.mark.parametrize("body", [b"not json", b"", b'{"message": "hi"'])
+def test_malformed_json_is_invalid_json(body):
+    with pytest.raises(InvalidBody, match="^Invalid JSON$"):
+        decode_model(body, ChatRequest)
+
+
+def test_validation_error_keeps_message():
+    with pytest.raises(InvalidBody, match="image_base64"):
+        decode_model(b'{"conversation_id": "tg_1"}', ImageRequest)
+
+
+def test_response_is_compact_utf8():
+    response = FastJSONResponse({"response": "Привет", "n": 1})
+    assert response.body == '{"response":"Привет","n":1}'.encode()
+    assert response.headers["content-type"] == "application/json"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path", ["/api/chat", "/api/voice", "/api/image", "/api/document", "/api/session-info"]
+)
+async def test_non_object_body_is_400_on_every_endpoint(path):
+    from app import app
+
+    app.state.processor = MagicMock()
+    app.state.processor.process = AsyncMock(return_value="unused")
+    app.state.docling_client = MagicMock()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            path, content=b'["not", "an", "object"]', headers={"Content-Type": "application/json"}
+        )
+
+    assert response.status_code == 400
+    assert json.loads(response.content)["error"]
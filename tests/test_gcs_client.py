@@ -1,36 +1,71 @@
 """Tests for GCSStorageClient and processor GCS integration."""
 
 import base64
+
+import httpx
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from agent.auth import TokenManager
 from agent.gcs_client import GCSStorageClient, _mime_to_ext
+from agent.media_payload import MediaPayload
 from agent.processor import MessageProcessor
 
 
-# --- Unit tests for GCSStorageClient ---
+# --- Unit tests for GCSStorageClient (against an in-memory GCS emulator) ---
+
+
+class FakeGCS:
+    """Minimal in-memory stand-in for the GCS JSON upload API (media + resumable)."""
+
+    def __init__(self):
+        self.objects: dict[str, tuple[bytes, str]] = {}
+        self.requests: list[httpx.Request] = []
+        self.fail_with: int | None = None
+        self._sessions: dict[str, dict] = {}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.fail_with:
+            return httpx.Response(self.fail_with, text="Permission denied")
+        upload_type = request.url.params.get("uploadType")
+        if request.method == "POST" and upload_type == "media":
+            name = request.url.params["name"]
+            self.objects[name] = (request.content, request.headers["Content-Type"])
+            return httpx.Response(200, json={"name": name})
+        if request.method == "POST" and upload_type == "resumable":
+            session_id = str(len(self._sessions))
+            self._sessions[session_id] = {
+                "name": request.url.params["name"],
+                "mime_type": request.headers["X-Upload-Content-Type"],
+                "data": b"",
+            }
+            return httpx.Response(200, headers={"Location": f"http://fake-gcs/session/{session_id}"})
+        if request.method == "PUT" and request.url.path.startswith("/session/"):
+            session = self._sessions[request.url.path.rsplit("/", 1)[1]]
+            session["data"] += request.content
+            total = int(request.headers["Content-Range"].rsplit("/", 1)[1])
+            if len(session["data"]) < total:
+                return httpx.Response(308, headers={"Range": f"bytes=0-{len(session['data']) - 1}"})
+            self.objects[session["name"]] = (session["data"], session["mime_type"])
+            return httpx.Response(200, json={"name": session["name"]})
+        return httpx.Response(404)
 
 
 @pytest.fixture
-def mock_storage_client():
-    """Patch google.cloud.storage.Client used inside GCSStorageClient."""
-    with patch("agent.gcs_client.storage") as mock_storage:
-        mock_bucket = MagicMock()
-        mock_blob = MagicMock()
-        mock_bucket.blob.return_value = mock_blob
-        mock_storage.Client.return_value.bucket.return_value = mock_bucket
-        yield mock_storage, mock_bucket, mock_blob
+def fake_gcs():
+    return FakeGCS()
 
 
 @pytest.fixture
-def gcs_client(mock_storage_client):
-    return GCSStorageClient("test-bucket")
+def gcs_client(fake_gcs):
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake_gcs.handler))
+    return GCSStorageClient("test-bucket", http_client=http_client, endpoint="http://fake-gcs")
 
 
 @pytest.mark.asyncio
-async def test_upload_original_stores_in_upload_folder(gcs_client, mock_storage_client):
+async def test_upload_original_stores_in_upload_folder(gcs_client, fake_gcs):
     """upload_original saves to upload/ folder."""
-    _, mock_bucket, mock_blob = mock_storage_client
     image_bytes = b"fake image data"
 
     uri = await gcs_client.upload_original(image_bytes, "image/jpeg", "session-123")
@@ -38,13 +73,13 @@ async def test_upload_original_stores_in_upload_folder(gcs_client, mock_storage_
     assert uri is not None
     assert uri.startswith("gs://test-bucket/upload/session-123/")
     assert uri.endswith(".jpg")
-    mock_blob.upload_from_string.assert_called_once_with(image_bytes, content_type="image/jpeg")
+    object_name = uri.removeprefix("gs://test-bucket/")
+    assert fake_gcs.objects[object_name] == (image_bytes, "image/jpeg")
 
 
 @pytest.mark.asyncio
-async def test_upload_processed_stores_in_processed_folder(gcs_client, mock_storage_client):
+async def test_upload_processed_stores_in_processed_folder(gcs_client):
     """upload_processed saves to processed/ folder."""
-    _, mock_bucket, mock_blob = mock_storage_client
     image_bytes = b"processed image data"
 
     uri = await gcs_client.upload_processed(image_bytes, "image/png", "session-456")
@@ -55,16 +90,76 @@ async def test_upload_processed_stores_in_processed_folder(gcs_client, mock_stor
 
 
 @pytest.mark.asyncio
-async def test_upload_original_gcs_error_returns_none(gcs_client, mock_storage_client):
+async def test_upload_original_gcs_error_returns_none(gcs_client, fake_gcs):
     """GCS upload error returns None (fire-and-forget)."""
-    _, _, mock_blob = mock_storage_client
-    mock_blob.upload_from_string.side_effect = Exception("Permission denied")
+    fake_gcs.fail_with = 403
 
     uri = await gcs_client.upload_original(b"data", "image/jpeg", "session-789")
 
     assert uri is None
 
 
+@pytest.mark.asyncio
+async def test_upload_document_raises_on_error(gcs_client, fake_gcs):
+    """Document upload errors propagate (the docling call depends on it)."""
+    fake_gcs.fail_with = 500
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await gcs_client.upload_document(b"%PDF", "conv1", "report.pdf")
+
+
+@pytest.mark.asyncio
+async def test_large_upload_uses_resumable_session(gcs_client, fake_gcs):
+    """Objects above the threshold are uploaded in chunks via a resumable session."""
+    data = bytes(range(256)) * 40  # 10 KiB
+
+    with patch("agent.gcs_client._RESUMABLE_THRESHOLD", 4096), \
+         patch("agent.gcs_client._RESUMABLE_CHUNK_SIZE", 4096):
+        uri = await gcs_client.upload_document(data, "conv1", "big.pdf")
+
+    object_name = uri.removeprefix("gs://test-bucket/")
+    assert fake_gcs.objects[object_name] == (data, "application/octet-stream")
+    puts = [r for r in fake_gcs.requests if r.method == "PUT"]
+    assert [r.headers["Content-Range"] for r in puts] == [
+        "bytes 0-4095/10240",
+        "bytes 4096-8191/10240",
+        "bytes 8192-10239/10240",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_emulator_requests_are_unauthenticated(gcs_client, fake_gcs):
+    """Requests to the emulator carry no Authorization header."""
+    await gcs_client.upload_original(b"data", "image/jpeg", "session-1")
+
+    assert "Authorization" not in fake_gcs.requests[0].headers
+
+
+@pytest.mark.asyncio
+async def test_production_requests_use_bearer_token(fake_gcs):
+    """Without an emulator endpoint, uploads go to GCS with a bearer token."""
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake_gcs.handler))
+    scopes_seen = []
+
+    def fetch_access_token(scopes):
+        scopes_seen.append(scopes)
+        return "access-token", None
+
+    client = GCSStorageClient(
+        "test-bucket",
+        http_client=http_client,
+        token_manager=TokenManager(fetch_access_token=fetch_access_token),
+    )
+
+    await client.upload_original(b"data", "image/jpeg", "session-1")
+    await client.upload_original(b"data", "image/jpeg", "session-1")
+
+    request = fake_gcs.requests[0]
+    assert request.url.host == "storage.googleapis.com"
+    assert request.headers["Authorization"] == "Bearer access-token"
+    assert scopes_seen == [("https://www.googleapis.com/auth/devstorage.read_write",)]
+
+
 @pytest.mark.parametrize("mime_type,expected_ext", [
     ("image/jpeg", "jpg"),
     ("image/jpg", "jpg"),
@@ -80,8 +175,8 @@ def test_mime_to_ext(mime_type, expected_ext):
 
 # --- Processor integration tests ---
 
-IMAGE_B64 = base64.b64encode(b"fake image").decode()
-PROCESSED_B64 = base64.b64encode(b"processed image").decode()
+IMAGE = MediaPayload(b"fake image", "image/jpeg")
+PROCESSED = MediaPayload(b"processed image", "image/png")
 
 
 @pytest.fixture
@@ -104,8 +199,7 @@ def mock_media_client():
     client.process_image_with_model = AsyncMock(
         return_value={
             "text": "Edited",
-            "image_base64": PROCESSED_B64,
-            "image_mime_type": "image/png",
+            "image": PROCESSED,
         }
     )
     return client
@@ -140,7 +234,7 @@ async def test_original_uploaded_to_gcs_on_process_image(
     processor_with_gcs, mock_gcs_client
 ):
     """Original image is uploaded to upload/ when process_image is called."""
-    await processor_with_gcs.process_image("conv_1", IMAGE_B64, "image/jpeg")
+    await processor_with_gcs.process_image("conv_1", IMAGE)
 
     mock_gcs_client.upload_original.assert_called_once()
     call_args = mock_gcs_client.upload_original.call_args
@@ -154,7 +248,7 @@ async def test_processed_image_uploaded_to_gcs_when_model_returns_image(
 ):
     """Processed image is uploaded to processed/ when model returns an image."""
     await processor_with_gcs.process_image(
-        "conv_1", IMAGE_B64, "image/jpeg", prompt="Remove background"
+        "conv_1", IMAGE, prompt="Remove background"
     )
 
     mock_gcs_client.upload_processed.assert_called_once()
@@ -170,7 +264,7 @@ async def test_gcs_error_does_not_affect_process_image_response(
     """GCS failure does not prevent process_image from returning a result."""
     mock_gcs_client.upload_original = AsyncMock(return_value=None)  # simulates error
 
-    result = await processor_with_gcs.process_image("conv_1", IMAGE_B64, "image/jpeg")
+    result = await processor_with_gcs.process_image("conv_1", IMAGE)
 
     assert result["response"] == "Agent response"
     assert result["description"] == "A cat photo"
@@ -179,7 +273,54 @@ async def test_gcs_error_does_not_affect_process_image_response(
 @pytest.mark.asyncio
 async def test_no_gcs_client_skips_upload(processor_no_gcs, mock_media_client):
     """If gcs_client=None, no upload is attempted (backward compatibility)."""
-    result = await processor_no_gcs.process_image("conv_1", IMAGE_B64, "image/jpeg")
+    result = await processor_no_gcs.process_image("conv_1", IMAGE)
 
     assert result["response"] == "Agent response"
     mock_media_client.describe_image.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_payload_bytes_uploaded_without_copy(processor_with_gcs, mock_gcs_client):
+    """The decoded payload bytes are uploaded as-is (no re-decode)."""
+    await processor_with_gcs.process_image("conv_1", IMAGE)
+
+    assert mock_gcs_client.upload_original.call_args[0][0] is IMAGE.data
+
+
+@pytest.mark.asyncio
+async def test_processed_image_returned_as_base64(processor_with_gcs):
+    """The model's image is encoded to base64 once, for the response."""
+    result = await processor_with_gcs.process_image("conv_1", IMAGE, prompt="Edit")
+
+    assert base64.b64decode(result["processed_image_base64"]) == b"processed image"
+    assert result["processed_image_mime_type"] == "image/png"
+
+
+@pytest.mark.asyncio
+async def test_gcs_upload_overlaps_model_call(mock_runner, mock_session_service, mock_media_client):
+    """process_image does not wait for the GCS upload before calling the model."""
+    import asyncio
+
+    upload_started = asyncio.Event()
+    release_upload = asyncio.Event()
+
+    async def slow_upload(*args):
+        upload_started.set()
+        await release_upload.wait()
+        return "gs://bucket/upload/session/1.jpg"
+
+    gcs_client = MagicMock()
+    gcs_client.upload_original = AsyncMock(side_effect=slow_upload)
+    proc = MessageProcessor(mock_runner, mock_session_service, mock_media_client, gcs_client=gcs_client)
+    proc.process = AsyncMock(return_value="Agent response")
+
+    result = await proc.process_image("conv_1", IMAGE)
+
+    assert result["response"] == "Agent response"
+    mock_media_client.describe_image.assert_called_once()
+    assert proc.background_tasks.stats()["in_flight"] == 1
+
+    release_upload.set()
+    await proc.background_tasks.drain(timeout=1)
+    gcs_client.upload_original.assert_awaited_once()
+    assert proc.background_tasks.stats()["in_flight"] == 0
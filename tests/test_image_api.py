@@ -7,6 +7,8 @@ from unittest.mock import AsyncMock, MagicMock
 
 from httpx import ASGITransport, AsyncClient
 
+from agent.media_payload import MediaPayload
+
 
 VALID_IMAGE_BASE64 = base64.b64encode(b"fake image data").decode()
 
@@ -159,3 +161,56 @@ async def test_image_endpoint_error_handling(app_with_mocks, mock_processor):
         )
     assert response.status_code == 500
     assert "unavailable" in response.json().get("error", "").lower()
+
+
+@pytest.mark.asyncio
+async def test_image_endpoint_multipart_upload(app_with_mocks, mock_processor):
+    """multipart/form-data uses the part content type and passes raw bytes."""
+    transport = ASGITransport(app=app_with_mocks)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/image",
+            data={"conversation_id": "tg_123456", "prompt": "Remove background"},
+            files={"image": ("photo.png", b"raw png bytes", "image/png")},
+        )
+    assert response.status_code == 200
+    mock_processor.process_image.assert_called_once_with(
+        "tg_123456", MediaPayload(b"raw png bytes", "image/png"), "Remove background"
+    )
+
+
+@pytest.mark.asyncio
+async def test_image_endpoint_octet_stream_percent_encoded_prompt(app_with_mocks, mock_processor):
+    """X-Prompt header is percent-decoded so non-ASCII prompts survive."""
+    transport = ASGITransport(app=app_with_mocks)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/image",
+            content=b"raw jpeg bytes",
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Conversation-Id": "tg_123456",
+                "X-Prompt": "%D0%A7%D1%82%D0%BE%20%D1%8D%D1%82%D0%BE%3F",
+            },
+        )
+    assert response.status_code == 200
+    mock_processor.process_image.assert_called_once_with(
+        "tg_123456", MediaPayload(b"raw jpeg bytes", "image/jpeg"), "Что это?"
+    )
+
+
+@pytest.mark.asyncio
+async def test_image_endpoint_binary_unsupported_mime_type(app_with_mocks):
+    """Binary uploads are validated against the same mime types."""
+    transport = ASGITransport(app=app_with_mocks)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/image",
+            content=b"raw bytes",
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Conversation-Id": "tg_123456",
+                "X-Mime-Type": "image/bmp",
+            },
+        )
+    assert response.status_code == 400
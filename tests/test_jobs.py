@@ -0,0 +1,351 @@
+"""Tests for JobManager, JobStore and the async job API."""
+
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from httpx import ASGITransport, AsyncClient
+
+from agent.jobs import FAILED, SUCCEEDED, JobError, JobManager, JobQueueFull, JobStore, job_view
+
+
+async def _wait_finished(manager, job_id):
+    for _ in range(200):
+        record = await manager.get(job_id)
+        if record["status"] in (SUCCEEDED, FAILED):
+            return record
+        await asyncio.sleep(0.005)
+    raise AssertionError("job did not finish")
+
+
+@pytest_asyncio.fixture
+async def manager():
+    manager = JobManager(JobStore(), workers=2, max_queue_size=2)
+    await manager.start()
+    yield manager
+    await manager.close(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_job_runs_and_stores_result(manager):
+    async def work():
+        return {"content": "done"}
+
+    record = await manager.submit("document", work)
+    assert record["status"] == "queued"
+
+    finished = await _wait_finished(manager, record["id"])
+    assert job_view(finished)["result"] == {"content": "done"}
+    assert manager.stats()["succeeded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_job_error_is_recorded(manager):
+    async def work():
+        raise JobError("Document processing timed out", 504)
+
+    record = await manager.submit("document", work)
+    view = job_view(await _wait_finished(manager, record["id"]))
+
+    assert view["status"] == "failed"
+    assert view["error"] == "Document processing timed out"
+    assert view["error_status"] == 504
+
+
+@pytest.mark.asyncio
+async def test_queue_is_bounded():
+    manager = JobManager(JobStore(), workers=1, max_queue_size=1)  # workers not started
+    await manager.submit("image", AsyncMock(return_value={}))
+
+    with pytest.raises(JobQueueFull):
+        await manager.submit("image", AsyncMock(return_value={}))
+    assert manager.stats()["rejected"] == 1
+    await manager.close(timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_state_survives_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first = JobManager(JobStore(path), workers=1)
+    await first.start()
+    done = await first.submit("document", AsyncMock(return_value={"content": "ok"}))
+    await _wait_finished(first, done["id"])
+    first._tasks[0].cancel()  # simulate a crash: the next job never runs
+    await asyncio.gather(*first._tasks, return_exceptions=True)
+    lost = await first.submit("document", AsyncMock(return_value={}))
+    first.store.close()
+
+    second = JobManager(JobStore(path), workers=1)
+    await second.start()
+
+    assert (await second.get(done["id"]))["result"] == {"content": "ok"}
+    interrupted = await second.get(lost["id"])
+    assert interrupted["status"] == "failed"
+    assert interrupted["error_status"] == 503
+    await second.close(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_pruned_while_running():
+    now = [1000.0]
+    manager = JobManager(
+        JobStore(clock=lambda: now[0]), workers=1, retention_seconds=60, prune_interval_seconds=0.01
+    )
+    await manager.start()
+    record = await manager.submit("image", AsyncMock(return_value={"response": "hi"}))
+    await _wait_finished(manager, record["id"])
+
+    now[0] += 120
+    for _ in range(200):
+        if await manager.get(record["id"]) is None:
+            break
+        await asyncio.sleep(0.005)
+
+    assert await manager.get(record["id"]) is None
+    await manager.close(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_callback_receives_finished_job():
+    posted = []
+
+    def handler(request):
+        posted.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    manager = JobManager(JobStore(), workers=1, http_client=http)
+    await manager.start()
+
+    record = await manager.submit(
+        "image", AsyncMock(return_value={"response": "hi"}), callback_url="http://bot/callback"
+    )
+    await manager.close(timeout=1)
+
+    assert posted == [job_view(await manager.get(record["id"]))]
+    assert posted[0]["result"] == {"response": "hi"}
+
+
+# --- API ---
+
+
+VALID_DOC_BASE64 = base64.b64encode(b"%PDF-1.4 fake pdf content").decode()
+
+
+@pytest_asyncio.fixture
+async def app_with_jobs(manager):
+    from app import app
+
+    docling_client = MagicMock()
+    docling_client.process_document = AsyncMock(
+        return_value={"content": "# Report", "metadata": {"format": "markdown"}}
+    )
+    gcs = MagicMock()
+    gcs.upload_document = AsyncMock(return_value="gs://docling-documents/input/x.pdf")
+    media_client = MagicMock()
+    media_client.summarize_document = AsyncMock(return_value="Summary")
+
+    app.state.docling_client = docling_client
+    app.state.docling_gcs_client = gcs
+    app.state.media_client = media_client
+    app.state.job_manager = manager
+    yield app
+    app.state.job_manager = None
+
+
+@pytest.mark.asyncio
+async def test_document_respond_async_returns_job(app_with_jobs):
+    transport = ASGITransport(app=app_with_jobs)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_1",
+                "document_base64": VALID_DOC_BASE64,
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+            },
+            headers={"Prefer": "respond-async"},
+        )
+        assert response.status_code == 202
+        status_url = response.headers["Location"]
+        assert response.json()["status_url"] == status_url
+
+        await _wait_finished(app_with_jobs.state.job_manager, response.json()["job_id"])
+        job = (await client.get(status_url)).json()
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["content"] == "# Report"
+    assert job["result"]["summary"] == "Summary"
+
+
+@pytest.mark.asyncio
+async def test_failed_document_job_keeps_error_status(app_with_jobs):
+    app_with_jobs.state.docling_client.process_document.side_effect = TimeoutError()
+    transport = ASGITransport(app=app_with_jobs)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_1",
+                "document_base64": VALID_DOC_BASE64,
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+            },
+            headers={"Prefer": "respond-async"},
+        )
+        await _wait_finished(app_with_jobs.state.job_manager, response.json()["job_id"])
+        job = (await client.get(response.headers["Location"])).json()
+
+    assert job["status"] == "failed"
+    assert job["error_status"] == 504
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "callback_url",
+    ["https://evil.example/hook", "http://bot.example/hook", "https://bot.example@169.254.169.254/"],
+)
+async def test_callback_to_unlisted_host_is_rejected(app_with_jobs, monkeypatch, callback_url):
+    monkeypatch.setattr(app_with_jobs.state, "callback_allowed_hosts", frozenset({"bot.example"}), raising=False)
+    transport = ASGITransport(app=app_with_jobs)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_1",
+                "document_base64": VALID_DOC_BASE64,
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+            },
+            headers={"Prefer": "respond-async", "X-Callback-Url": callback_url},
+        )
+
+    assert response.status_code == 400
+    assert app_with_jobs.state.job_manager.stats()["submitted"] == 0
+    app_with_jobs.state.docling_client.process_document.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_callback_to_allowed_host_receives_job(app_with_jobs, monkeypatch):
+    posted = []
+
+    def handler(request):
+        posted.append((str(request.url), json.loads(request.content)))
+        return httpx.Response(200)
+
+    manager = JobManager(
+        JobStore(), workers=1, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    await manager.start()
+    app_with_jobs.state.job_manager = manager
+    monkeypatch.setattr(app_with_jobs.state, "callback_allowed_hosts", frozenset({"bot.example"}), raising=False)
+    transport = ASGITransport(app=app_with_jobs)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_1",
+                "document_base64": VALID_DOC_BASE64,
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+            },
+            headers={"Prefer": "respond-async", "X-Callback-Url": "https://bot.example/hook"},
+        )
+    await manager.close(timeout=1)
+
+    assert response.status_code == 202
+    assert [url for url, _ in posted] == ["https://bot.example/hook"]
+    assert posted[0][1]["result"]["summary"] == "Summary"
+
+
+@pytest.mark.asyncio
+async def test_unknown_job_is_404(app_with_jobs):
+    transport = ASGITransport(app=app_with_jobs)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/api/jobs/nope")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_deferred_summary_returns_content_with_summary_handle(app_with_jobs):
+    transport = ASGITransport(app=app_with_jobs)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_1",
+                "document_base64": VALID_DOC_BASE64,
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+                "defer_summary": True,
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["content"] == "# Report"
+        assert data["summary"] is None
+        assert data["summary_url"] == f"/api/jobs/{data['summary_job_id']}"
+
+        await _wait_finished(app_with_jobs.state.job_manager, data["summary_job_id"])
+        job = (await client.get(data["summary_url"])).json()
+
+    assert job["kind"] == "document_summary"
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"summary": "Summary"}
+
+
+@pytest.mark.asyncio
+async def test_deferred_summary_written_back_to_index(app_with_jobs):
+    from agent.document_index import DocumentIndex
+
+    app_with_jobs.state.document_index = DocumentIndex()
+    transport = ASGITransport(app=app_with_jobs)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {
+                "conversation_id": "tg_1",
+                "document_base64": VALID_DOC_BASE64,
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+                "defer_summary": True,
+            }
+            first = (await client.post("/api/document", json=body)).json()
+            await _wait_finished(app_with_jobs.state.job_manager, first["summary_job_id"])
+            second = (await client.post("/api/document", json=body)).json()
+    finally:
+        app_with_jobs.state.document_index.close()
+        app_with_jobs.state.document_index = None
+
+    # The repeat is answered from the index, summary included, without a new job
+    assert second["summary"] == "Summary"
+    assert second["summary_job_id"] is None
+    app_with_jobs.state.media_client.summarize_document.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_deferred_summary_failure_recorded_on_job(app_with_jobs):
+    app_with_jobs.state.media_client.summarize_document.return_value = None
+    transport = ASGITransport(app=app_with_jobs)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            content=b"%PDF-1.4 fake",
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Conversation-Id": "tg_1",
+                "X-Mime-Type": "application/pdf",
+                "X-Filename": "report.pdf",
+                "X-Defer-Summary": "true",
+            },
+        )
+        job_id = response.json()["summary_job_id"]
+        view = job_view(await _wait_finished(app_with_jobs.state.job_manager, job_id))
+
+    assert view["status"] == "failed"
+    assert view["error_status"] == 502
@@ -0,0 +1,92 @@
+"""Tests for the queue-based log pipeline and log sampling."""
+
+import io
+import json
+import logging
+import queue
+import threading
+
+from opentelemetry import context as otel_context
+
+from agent.log_pipeline import SamplingFilter, TraceQueueHandler
+from agent.tracing import extract_context
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+def _record(name: str, level: int = logging.INFO, msg: str = "Processing message") -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, None, None)
+
+
+def test_writes_on_background_thread_with_emit_time_trace_id():
+    from app import CloudTraceFormatter
+
+    out = io.StringIO()
+    writer_threads = []
+
+    class RecordingHandler(logging.StreamHandler):
+        def emit(self, record):
+            writer_threads.append(threading.current_thread())
+            super().emit(record)
+
+    stream_handler = RecordingHandler(out)
+    stream_handler.setFormatter(
+        CloudTraceFormatter("%(timestamp)s %(level)s %(logger)s %(message)s", project_id="proj")
+    )
+    handler = TraceQueueHandler(queue.Queue())
+    handler.start(stream_handler)
+    logger = logging.getLogger("test.log_pipeline")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        token = otel_context.attach(
+            extract_context({"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"})
+        )
+        try:
+            logger.warning("GCS upload complete: uri=%s", "gs://b/o")
+        finally:
+            otel_context.detach(token)
+    finally:
+        handler.stop()
+        logger.removeHandler(handler)
+        logger.propagate = True
+
+    line = json.loads(out.getvalue())
+    assert line["message"] == "GCS upload complete: uri=gs://b/o"
+    assert line["logging.googleapis.com/trace"] == f"projects/proj/traces/{TRACE_ID}"
+    assert "trace_context" not in line
+    assert writer_threads and writer_threads[0] is not threading.main_thread()
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = TraceQueueHandler(queue.Queue(maxsize=1))
+
+    handler.handle(_record("agent.processor"))
+    handler.handle(_record("agent.processor"))
+
+    assert handler.stats()["dropped_queue_full"] == 1
+    assert handler.stats()["queued"] == 1
+
+
+def test_sample_rate_by_logger_prefix():
+    values = iter([0.05, 0.5, 0.05, 0.5, 0.99])
+    log_filter = SamplingFilter(
+        sample_rates={"agent": 1.0, "agent.gcs_client": 0.1}, rng=lambda: next(values)
+    )
+
+    kept = [log_filter.filter(_record("agent.gcs_client")) for _ in range(4)]
+
+    assert kept == [True, False, True, False]
+    assert log_filter.filter(_record("agent.processor"))  # covered by "agent" at 1.0
+    assert log_filter.stats()["sampled_out"] == {"agent.gcs_client": 2}
+
+
+def test_rate_limit_never_drops_warnings():
+    log_filter = SamplingFilter(rate_limits={"agent.processor": 2})
+
+    kept = [log_filter.filter(_record("agent.processor")) for _ in range(5)]
+    warnings = [log_filter.filter(_record("agent.processor", logging.WARNING)) for _ in range(5)]
+
+    assert kept == [True, True, False, False, False]
+    assert all(warnings)
+    assert log_filter.stats()["rate_limited"] == {"agent.processor": 3}
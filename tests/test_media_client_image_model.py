@@ -1,10 +1,10 @@
 """Tests for MediaClient.process_image_with_model() method."""
 
-import base64
-
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from agent.media_payload import MediaPayload
+
 
 @pytest.fixture
 def mock_genai_client():
@@ -59,7 +59,7 @@ def _make_response(parts):
     return response
 
 
-IMAGE_BASE64 = base64.b64encode(b"fake image").decode()
+IMAGE = MediaPayload(b"fake image", "image/jpeg")
 
 
 @pytest.mark.asyncio
@@ -73,12 +73,11 @@ async def test_process_image_with_model_text_and_image(media_client, mock_genai_
     mock_genai_client.aio.models.generate_content.return_value = response
 
     result = await media_client.process_image_with_model(
-        IMAGE_BASE64, "image/jpeg", "session_1", "Remove background"
+        IMAGE, "session_1", "Remove background"
     )
 
     assert result["text"] == "Here is your edited image"
-    assert result["image_base64"] == base64.b64encode(image_data).decode("utf-8")
-    assert result["image_mime_type"] == "image/png"
+    assert result["image"] == MediaPayload(image_data, "image/png")
     mock_genai_client.aio.models.generate_content.assert_called_once()
 
 
@@ -89,12 +88,11 @@ async def test_process_image_with_model_text_only(media_client, mock_genai_clien
     mock_genai_client.aio.models.generate_content.return_value = response
 
     result = await media_client.process_image_with_model(
-        IMAGE_BASE64, "image/jpeg", "session_1", "Do something"
+        IMAGE, "session_1", "Do something"
     )
 
     assert result["text"] == "I cannot process this image."
-    assert result["image_base64"] is None
-    assert result["image_mime_type"] is None
+    assert result["image"] is None
 
 
 @pytest.mark.asyncio
@@ -104,7 +102,7 @@ async def test_process_image_with_model_error(media_client, mock_genai_client):
 
     with pytest.raises(RuntimeError, match="Image model processing error"):
         await media_client.process_image_with_model(
-            IMAGE_BASE64, "image/jpeg", "session_1", "Edit this"
+            IMAGE, "session_1", "Edit this"
         )
 
 
@@ -115,7 +113,7 @@ async def test_process_image_with_model_uses_image_model(media_client, mock_gena
     mock_genai_client.aio.models.generate_content.return_value = response
 
     await media_client.process_image_with_model(
-        IMAGE_BASE64, "image/jpeg", "session_1", "Test prompt"
+        IMAGE, "session_1", "Test prompt"
     )
 
     call_kwargs = mock_genai_client.aio.models.generate_content.call_args
@@ -61,22 +61,129 @@ async def test_summarize_document_empty_content_returns_none(media_client, mock_
     mock_genai_client.aio.models.generate_content.assert_not_called()
 
 
+def _prompt_of(call):
+    return call[1]["contents"][0].parts[0].text
+
+
+def _echo_response(**kwargs):
+    """Fake model: final prompts get a fixed summary, chunk prompts echo their part number."""
+    prompt = kwargs["contents"][0].parts[0].text
+    response = MagicMock()
+    if prompt.startswith("Below is part "):
+        response.text = "summary of " + prompt.split(" of ")[0].removeprefix("Below is ")
+    else:
+        response.text = "Final summary."
+    return response
+
+
 @pytest.mark.asyncio
-async def test_summarize_document_truncates_at_30000_chars(media_client, mock_genai_client):
-    """Content longer than 30 000 chars is truncated before sending to Gemini."""
-    long_content = "x" * 50_000
+async def test_summarize_document_long_content_is_chunked_not_truncated(media_client, mock_genai_client):
+    """Content longer than the chunk size is summarized chunk by chunk, nothing dropped."""
+    media_client.summary_chunk_chars = 30_000
+    sections = [f"# Section {i}\n\n" + "x" * 20_000 + "\n" for i in range(3)]
+    mock_genai_client.aio.models.generate_content = AsyncMock(side_effect=_echo_response)
 
-    mock_response = MagicMock()
-    mock_response.text = "A very long document."
-    mock_genai_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+    result = await media_client.summarize_document("".join(sections))
+
+    assert result == "Final summary."
+    prompts = [_prompt_of(c) for c in mock_genai_client.aio.models.generate_content.call_args_list]
+    chunk_prompts = prompts[:-1]
+    assert len(chunk_prompts) == 3
+    for i, prompt in enumerate(chunk_prompts):
+        assert f"# Section {i}" in prompt
+    assert "summary of part 1" in prompts[-1]
+    assert "summary of part 3" in prompts[-1]
+
+
+@pytest.mark.asyncio
+async def test_chunk_summaries_respect_concurrency_cap(mock_genai_client):
+    import asyncio
+
+    with patch("agent.media_client.genai.Client", return_value=mock_genai_client):
+        from agent.media_client import MediaClient
+
+        client = MediaClient("p", "l", "m", summary_chunk_chars=100, summary_concurrency=2)
+    client.client = mock_genai_client
+    active = 0
+    peak = 0
+
+    async def slow(**kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return _echo_response(**kwargs)
+
+    mock_genai_client.aio.models.generate_content = AsyncMock(side_effect=slow)
 
-    await media_client.summarize_document(long_content)
+    await client.summarize_document("".join(f"# S{i}\n" + "y" * 90 + "\n" for i in range(6)))
 
-    call_args = mock_genai_client.aio.models.generate_content.call_args
-    prompt_text = call_args[1]["contents"][0].parts[0].text
-    # The truncated content (30k chars) should appear in the prompt
-    assert "x" * 30_000 in prompt_text
-    assert "x" * 30_001 not in prompt_text
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_chunk_summaries_are_cached(media_client, mock_genai_client):
+    from agent.cache import LRUCache
+    from agent.result_cache import ResultCache
+
+    media_client.summary_chunk_chars = 100
+    media_client.chunk_summary_cache = ResultCache(LRUCache(max_size=100))
+    mock_genai_client.aio.models.generate_content = AsyncMock(side_effect=_echo_response)
+    content = "".join(f"# S{i}\n" + "y" * 90 + "\n" for i in range(3))
+
+    await media_client.summarize_document(content)
+    first_calls = mock_genai_client.aio.models.generate_content.call_count
+    await media_client.summarize_document(content)
+
+    # Second run only pays for the final reduce call
+    assert mock_genai_client.aio.models.generate_content.call_count == first_calls + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_chunks_are_skipped(media_client, mock_genai_client):
+    media_client.summary_chunk_chars = 100
+
+    def flaky(**kwargs):
+        if "part 2 of" in _prompt_of(((), kwargs)):
+            raise RuntimeError("quota")
+        return _echo_response(**kwargs)
+
+    mock_genai_client.aio.models.generate_content = AsyncMock(side_effect=flaky)
+
+    result = await media_client.summarize_document("".join(f"# S{i}\n" + "y" * 90 + "\n" for i in range(3)))
+
+    assert result == "Final summary."
+    final_prompt = _prompt_of(mock_genai_client.aio.models.generate_content.call_args)
+    assert "summary of part 1" in final_prompt
+    assert "summary of part 2" not in final_prompt
+
+
+@pytest.mark.asyncio
+async def test_reduce_stops_when_model_does_not_shrink(media_client, mock_genai_client):
+    """A combine step that echoes its input ends with truncation, not endless rounds."""
+    media_client.summary_chunk_chars = 100
+
+    def verbose(**kwargs):
+        prompt = _prompt_of(((), kwargs))
+        response = MagicMock()
+        if prompt.startswith("Below is part "):
+            response.text = "z" * 80
+        elif prompt.startswith("Below are summaries of consecutive parts of one document. Combine"):
+            response.text = prompt.split("\n\n", 1)[1] + " and more"
+        else:
+            response.text = "Final summary."
+        return response
+
+    mock_genai_client.aio.models.generate_content = AsyncMock(side_effect=verbose)
+
+    result = await media_client.summarize_document("".join(f"# S{i}\n" + "y" * 90 + "\n" for i in range(4)))
+
+    assert result == "Final summary."
+    prompts = [_prompt_of(c) for c in mock_genai_client.aio.models.generate_content.call_args_list]
+    combine_prompts = [p for p in prompts if "Combine them" in p]
+    assert 0 < len(combine_prompts) <= 4
+    assert len(prompts[-1].split("\n\n", 1)[1]) <= 100
 
 
 @pytest.mark.asyncio
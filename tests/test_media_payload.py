@@ -0,0 +1,44 @@
+"""Tests for MediaPayload."""
+
+import base64
+import hashlib
+
+import pytest
+
+from agent.media_payload import MediaPayload
+
+
+def test_from_base64_decodes_once():
+    payload = MediaPayload.from_base64(base64.b64encode(b"audio bytes").decode(), "audio/ogg")
+
+    assert payload.data == b"audio bytes"
+    assert payload.mime_type == "audio/ogg"
+    assert payload.size == len(b"audio bytes")
+
+
+def test_from_base64_rejects_invalid_input():
+    with pytest.raises(ValueError, match="Invalid base64"):
+        MediaPayload.from_base64("not base64!!", "image/jpeg")
+
+
+def test_content_hash_is_sha256():
+    payload = MediaPayload(b"image bytes", "image/png")
+
+    assert payload.content_hash == hashlib.sha256(b"image bytes").hexdigest()
+
+
+def test_to_base64_round_trip():
+    payload = MediaPayload(b"\x00\xffdata", "image/png")
+
+    assert MediaPayload.from_base64(payload.to_base64(), "image/png") == payload
+
+
+def test_payload_is_immutable():
+    payload = MediaPayload(b"data", "image/png")
+
+    with pytest.raises(AttributeError):
+        payload.mime_type = "image/jpeg"
+
+
+def test_repr_omits_bytes():
+    assert "data" not in repr(MediaPayload(b"secret bytes", "image/png"))
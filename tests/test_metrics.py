@@ -0,0 +1,112 @@
+"""Tests for the in-process metrics registry and the /metrics endpoint."""
+
+import pytest
+
+from httpx import ASGITransport, AsyncClient
+
+from agent.metrics import Registry, StageTimer, timed_stage
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("t_seconds", "Test latency.", ("stage",), buckets=(0.1, 1.0))
+    child = latency.labels("parse")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="parse",le="1"} 3' in text
+    assert 't_seconds_bucket{stage="parse",le="+Inf"} 4' in text
+    assert 't_seconds_count{stage="parse"} 4' in text
+    assert 't_seconds_sum{stage="parse"} 4.05' in text
+
+
+def test_label_children_are_cached_and_validated():
+    registry = Registry()
+    requests = registry.counter("t_total", "Test counter.", ("endpoint",))
+    assert requests.labels("/a") is requests.labels("/a")
+    requests.labels("/a").inc()
+    requests.labels('/b"x').inc(2)
+
+    text = registry.render()
+    assert 't_total{endpoint="/a"} 1' in text
+    assert 't_total{endpoint="/b\\"x"} 2' in text
+    with pytest.raises(ValueError):
+        requests.labels("/a", "extra")
+
+
+def test_collect_hooks_run_before_render():
+    registry = Registry()
+    size = registry.gauge("t_entries", "Test gauge.", ("cache",))
+    registry.on_collect(lambda: size.labels("session").set(42))
+    assert 't_entries{cache="session"} 42' in registry.render()
+
+
+@pytest.mark.asyncio
+async def test_timed_stage_records_outcome():
+    @timed_stage("test_stage")
+    async def work(fail: bool) -> str:
+        if fail:
+            raise RuntimeError("boom")
+        return "done"
+
+    ok, error = StageTimer("test_stage").children("background")
+    ok_before, error_before = ok.count, error.count
+
+    assert await work(False) == "done"
+    with pytest.raises(RuntimeError):
+        await work(True)
+
+    assert ok.count == ok_before + 1
+    assert error.count == error_before + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_labels_routes_by_template():
+    from app import app
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/health")
+        await client.get("/api/jobs/abc123")
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'master_agent_http_requests_total{endpoint="/health",method="GET",status="200"}' in text
+    # Path parameters are not label values
+    assert 'endpoint="/api/jobs/{job_id}"' in text
+    assert "abc123" not in text
+    assert "master_agent_http_requests_in_flight" in text
+
+
+@pytest.mark.asyncio
+async def test_stage_latency_is_labelled_with_route():
+    from fastapi import FastAPI
+
+    from app import metrics_middleware
+
+    app = FastAPI()
+    app.middleware("http")(metrics_middleware)
+
+    @timed_stage("test_route_stage")
+    async def stage() -> None:
+        return None
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str) -> dict:
+        await stage()
+        return {"id": item_id}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get("/items/42")).status_code == 200
+    await stage()
+
+    timer = StageTimer("test_route_stage")
+    assert timer.children("/items/{item_id}")[0].count == 1
+    assert timer.children("background")[0].count == 1
@@ -3,6 +3,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from agent.media_payload import MediaPayload
 from agent.processor import MessageProcessor
 
 
@@ -26,8 +27,7 @@ def mock_media_client():
     client.process_image_with_model = AsyncMock(
         return_value={
             "text": "Here is the edited image",
-            "image_base64": "cHJvY2Vzc2VkX2ltYWdl",
-            "image_mime_type": "image/png",
+            "image": MediaPayload(b"processed_image", "image/png"),
         }
     )
     return client
@@ -40,18 +40,18 @@ def processor(mock_runner, mock_session_service, mock_media_client):
     return proc
 
 
-IMAGE_BASE64 = "ZmFrZWltYWdl"
+IMAGE = MediaPayload(b"fakeimage", "image/jpeg")
 
 
 @pytest.mark.asyncio
 async def test_image_with_prompt_routes_to_model(processor, mock_media_client):
     """Image + prompt should call process_image_with_model, not describe_image."""
     result = await processor.process_image(
-        "conv_1", IMAGE_BASE64, "image/jpeg", prompt="Remove background"
+        "conv_1", IMAGE, prompt="Remove background"
     )
 
     mock_media_client.process_image_with_model.assert_called_once_with(
-        IMAGE_BASE64, "image/jpeg", "conv_1", "Remove background"
+        IMAGE, "conv_1", "Remove background"
     )
     mock_media_client.describe_image.assert_not_called()
     assert result["processed_image_base64"] == "cHJvY2Vzc2VkX2ltYWdl"
@@ -62,12 +62,10 @@ async def test_image_with_prompt_routes_to_model(processor, mock_media_client):
 async def test_image_without_prompt_routes_to_describe(processor, mock_media_client):
     """Image without prompt should call describe_image, not process_image_with_model."""
     result = await processor.process_image(
-        "conv_1", IMAGE_BASE64, "image/jpeg", prompt=None
+        "conv_1", IMAGE, prompt=None
     )
 
-    mock_media_client.describe_image.assert_called_once_with(
-        IMAGE_BASE64, "image/jpeg", "conv_1"
-    )
+    mock_media_client.describe_image.assert_called_once_with(IMAGE, "conv_1")
     mock_media_client.process_image_with_model.assert_not_called()
     assert result["processed_image_base64"] is None
     assert result["processed_image_mime_type"] is None
@@ -77,7 +75,7 @@ async def test_image_without_prompt_routes_to_describe(processor, mock_media_cli
 async def test_image_without_prompt_returns_description(processor, mock_media_client):
     """Image without prompt should include the description."""
     result = await processor.process_image(
-        "conv_1", IMAGE_BASE64, "image/jpeg", prompt=None
+        "conv_1", IMAGE, prompt=None
     )
 
     assert result["description"] == "A photo of a cat"
@@ -88,7 +86,7 @@ async def test_image_without_prompt_returns_description(processor, mock_media_cl
 async def test_image_with_prompt_returns_model_text_as_description(processor, mock_media_client):
     """Image with prompt should use model text output as description."""
     result = await processor.process_image(
-        "conv_1", IMAGE_BASE64, "image/jpeg", prompt="Edit this"
+        "conv_1", IMAGE, prompt="Edit this"
     )
 
     assert result["description"] == "Here is the edited image"
@@ -98,7 +96,7 @@ async def test_image_with_prompt_returns_model_text_as_description(processor, mo
 @pytest.mark.asyncio
 async def test_empty_image_returns_all_fields(processor):
     """Empty image should return all fields including new ones."""
-    result = await processor.process_image("conv_1", "", "image/jpeg")
+    result = await processor.process_image("conv_1", MediaPayload(b"", "image/jpeg"))
 
     assert "processed_image_base64" in result
     assert "processed_image_mime_type" in result
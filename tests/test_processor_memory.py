@@ -1,6 +1,7 @@
 """Tests for MessageProcessor memory service integration."""
 
 import pytest
+import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 from agent.processor import MessageProcessor
@@ -95,3 +96,112 @@ async def test_empty_message_skips_memory(processor_with_memory, mock_memory_ser
     result = await processor_with_memory.process("conv_1", "")
     assert "Empty" in result
     mock_memory_service.add_session_to_memory.assert_not_called()
+
+
+# --- Background ingestion via MemoryIngestionWorker ---
+
+
+@pytest_asyncio.fixture
+async def memory_worker(mock_session_service, mock_memory_service):
+    from agent.memory_worker import MemoryIngestionWorker
+
+    worker = MemoryIngestionWorker(mock_session_service, mock_memory_service, max_queue_size=2)
+    worker.start()
+    yield worker
+    await worker.close(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_process_with_worker_returns_before_memory_save(
+    mock_runner, mock_session_service, mock_memory_service, memory_worker
+):
+    """With a worker, process() returns before add_session_to_memory runs; flush completes it."""
+    mock_runner.run_async = MagicMock(return_value=_async_iter([_make_final_event("Response")]))
+    processor = MessageProcessor(
+        mock_runner, mock_session_service, memory_service=mock_memory_service,
+        memory_worker=memory_worker,
+    )
+
+    result = await processor.process("conv_1", "Hello")
+
+    assert result == "Response"
+    mock_memory_service.add_session_to_memory.assert_not_called()
+    await memory_worker.flush()
+    mock_memory_service.add_session_to_memory.assert_called_once_with(
+        mock_session_service.get_session.return_value
+    )
+    assert processor.stats()["memory_ingestion"]["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_coalesces_pending_jobs_per_session(memory_worker, mock_memory_service):
+    """Repeated submits for a pending session result in a single ingestion."""
+    assert memory_worker.submit("user", "s1") is True
+    assert memory_worker.submit("user", "s1") is True
+
+    await memory_worker.flush()
+
+    assert mock_memory_service.add_session_to_memory.call_count == 1
+    assert memory_worker.stats()["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_drops_when_queue_full(memory_worker):
+    """Submits beyond the queue bound are dropped and counted."""
+    assert memory_worker.submit("user", "s1") is True
+    assert memory_worker.submit("user", "s2") is True
+    assert memory_worker.submit("user", "s3") is False
+
+    assert memory_worker.stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_failure_is_counted(memory_worker, mock_memory_service):
+    """Ingestion errors are logged and counted, and the worker keeps running."""
+    mock_memory_service.add_session_to_memory.side_effect = [Exception("Memory Bank error"), None]
+
+    memory_worker.submit("user", "s1")
+    await memory_worker.flush()
+    memory_worker.submit("user", "s2")
+    await memory_worker.flush()
+
+    stats = memory_worker.stats()
+    assert stats["failed"] == 1
+    assert stats["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_close_flushes_pending(mock_session_service, mock_memory_service):
+    """close() ingests everything still queued before stopping."""
+    from agent.memory_worker import MemoryIngestionWorker
+
+    worker = MemoryIngestionWorker(mock_session_service, mock_memory_service)
+    worker.start()
+    worker.submit("user", "s1")
+    worker.submit("user", "s2")
+
+    await worker.close(timeout=1)
+
+    assert mock_memory_service.add_session_to_memory.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_session_reads_go_through_bulkhead(mock_session_service, mock_memory_service):
+    """Loading the session waits for a slot in the sessions bulkhead."""
+    import asyncio
+
+    from agent.bulkhead import Bulkhead
+    from agent.memory_worker import MemoryIngestionWorker
+
+    bulkhead = Bulkhead("sessions", max_concurrent=1, max_queue=10, queue_timeout=5)
+    worker = MemoryIngestionWorker(mock_session_service, mock_memory_service, session_bulkhead=bulkhead)
+    worker.start()
+    async with bulkhead.slot():
+        worker.submit("user", "s1")
+        await asyncio.sleep(0.01)
+        mock_session_service.get_session.assert_not_called()
+
+    await worker.close(timeout=1)
+
+    mock_session_service.get_session.assert_called_once()
+    assert bulkhead.stats()["admitted"] == 2
@@ -0,0 +1,131 @@
+"""Tests for PromptLoader conditional refresh and polling."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from agent.auth import TokenManager
+from agent.prompt_loader import PromptLoader, extract_system_instruction
+
+
+def _dataset(text, etag):
+    return {
+        "etag": etag,
+        "updateTime": "2026-01-01T00:00:00Z",
+        "metadata": {
+            "promptApiSchema": {
+                "multimodalPrompt": {
+                    "promptMessage": {"systemInstruction": {"parts": [{"text": text}]}}
+                }
+            }
+        },
+    }
+
+
+class FakeVertex:
+    """In-memory prompt dataset endpoint honouring readMask and If-None-Match."""
+
+    def __init__(self, text="You are helpful.", etag="v1"):
+        self.text = text
+        self.etag = etag
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.params.get("readMask"):
+            if request.headers.get("If-None-Match") == f'"{self.etag}"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200, json={"etag": self.etag}, headers={"ETag": f'"{self.etag}"'}
+            )
+        return httpx.Response(200, json=_dataset(self.text, self.etag))
+
+    def full_fetches(self):
+        return [r for r in self.requests if not r.url.params.get("readMask")]
+
+
+@pytest.fixture
+def vertex():
+    return FakeVertex()
+
+
+@pytest.fixture
+def loader(vertex):
+    tokens = TokenManager(fetch_access_token=lambda scopes: ("access-token", None))
+    http = httpx.AsyncClient(transport=httpx.MockTransport(vertex.handler))
+    return PromptLoader("proj", "europe-west4", "123", tokens, http_client=http)
+
+
+@pytest.mark.asyncio
+async def test_initial_load(loader, vertex):
+    assert await loader.refresh(force=True) is True
+
+    assert loader.instruction == "You are helpful."
+    assert loader.version == "v1"
+    assert vertex.requests[0].headers["Authorization"] == "Bearer access-token"
+    assert "/datasets/123" in str(vertex.requests[0].url)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_version_skips_full_fetch(loader, vertex):
+    await loader.refresh(force=True)
+
+    assert await loader.refresh() is False  # readMask check, new version metadata
+    assert await loader.refresh() is False  # 304 via If-None-Match
+
+    assert len(vertex.full_fetches()) == 1
+    assert vertex.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert loader.stats()["unchanged"] == 2
+
+
+@pytest.mark.asyncio
+async def test_new_version_is_fetched_and_applied(loader, vertex):
+    applied = []
+
+    async def on_change(instruction):
+        applied.append(instruction)
+
+    await loader.refresh(force=True)
+    vertex.text, vertex.etag = "You are terse.", "v2"
+
+    assert await loader.refresh(on_change=on_change) is True
+    assert applied == ["You are terse."]
+    assert loader.version == "v2"
+
+
+@pytest.mark.asyncio
+async def test_missing_instruction_raises_and_keeps_current(loader, vertex):
+    await loader.refresh(force=True)
+    vertex.text, vertex.etag = "", "v2"
+
+    with pytest.raises(ValueError):
+        await loader.refresh()
+
+    assert loader.instruction == "You are helpful."
+    assert loader.stats()["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_poller_applies_new_versions(loader, vertex):
+    applied = asyncio.Event()
+    seen = []
+
+    async def on_change(instruction):
+        seen.append(instruction)
+        applied.set()
+
+    await loader.refresh(force=True)
+    vertex.text, vertex.etag = "You are terse.", "v2"
+    loader.start(0.01, on_change)
+
+    await asyncio.wait_for(applied.wait(), timeout=1)
+    await loader.close()
+
+    assert seen == ["You are terse."]
+    assert loader.stats()["polling"] is False
+
+
+def test_extract_system_instruction_handles_missing_fields():
+    assert extract_system_instruction({}) is None
+    assert extract_system_instruction({"metadata": {"promptApiSchema": None}}) is None
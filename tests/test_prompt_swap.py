@@ -0,0 +1,101 @@
+"""Tests for hot prompt swaps that keep the MessageProcessor."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agent.cache import LRUCache
+from agent.processor import MessageProcessor
+
+
+def _make_final_event(text):
+    event = MagicMock()
+    event.is_final_response.return_value = True
+    part = MagicMock()
+    part.text = text
+    event.content.parts = [part]
+    return event
+
+
+def _runner(text, gate=None):
+    async def run_async(**kwargs):
+        if gate is not None:
+            await gate.wait()
+        yield _make_final_event(text)
+
+    runner = MagicMock()
+    runner.run_async = MagicMock(side_effect=run_async)
+    return runner
+
+
+@pytest.fixture
+def vertex_session_service():
+    session = MagicMock()
+    session.id = "vertex-session-1"
+    service = MagicMock()
+    service.get_session = AsyncMock(return_value=session)
+    sessions_response = MagicMock()
+    sessions_response.sessions = [session]
+    service.list_sessions = AsyncMock(return_value=sessions_response)
+    return service
+
+
+def _memory_service():
+    memory_service = MagicMock()
+    memory_service.add_session_to_memory = AsyncMock()
+    return memory_service
+
+
+@pytest.mark.asyncio
+async def test_swap_keeps_session_cache(vertex_session_service):
+    """After a swap the cached session ID is reused: no list_sessions herd."""
+    processor = MessageProcessor(
+        _runner("old"),
+        vertex_session_service,
+        memory_service=_memory_service(),
+        session_cache=LRUCache(max_size=10),
+    )
+    await processor.process("conv_1", "hi")
+
+    processor.swap_runner(_runner("new"))
+
+    assert await processor.process("conv_1", "hi") == "new"
+    vertex_session_service.list_sessions.assert_called_once()
+    assert processor.stats()["runner_swaps"] == 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_turn_finishes_on_old_runner(vertex_session_service):
+    gate = asyncio.Event()
+    processor = MessageProcessor(
+        _runner("old", gate=gate),
+        vertex_session_service,
+        memory_service=_memory_service(),
+    )
+
+    in_flight = asyncio.create_task(processor.process("conv_1", "hi"))
+    await asyncio.sleep(0.01)
+    processor.swap_runner(_runner("new"))
+    gate.set()
+
+    assert await in_flight == "old"
+    assert await processor.process("conv_1", "again") == "new"
+
+
+@pytest.mark.asyncio
+async def test_apply_prompt_swaps_runner_on_existing_processor():
+    from app import _apply_prompt
+
+    processor = MagicMock()
+    app = MagicMock()
+    app.state.processor = processor
+    app.state.memory_service = None
+
+    with patch("app.create_agent") as create_agent, patch("app.Runner") as runner_cls:
+        await _apply_prompt(app, "You are terse.")
+
+    create_agent.assert_called_once()
+    assert create_agent.call_args.kwargs["instruction"] == "You are terse."
+    processor.swap_runner.assert_called_once_with(runner_cls.return_value)
+    assert app.state.processor is processor
@@ -0,0 +1,209 @@
+"""Tests for ResultCache and cached media results in MessageProcessor."""
+
+import asyncio
+import os
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from agent.cache import LRUCache
+from agent.media_payload import MediaPayload
+from agent.processor import MessageProcessor
+from agent.result_cache import ResultCache, media_cache_key
+
+IMAGE = MediaPayload(b"fakeimage", "image/jpeg")
+AUDIO = MediaPayload(b"fakeaudio", "audio/ogg")
+
+
+class Counter:
+    def __init__(self, value="A photo of a cat"):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.value
+
+
+# --- media_cache_key ---
+
+
+def test_key_depends_on_bytes_mime_model_and_prompt():
+    base = media_cache_key("describe_image", IMAGE, "gemini")
+
+    assert base == media_cache_key("describe_image", MediaPayload(b"fakeimage", "image/jpeg"), "gemini")
+    assert base != media_cache_key("describe_image", MediaPayload(b"other", "image/jpeg"), "gemini")
+    assert base != media_cache_key("describe_image", MediaPayload(b"fakeimage", "image/png"), "gemini")
+    assert base != media_cache_key("describe_image", IMAGE, "gemini-pro")
+    assert base != media_cache_key("describe_image", IMAGE, "gemini", prompt="what is this?")
+    assert base != media_cache_key("transcribe", IMAGE, "gemini")
+
+
+# --- ResultCache ---
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_caches_result():
+    cache = ResultCache(LRUCache(max_size=10))
+    compute = Counter()
+
+    assert await cache.get_or_compute("k", compute) == "A photo of a cat"
+    assert await cache.get_or_compute("k", compute) == "A photo of a cat"
+
+    assert compute.calls == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_compute():
+    cache = ResultCache(LRUCache(max_size=10))
+    compute = Counter()
+
+    results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(3)))
+
+    assert results == ["A photo of a cat"] * 3
+    assert compute.calls == 1
+    assert cache.stats()["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_lets_waiter_compute():
+    cache = ResultCache(LRUCache(max_size=10))
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.sleep(60)
+
+    leader = asyncio.create_task(cache.get_or_compute("k", hang))
+    await started.wait()
+    follower = asyncio.create_task(cache.get_or_compute("k", Counter()))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "A photo of a cat"
+    assert leader.cancelled()
+    assert await cache.get("k") == "A photo of a cat"
+
+
+@pytest.mark.asyncio
+async def test_failures_and_empty_results_are_not_cached():
+    cache = ResultCache(LRUCache(max_size=10))
+
+    async def failing():
+        raise RuntimeError("model error")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute("k", failing)
+    assert await cache.get_or_compute("k", Counter("")) == ""
+    assert await cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_new_instance(tmp_path):
+    first = ResultCache(LRUCache(max_size=10), disk_dir=str(tmp_path))
+    await first.set("k", "cached description")
+
+    second = ResultCache(LRUCache(max_size=10), disk_dir=str(tmp_path))
+
+    assert await second.get("k") == "cached description"
+    assert second.stats()["disk"]["hits"] == 1
+    assert await second.get("k") == "cached description"  # now served from memory
+    assert second.stats()["disk"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_entries_expire(tmp_path):
+    now = [1_000_000.0]
+    cache = ResultCache(
+        LRUCache(max_size=10), disk_dir=str(tmp_path), disk_ttl_seconds=60, clock=lambda: now[0]
+    )
+    await cache.set("k", "value")
+    os.utime(tmp_path / "k.json", (now[0], now[0]))
+    cache.memory.clear()
+
+    now[0] += 61
+
+    assert await cache.get("k") is None
+    assert not (tmp_path / "k.json").exists()
+
+
+def test_disk_prune_keeps_newest(tmp_path):
+    cache = ResultCache(LRUCache(max_size=10), disk_dir=str(tmp_path), disk_max_entries=2)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache._disk_write(key, key)
+        os.utime(tmp_path / f"{key}.json", (1000 + i, 1000 + i))
+
+    cache._disk_prune()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["b.json", "c.json"]
+
+
+# --- MessageProcessor integration ---
+
+
+@pytest.fixture
+def media_client():
+    client = MagicMock()
+    client.model_name = "gemini-2.0-flash"
+    client.describe_image = AsyncMock(return_value="A photo of a cat")
+    client.transcribe = AsyncMock(return_value="Hello there")
+    return client
+
+
+@pytest.fixture
+def processor(media_client):
+    service = MagicMock()
+    proc = MessageProcessor(
+        MagicMock(),
+        service,
+        media_client,
+        description_cache=ResultCache(LRUCache(max_size=10)),
+        transcription_cache=ResultCache(LRUCache(max_size=10)),
+    )
+    proc.process = AsyncMock(return_value="Agent response")
+    return proc
+
+
+@pytest.mark.asyncio
+async def test_forwarded_image_is_described_once(processor, media_client):
+    first = await processor.process_image("conv_1", IMAGE)
+    second = await processor.process_image("conv_2", MediaPayload(b"fakeimage", "image/jpeg"))
+
+    media_client.describe_image.assert_called_once()
+    assert first["description"] == second["description"] == "A photo of a cat"
+    assert processor.process.call_count == 2
+    assert processor.stats()["description_cache"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_different_images_are_not_shared(processor, media_client):
+    await processor.process_image("conv_1", IMAGE)
+    await processor.process_image("conv_1", MediaPayload(b"another", "image/jpeg"))
+
+    assert media_client.describe_image.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_forwarded_voice_is_transcribed_once(processor, media_client):
+    first = await processor.process_voice("group_1", AUDIO)
+    second = await processor.process_voice("group_2", MediaPayload(b"fakeaudio", "audio/ogg"))
+
+    media_client.transcribe.assert_called_once()
+    assert first["transcription"] == second["transcription"] == "Hello there"
+    assert processor.process.call_count == 2  # the agent turn still runs each time
+    assert processor.stats()["transcription_cache"]["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_transcription_cache_evicts_least_recently_used(processor, media_client):
+    processor.transcription_cache = ResultCache(LRUCache(max_size=1))
+
+    await processor.process_voice("conv_1", AUDIO)
+    await processor.process_voice("conv_1", MediaPayload(b"other", "audio/ogg"))
+    await processor.process_voice("conv_1", AUDIO)
+
+    assert media_client.transcribe.call_count == 3
+    assert processor.stats()["transcription_cache"]["memory"]["evictions"] == 2
@@ -0,0 +1,200 @@
+"""Tests for RetryPolicy / RetryBudget and retried model calls against a failing fake upstream."""
+
+import httpx
+import pytest
+from unittest.mock import MagicMock, patch
+
+from google.genai import errors as genai_errors
+
+from agent.bulkhead import BulkheadFull
+from agent.retry import RetryBudget, RetryPolicy, is_retryable, retry_after_seconds
+
+
+def _api_error(code: int, retry_after: str | None = None) -> genai_errors.APIError:
+    headers = {"Retry-After": retry_after} if retry_after else {}
+    response = httpx.Response(code, headers=headers)
+    body = {"error": {"code": code, "message": "injected", "status": "UNAVAILABLE"}}
+    cls = genai_errors.ServerError if code >= 500 else genai_errors.ClientError
+    return cls(code, body, response)
+
+
+class FakeUpstream:
+    """Fails the first ``failures`` calls with ``error``, then answers ``text``."""
+
+    def __init__(self, failures: int, error: Exception, text: str = "ok"):
+        self.failures = failures
+        self.error = error
+        self.text = text
+        self.calls = 0
+
+    async def generate_content(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        response = MagicMock()
+        response.text = self.text
+        return response
+
+
+class RecordingSleep:
+    def __init__(self):
+        self.delays = []
+
+    async def __call__(self, delay: float) -> None:
+        self.delays.append(delay)
+
+
+def _policy(**kwargs) -> tuple[RetryPolicy, RecordingSleep]:
+    sleep = RecordingSleep()
+    return RetryPolicy(sleep=sleep, rng=lambda: 0.5, **kwargs), sleep
+
+
+# --- classification ---
+
+
+def test_retryable_classification():
+    assert is_retryable(_api_error(503))
+    assert is_retryable(_api_error(429))
+    assert not is_retryable(_api_error(400))
+    assert not is_retryable(_api_error(403))
+    assert is_retryable(httpx.ConnectTimeout("slow"))
+    assert not is_retryable(BulkheadFull("model", 10))
+    assert not is_retryable(ValueError("bad"))
+
+
+def test_retry_after_header_parsed():
+    assert retry_after_seconds(_api_error(429, "3")) == 3.0
+    assert retry_after_seconds(_api_error(429)) is None
+    assert retry_after_seconds(ValueError()) is None
+
+
+# --- policy ---
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_error_with_jittered_backoff():
+    policy, sleep = _policy(max_attempts=3, base_delay=1.0)
+    upstream = FakeUpstream(failures=2, error=_api_error(503))
+
+    result = await policy.call("transcribe", upstream.generate_content)
+
+    assert result.text == "ok"
+    assert upstream.calls == 3
+    # Full jitter with rng=0.5: 0.5 * 1s, then 0.5 * 2s
+    assert sleep.delays == [0.5, 1.0]
+    assert policy.stats()["retries_by_operation"] == {"transcribe": 2}
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts():
+    policy, _ = _policy(max_attempts=2)
+    upstream = FakeUpstream(failures=5, error=_api_error(500))
+
+    with pytest.raises(genai_errors.ServerError):
+        await policy.call("summarize", upstream.generate_content)
+
+    assert upstream.calls == 2
+    assert policy.stats()["gave_up"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_error_not_retried():
+    policy, sleep = _policy()
+    upstream = FakeUpstream(failures=1, error=_api_error(400))
+
+    with pytest.raises(genai_errors.ClientError):
+        await policy.call("describe_image", upstream.generate_content)
+
+    assert upstream.calls == 1
+    assert sleep.delays == []
+
+
+@pytest.mark.asyncio
+async def test_retry_after_respected_and_capped():
+    policy, sleep = _policy(max_delay=5.0)
+    upstream = FakeUpstream(failures=1, error=_api_error(429, "2"))
+    await policy.call("transcribe", upstream.generate_content)
+    assert sleep.delays == [2.0]
+
+    # A Retry-After beyond max_delay is not waited for
+    upstream = FakeUpstream(failures=1, error=_api_error(429, "60"))
+    with pytest.raises(genai_errors.ClientError):
+        await policy.call("transcribe", upstream.generate_content)
+    assert upstream.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_budget_caps_retries_during_outage():
+    policy, _ = _policy(max_attempts=5, budget=RetryBudget(ratio=0.1, max_tokens=2))
+    outage = FakeUpstream(failures=1000, error=_api_error(503))
+
+    for _ in range(10):
+        with pytest.raises(genai_errors.ServerError):
+            await policy.call("summarize", outage.generate_content)
+
+    # 10 requests cost 10 first attempts + only the budgeted retries
+    stats = policy.stats()
+    assert stats["retries"] == 2
+    assert stats["budget_exhausted"] >= 8
+    assert outage.calls == 12
+
+
+def test_budget_refills_with_requests():
+    budget = RetryBudget(ratio=0.5, max_tokens=1)
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_withdraw()
+
+
+# --- MediaClient against a failing fake upstream ---
+
+
+@pytest.mark.asyncio
+async def test_media_client_transcribe_survives_transient_errors():
+    from agent.media_client import MediaClient
+    from agent.media_payload import MediaPayload
+
+    upstream = FakeUpstream(failures=2, error=_api_error(503), text="hello there")
+    fake_client = MagicMock()
+    fake_client.aio.models = upstream
+    policy, _ = _policy(max_attempts=3)
+    with patch("agent.media_client.genai.Client", return_value=fake_client):
+        client = MediaClient("p", "europe-west4", "gemini-2.0-flash", retry_policy=policy)
+
+    text = await client.transcribe(MediaPayload(b"OggS", "audio/ogg"), "s1")
+
+    assert text == "hello there"
+    assert upstream.calls == 3
+    assert policy.stats()["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retrying_gemini_does_not_retry_after_partial_output():
+    from google.adk.models import Gemini, LlmRequest, LlmResponse
+
+    from agent.adk_agent import RetryingGemini
+
+    calls = 0
+
+    async def flaky(self, llm_request, stream=False):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise _api_error(503)
+        yield LlmResponse(partial=True)
+        raise _api_error(503)
+
+    policy, _ = _policy(max_attempts=5)
+    model = RetryingGemini(model="gemini-2.0-flash", retry_policy=policy)
+    with patch.object(Gemini, "generate_content_async", flaky):
+        received = []
+        with pytest.raises(genai_errors.ServerError):
+            async for response in model.generate_content_async(LlmRequest(), stream=True):
+                received.append(response)
+
+    # First failure (nothing yielded) is retried; the mid-stream one is not
+    assert calls == 2
+    assert len(received) == 1
+    assert policy.stats()["retries_by_operation"] == {"agent_turn": 1}
@@ -0,0 +1,127 @@
+"""Tests for KeyedScheduler and per-conversation ordering in MessageProcessor."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from agent.processor import MessageProcessor
+from agent.scheduler import KeyedScheduler
+
+
+# --- KeyedScheduler ---
+
+
+@pytest.mark.asyncio
+async def test_same_key_runs_in_order():
+    """Work for one key runs strictly in arrival order, never overlapping."""
+    scheduler = KeyedScheduler()
+    log = []
+
+    async def turn(n):
+        async with scheduler.slot("conv"):
+            log.append(f"start-{n}")
+            await asyncio.sleep(0.01)
+            log.append(f"end-{n}")
+
+    await asyncio.gather(turn(1), turn(2), turn(3))
+
+    assert log == ["start-1", "end-1", "start-2", "end-2", "start-3", "end-3"]
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_in_parallel():
+    """Different keys do not wait for each other."""
+    scheduler = KeyedScheduler()
+    both_running = asyncio.Event()
+    running = set()
+
+    async def turn(key):
+        async with scheduler.slot(key):
+            running.add(key)
+            if len(running) == 2:
+                both_running.set()
+            await asyncio.wait_for(both_running.wait(), timeout=1)
+
+    await asyncio.gather(turn("a"), turn("b"))
+
+    assert both_running.is_set()
+
+
+@pytest.mark.asyncio
+async def test_depth_and_stats_track_queue():
+    """depth() counts the holder plus waiters; state is dropped when idle."""
+    scheduler = KeyedScheduler()
+    release = asyncio.Event()
+
+    async def turn():
+        async with scheduler.slot("conv"):
+            await release.wait()
+
+    tasks = [asyncio.create_task(turn()) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    assert scheduler.depth("conv") == 3
+    stats = scheduler.stats()
+    assert stats["active_keys"] == 1
+    assert stats["waiting"] == 2
+    assert stats["backlog"] == {"conv": 3}
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert scheduler.depth("conv") == 0
+    assert scheduler.stats() == {"active_keys": 0, "waiting": 0, "max_depth": 0, "backlog": {}}
+
+
+@pytest.mark.asyncio
+async def test_slot_released_on_error():
+    """An exception inside the slot does not block the next turn."""
+    scheduler = KeyedScheduler()
+
+    with pytest.raises(ValueError):
+        async with scheduler.slot("conv"):
+            raise ValueError("boom")
+
+    async with scheduler.slot("conv"):
+        assert scheduler.depth("conv") == 1
+
+
+# --- MessageProcessor integration ---
+
+
+def _make_final_event(text):
+    event = MagicMock()
+    event.is_final_response.return_value = True
+    event.content = MagicMock()
+    part = MagicMock()
+    part.text = text
+    event.content.parts = [part]
+    return event
+
+
+@pytest.mark.asyncio
+async def test_processor_serializes_turns_per_conversation():
+    """Concurrent process() calls for one conversation do not interleave runner turns."""
+    active = 0
+    max_active = 0
+
+    async def run_async(**kwargs):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        yield _make_final_event("ok")
+
+    runner = MagicMock()
+    runner.run_async = MagicMock(side_effect=run_async)
+    session_service = MagicMock()
+    session_service.get_session = AsyncMock(return_value=MagicMock())
+    processor = MessageProcessor(runner, session_service)
+
+    results = await asyncio.gather(*(processor.process("conv_1", f"msg {i}") for i in range(3)))
+
+    assert results == ["ok", "ok", "ok"]
+    assert max_active == 1
+    assert processor.queue_depth("conv_1") == 0
@@ -0,0 +1,76 @@
+"""Tests for per-request stage timing (Server-Timing header and log field)."""
+
+import logging
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from httpx import ASGITransport, AsyncClient
+
+from agent.metrics import timed_stage
+from agent.timing import RequestTiming, record_stage, request_timing
+
+
+def test_header_aggregates_repeated_stages():
+    timing = RequestTiming()
+    timing.record("run_turn", 0.8124)
+    timing.record("gcs_upload", 0.02)
+    timing.record("gcs_upload", 0.0201)
+
+    header = timing.header()
+
+    assert header.startswith('run_turn;dur=812.4, gcs_upload;desc="2 calls";dur=40.1, total;dur=')
+    assert timing.summary()["stages"]["gcs_upload"] == {"ms": 40.1, "calls": 2}
+
+
+def test_record_without_request_is_noop():
+    assert request_timing.get() is None
+    record_stage("run_turn", 1.0)  # no error, nothing to record into
+
+
+@pytest.mark.asyncio
+async def test_timed_stage_records_into_current_request():
+    @timed_stage("media_transcribe")
+    async def transcribe():
+        return "text"
+
+    timing = RequestTiming()
+    token = request_timing.set(timing)
+    try:
+        await transcribe()
+    finally:
+        request_timing.reset(token)
+
+    assert timing.summary()["stages"]["media_transcribe"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_api_response_has_server_timing_and_log_field(caplog):
+    from app import app
+
+    gcs = MagicMock()
+    gcs.upload_document = AsyncMock(return_value="gs://docling-documents/input/x.pdf")
+    docling_client = MagicMock()
+    docling_client.process_document = AsyncMock(return_value={"content": "# Report"})
+    media_client = MagicMock()
+    media_client.summarize_document = AsyncMock(return_value="Summary")
+    app.state.docling_client = docling_client
+    app.state.docling_gcs_client = gcs
+    app.state.media_client = media_client
+
+    transport = ASGITransport(app=app)
+    with caplog.at_level(logging.INFO, logger="app"):
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/document",
+                files={"document": ("report.pdf", b"%PDF-1.4", "application/pdf")},
+                data={"conversation_id": "tg_1"},
+            )
+
+    assert response.status_code == 200
+    server_timing = response.headers["Server-Timing"]
+    assert "request_parse;dur=" in server_timing
+    assert "total;dur=" in server_timing
+    records = [r for r in caplog.records if hasattr(r, "server_timing")]
+    assert len(records) == 1
+    assert "request_parse" in records[0].server_timing["stages"]
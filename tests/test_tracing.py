@@ -0,0 +1,193 @@
+"""Tests for spans, trace propagation and head/tail sampling."""
+
+import base64
+import logging
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from httpx import ASGITransport, AsyncClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+from agent.tracing import build_tracer_provider, extract_context, inject_context
+
+CALLER_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+CALLER_SPAN_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    """In-memory stand-in for the OTLP collector, sampling every trace."""
+    import app
+    import agent.tracing
+
+    exporter = InMemorySpanExporter()
+    provider = build_tracer_provider("master-agent", exporter, sample_ratio=1.0, tail_latency=0)
+    tracer = provider.get_tracer("master_agent")
+    monkeypatch.setattr(agent.tracing, "TRACER", tracer)
+    monkeypatch.setattr(app, "TRACER", tracer)
+
+    def finished():
+        provider.force_flush()
+        return {span.name: span for span in exporter.get_finished_spans()}
+
+    yield finished
+    provider.shutdown()
+
+
+def _sampling_provider(sample_ratio: float, tail_latency: float):
+    exporter = InMemorySpanExporter()
+    provider = build_tracer_provider("master-agent", exporter, sample_ratio, tail_latency)
+
+    def finished():
+        provider.force_flush()
+        return [span.name for span in exporter.get_finished_spans()]
+
+    return provider.get_tracer("test"), finished
+
+
+def test_cloud_trace_header_round_trip(collector):
+    import agent.tracing
+
+    caller = extract_context({"X-Cloud-Trace-Context": f"{CALLER_TRACE_ID}/12345;o=1"})
+    span_context = trace.get_current_span(caller).get_span_context()
+    assert f"{span_context.trace_id:032x}" == CALLER_TRACE_ID
+    assert span_context.span_id == 12345
+    assert span_context.trace_flags.sampled
+
+    with agent.tracing.TRACER.start_as_current_span("stage", context=caller) as span:
+        headers = inject_context({})
+    span_id = span.get_span_context().span_id
+    assert headers["traceparent"] == f"00-{CALLER_TRACE_ID}-{span_id:016x}-01"
+    assert headers["X-Cloud-Trace-Context"] == f"{CALLER_TRACE_ID}/{span_id};o=1"
+
+
+def test_no_context_injects_nothing():
+    assert inject_context({}) == {}
+
+
+@pytest.mark.asyncio
+async def test_request_spans_and_docling_propagation(collector):
+    from app import app
+    from agent.docling_client import DoclingClient
+
+    sent_headers = {}
+
+    def docling_handler(request: httpx.Request) -> httpx.Response:
+        sent_headers.update(request.headers)
+        return httpx.Response(200, json={"content": "# Report"})
+
+    tokens = MagicMock()
+    tokens.id_token_header = AsyncMock(return_value={})
+    gcs = MagicMock()
+    gcs.upload_document = AsyncMock(return_value="gs://docling-documents/input/x.pdf")
+    media_client = MagicMock()
+    media_client.summarize_document = AsyncMock(return_value="Summary")
+    app.state.docling_client = DoclingClient(
+        "https://docling.example",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(docling_handler)),
+        token_manager=tokens,
+    )
+    app.state.docling_gcs_client = gcs
+    app.state.media_client = media_client
+    app.state.document_index = None
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/document",
+            json={
+                "conversation_id": "tg_1",
+                "document_base64": base64.b64encode(b"%PDF-1.4").decode(),
+                "mime_type": "application/pdf",
+                "filename": "report.pdf",
+            },
+            headers={"traceparent": f"00-{CALLER_TRACE_ID}-{CALLER_SPAN_ID}-01"},
+        )
+    assert response.status_code == 200
+
+    spans = collector()
+    server = spans["POST /api/document"]
+    stage = spans["docling_process_document"]
+    post = spans["docling.post"]
+    # One trace, continued from the caller: server -> stage -> client span
+    assert {f"{s.context.trace_id:032x}" for s in (server, stage, post)} == {CALLER_TRACE_ID}
+    assert f"{server.parent.span_id:016x}" == CALLER_SPAN_ID
+    assert server.kind is SpanKind.SERVER
+    assert server.attributes["http.route"] == "/api/document"
+    assert stage.parent.span_id == server.context.span_id
+    assert post.parent.span_id == stage.context.span_id
+    assert post.kind is SpanKind.CLIENT
+    # Docling receives the client span as its parent
+    assert sent_headers["traceparent"] == f"00-{CALLER_TRACE_ID}-{post.context.span_id:016x}-01"
+    assert sent_headers["x-cloud-trace-context"].startswith(f"{CALLER_TRACE_ID}/{post.context.span_id};")
+
+
+@pytest.mark.asyncio
+async def test_server_span_ends_when_client_disconnects_before_body(collector, caplog):
+    from app import app
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        raise OSError("client went away")
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/jobs/abc",
+        "raw_path": b"/api/jobs/abc",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("test", 1),
+        "server": ("test", 80),
+        "app": app,
+    }
+    with caplog.at_level(logging.INFO, logger="app"):
+        with pytest.raises(Exception):
+            await app(scope, receive, send)
+
+    assert "GET /api/jobs/{job_id}" in collector()
+    assert [r for r in caplog.records if hasattr(r, "server_timing")]
+
+
+def test_head_sampling_respects_caller_decision():
+    tracer, finished = _sampling_provider(sample_ratio=0.0, tail_latency=0)
+
+    with tracer.start_as_current_span("unsampled-root"):
+        pass
+    caller = extract_context({"traceparent": f"00-{CALLER_TRACE_ID}-{CALLER_SPAN_ID}-01"})
+    with tracer.start_as_current_span("caller-sampled", context=caller):
+        with tracer.start_as_current_span("child"):
+            pass
+
+    assert sorted(finished()) == ["caller-sampled", "child"]
+
+
+def test_tail_sampling_keeps_slow_and_failed_traces():
+    tracer, finished = _sampling_provider(sample_ratio=0.0, tail_latency=1.0)
+
+    with tracer.start_as_current_span("fast"):
+        with tracer.start_as_current_span("fast-child"):
+            pass
+
+    with pytest.raises(RuntimeError):
+        with tracer.start_as_current_span("failed"):
+            with tracer.start_as_current_span("failed-child"):
+                raise RuntimeError("docling down")
+
+    slow = tracer.start_span("slow", start_time=1_000_000_000)
+    with trace.use_span(slow):
+        with tracer.start_as_current_span("slow-child"):
+            pass
+    slow.end(end_time=slow.start_time + 2_000_000_000)
+
+    assert sorted(finished()) == ["failed", "failed-child", "slow", "slow-child"]
@@ -5,6 +5,8 @@ from unittest.mock import AsyncMock, MagicMock
 
 from httpx import ASGITransport, AsyncClient
 
+from agent.media_payload import MediaPayload
+
 
 @pytest.fixture
 def mock_processor():
@@ -116,3 +118,81 @@ async def test_voice_endpoint_error_handling(app_with_mocks, mock_processor):
         )
     assert response.status_code == 500
     assert "unavailable" in response.json().get("error", "").lower()
+
+
+@pytest.mark.asyncio
+async def test_voice_endpoint_multipart_upload(app_with_mocks, mock_processor):
+    """multipart/form-data passes raw audio bytes to the processor."""
+    transport = ASGITransport(app=app_with_mocks)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/voice",
+            data={"conversation_id": "tg_123456"},
+            files={"audio": ("voice.ogg", b"raw audio bytes", "audio/ogg")},
+        )
+    assert response.status_code == 200
+    assert response.json()["transcription"] == "Test transcription"
+    mock_processor.process_voice.assert_called_once_with(
+        "tg_123456", MediaPayload(b"raw audio bytes", "audio/ogg")
+    )
+
+
+@pytest.mark.asyncio
+async def test_voice_endpoint_octet_stream_upload(app_with_mocks, mock_processor):
+    """application/octet-stream takes metadata from X-* headers."""
+    transport = ASGITransport(app=app_with_mocks)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/voice",
+            content=b"raw audio bytes",
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Conversation-Id": "tg_123456",
+                "X-Mime-Type": "audio/mpeg",
+                "X-Metadata": '{"telegram": {"chat_id": 1, "user_id": 2, "chat_type": "private"}}',
+            },
+        )
+    assert response.status_code == 200
+    mock_processor.process_voice.assert_called_once_with(
+        "tg_123456", MediaPayload(b"raw audio bytes", "audio/mpeg")
+    )
+
+
+@pytest.mark.asyncio
+async def test_voice_endpoint_octet_stream_missing_conversation_id(app_with_mocks):
+    """Binary upload without X-Conversation-Id returns 400."""
+    transport = ASGITransport(app=app_with_mocks)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/voice",
+            content=b"raw audio bytes",
+            headers={"Content-Type": "application/octet-stream"},
+        )
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+@pytest.mark.asyncio
+async def test_voice_endpoint_multipart_missing_file(app_with_mocks):
+    """multipart without the audio part returns 400."""
+    transport = ASGITransport(app=app_with_mocks)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/voice",
+            data={"conversation_id": "tg_123456"},
+            files={"other": ("x.bin", b"data", "application/octet-stream")},
+        )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_voice_endpoint_invalid_base64(app_with_mocks, mock_processor):
+    """Invalid base64 audio returns 400 before reaching the processor."""
+    transport = ASGITransport(app=app_with_mocks)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/voice",
+            json={"conversation_id": "tg_123456", "audio_base64": "not base64!!"},
+        )
+    assert response.status_code == 400
+    mock_processor.process_voice.assert_not_called()